@@ -0,0 +1,47 @@
+"""Helpers shared by the tests."""
+
+
+import os
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from xarta import metrics, network
+from xarta.database import PaperDatabase, initialise_database
+
+
+def make_database(test, papers=(), name="xarta.db"):
+    """Create a library in a temporary directory that is removed after `test`,
+    holding `papers`, given as (ref, tags, metadata) tuples where the metadata
+    dictionary sets any of the title, authors, category and abstract (by default
+    empty). Returns the path of the database."""
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    path = os.path.join(directory.name, name)
+    with redirect_stdout(StringIO()):
+        initialise_database(path)
+        with PaperDatabase(path) as paper_database:
+            for paper_id, tags, metadata in papers:
+                data = {"title": "", "authors": [], "category": "", "abstract": ""}
+                data.update(metadata)
+                paper_database.insert_paper(paper_id, data, tags, "")
+    return path
+
+
+def use_temporary_state(test):
+    """Keep the state written by the network helpers (the rate limits and the
+    metrics log) in a temporary directory for the duration of `test`, rather than
+    in the user's state directory."""
+    tmp = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp.cleanup)
+    patchers = [
+        mock.patch.object(network, "get_state_directory", return_value=tmp.name),
+        mock.patch.object(metrics, "get_state_directory", return_value=tmp.name),
+        mock.patch.object(metrics, "get_config_option", return_value=None),
+        mock.patch.object(network, "_limiter", None),
+    ]
+    for patcher in patchers:
+        patcher.start()
+        test.addCleanup(patcher.stop)
+    return tmp.name
@@ -0,0 +1,41 @@
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import TestCase
+
+from xarta.analytics import Library
+from xarta.database import PaperDatabase
+
+from helpers import make_database
+
+
+class TestLibraryStatistics(TestCase):
+    def setUp(self):
+        path = make_database(
+            self,
+            [
+                (paper_id, tags, {"authors": authors, "category": "hep-ph"})
+                for paper_id, authors, tags in [
+                    ("1704.05849", ["J. Gargalionis", "R. Volkas"], ["lq", "nu"]),
+                    ("hep-ph/9901234", ["John Gargalionis"], ["lq"]),
+                    ("1911.06334", ["J. Gargalionis", "R. Volkas"], ["lq", "nu"]),
+                    # both authors have the key ("smith", "j")
+                    ("cern:ATL-1", ["Jane Smith", "John Smith"], ["atlas"]),
+                ]
+            ],
+        )
+        with redirect_stdout(StringIO()):
+            with PaperDatabase(path) as paper_database:
+                self.library = Library(paper_database)
+
+    def test_statistics(self):
+        library = self.library
+        self.assertEqual(
+            library.papers_by_date(), [("1999", 1), ("2017", 1), ("2019", 1)]
+        )
+        self.assertEqual(library.papers_by_date(monthly=True)[0], ("1999-01", 1))
+        self.assertEqual(library.papers_by_category(), [("hep-ph", 4)])
+        self.assertEqual(library.papers_by_tag(), [("lq", 3), ("nu", 2), ("atlas", 1)])
+        tags, matrix = library.tag_cooccurrence(2)
+        self.assertEqual(tags, ["lq", "nu"])
+        self.assertEqual(matrix.tolist(), [[3, 2], [2, 2]])
+        self.assertEqual(library.coauthors(5), [("John Gargalionis", "R. Volkas", 2)])
@@ -0,0 +1,156 @@
+import os
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import TestCase, mock
+
+from xarta.bibtex import arxiv_entry, arxiv_year, make_key, make_unique_keys
+from xarta.bibtex import write_bibliography
+from xarta.commands.export import Export
+from xarta.database import PaperDatabase
+
+from helpers import make_database
+
+
+class TestArxivBibtex(TestCase):
+    def test_year_from_id(self):
+        self.assertEqual(arxiv_year("1704.05849"), 2017)
+        self.assertEqual(arxiv_year("hep-ph/9901234"), 1999)
+        self.assertEqual(arxiv_year("hep-th/0101001"), 2001)
+
+    def test_keys(self):
+        authors = ["Erwin Schrödinger", "S. Weinberg"]
+        key = make_key("{surname}:{year}{word}", "1911.06334", authors, "The Cat")
+        self.assertEqual(key, "Schrodinger:2019cat")
+        self.assertEqual(make_unique_keys(["a", "b", "a"]), ["aa", "b", "ab"])
+
+    def test_entry(self):
+        entry = arxiv_entry(
+            "key", "hep-ph/9901234", "Quarks & $\\gamma$s", ["A. B", "C. D"], "hep-ph"
+        )
+        self.assertTrue(entry.startswith("@misc{key,\n"))
+        self.assertIn("author = {A. B and C. D}", entry)
+        self.assertIn("title = {{Quarks \\& $\\gamma$s}}", entry)
+        self.assertIn("eprint = {hep-ph/9901234}", entry)
+        self.assertIn("year = {1999}", entry)
+
+        title = "B_s^0 mixing at 100% ~ x^2 for $B_s^0$, \\_ and $5"
+        entry = arxiv_entry("key", "1704.05849", title, ["A. B"], "hep-ph")
+        self.assertIn(
+            "title = {{B\\_s\\^{}0 mixing at 100\\% \\~{} x\\^{}2 for $B_s^0$, "
+            "\\_ and \\$5}}",
+            entry,
+        )
+
+
+class TestWriteBibliography(TestCase):
+    def test_unchanged_file_is_not_rewritten(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "refs.bib")
+            entries = [("1", "@misc{a,\n}\n"), ("2", "@misc{b,\n}\n")]
+            self.assertEqual(write_bibliography(path, entries), (2, 0, 0))
+            mtime = os.stat(path).st_mtime_ns
+
+            self.assertIsNone(write_bibliography(path, entries))
+            self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+
+            entries = [("1", "@misc{a,\n  year = {2020}\n}\n"), ("3", "@misc{c,\n}\n")]
+            self.assertEqual(write_bibliography(path, entries), (1, 1, 1))
+            with open(path) as f:
+                self.assertIn("@misc{c,", f.read())
+
+            # edited by hand since the last export: written again
+            with open(path, "a") as f:
+                f.write("% note\n")
+            self.assertEqual(write_bibliography(path, entries), (0, 0, 0))
+
+
+class TestStoredBibtex(TestCase):
+    def test_selected_papers(self):
+        refs = ["1704.05849", "hep-ph/9901234", "1911.06334"]
+        path = make_database(self, [(ref, [], {}) for ref in refs])
+        with redirect_stdout(StringIO()), mock.patch(
+            "xarta.database.SQL_VARIABLE_LIMIT", 1
+        ):
+            with PaperDatabase(path) as paper_database:
+                paper_database.set_bibtex("1911.06334", "arxiv", "@article{a,}")
+                selection = ["1911.06334", "1704.05849"]
+                stored = paper_database.get_stored_bibtex(selection)
+                lookups = paper_database.get_bibtex_lookups(selection)
+                everything = paper_database.get_bibtex_lookups()
+        self.assertEqual(
+            stored, {"1911.06334": ("@article{a,}", ""), "1704.05849": ("", "")}
+        )
+        self.assertEqual(
+            lookups,
+            [
+                ("1704.05849", "arxiv", 1),
+                ("1704.05849", "inspire", 1),
+                ("1911.06334", "arxiv", 0),
+                ("1911.06334", "inspire", 1),
+            ],
+        )
+        self.assertEqual([lookup[0] for lookup in everything[::2]], refs)
+
+
+class TestCitationKeys(TestCase):
+    def setUp(self):
+        self.path = make_database(
+            self,
+            [
+                ("1704.05849", [], {"authors": ["John Gargalionis"]}),
+                ("1711.00001", [], {"authors": ["J. Gargalionis"]}),
+                ("hep-ph/9901234", [], {"authors": ["S. Weinberg"]}),
+            ],
+        )
+        for target, value in [
+            ("xarta.commands.base.get_database_path", self.path),
+            ("xarta.commands.export.get_libraries", []),
+            ("xarta.commands.export.get_key_scheme", "{surname}:{year}"),
+        ]:
+            patcher = mock.patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_keys_of_generated_bibtex_resolve(self):
+        with redirect_stdout(StringIO()):
+            with PaperDatabase(self.path) as paper_database:
+                keys = paper_database.get_citation_keys("{surname}:{year}")
+                resolved, unresolved = paper_database.resolve_keys(
+                    ["Gargalionis:2017b", "hep-ph9901234", "Gargalionis:2017"], keys
+                )
+        self.assertEqual(
+            keys,
+            {
+                "1704.05849": "Gargalionis:2017a",
+                "1711.00001": "Gargalionis:2017b",
+                "hep-ph/9901234": "Weinberg:1999",
+            },
+        )
+        self.assertEqual(
+            resolved,
+            {"Gargalionis:2017b": "1711.00001", "hep-ph9901234": "hep-ph/9901234"},
+        )
+        self.assertEqual(unresolved, ["Gargalionis:2017"])
+
+    def test_export_cited_in(self):
+        options = {
+            "--ref": None,
+            "<tag>": [],
+            "--filter": None,
+            "--author": None,
+            "--category": None,
+            "--title": None,
+            "--remote": False,
+            "--export-alias": False,
+            "arxiv": True,
+            "inspire": False,
+        }
+        with redirect_stdout(StringIO()):
+            entries, unresolved = Export(options).get_entries(
+                ["Gargalionis:2017b", "Weinberg:1999", "missing"]
+            )
+        # keys do not depend on which papers are exported
+        self.assertEqual([ref for ref, _ in entries], ["1711.00001", "hep-ph/9901234"])
+        self.assertTrue(entries[0][1].startswith("@misc{Gargalionis:2017b,"))
+        self.assertEqual(unresolved, ["missing"])
@@ -0,0 +1,69 @@
+import sqlite3
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import TestCase, mock
+
+from xarta import cache
+from xarta.database import PaperDatabase
+from xarta.utils import XartaError
+
+from helpers import make_database
+
+
+class TestQueryCache(TestCase):
+    def setUp(self):
+        self.path = make_database(self)
+
+    def test_invalidation(self):
+        options = {"<tag>": ["b", "a"], "--author": None}
+        cache.put(self.path, "browse", options, "table", 80)
+        self.assertEqual(cache.get(self.path, "browse", options, 80), "table")
+        options["<tag>"] = ["a", "b"]
+        self.assertEqual(cache.get(self.path, "browse", options, 80), "table")
+        self.assertIsNone(cache.get(self.path, "browse", options, 120))
+
+        # a write from outside xarta changes the key
+        with sqlite3.connect(self.path) as connection:
+            connection.execute("INSERT INTO papers (id) VALUES ('1704.05849');")
+        connection.close()
+        self.assertIsNone(cache.get(self.path, "browse", options, 80))
+
+        # a write through PaperDatabase clears the cache
+        cache.put(self.path, "browse", options, "table", 80)
+        with redirect_stdout(StringIO()):
+            with PaperDatabase(self.path) as paper_database:
+                paper_database.set_paper_alias("1704.05849", "alias")
+        with cache.connect(self.path) as connection:
+            rows = connection.execute("SELECT * FROM results;").fetchall()
+        connection.close()
+        self.assertEqual(rows, [])
+
+    def test_config_is_part_of_key(self):
+        options = {"--filter": "year > 2019"}
+        enabled = {"enable_filters": "True"}
+        with mock.patch.object(cache, "get_config_options", return_value=enabled):
+            cache.put(self.path, "browse", options, "table", 80)
+            self.assertEqual(cache.get(self.path, "browse", options, 80), "table")
+        disabled = {"enable_filters": "False"}
+        with mock.patch.object(cache, "get_config_options", return_value=disabled):
+            self.assertIsNone(cache.get(self.path, "browse", options, 80))
+
+    def test_eviction(self):
+        with mock.patch.object(cache, "get_cache_size", return_value=350):
+            for i in range(3):
+                cache.put(self.path, "info", {"<ref>": str(i)}, "x" * 100)
+            cache.get(self.path, "info", {"<ref>": "0"})
+            cache.put(self.path, "info", {"<ref>": "3"}, "x" * 100)
+            cached = [
+                cache.get(self.path, "info", {"<ref>": str(i)}) is not None
+                for i in range(4)
+            ]
+        self.assertEqual(cached, [True, False, True, True])
+
+    def test_invalid_cache_size(self):
+        for size in ["lots", "-1", "nan"]:
+            with mock.patch.object(cache, "get_config_option", return_value=size):
+                with self.assertRaises(XartaError):
+                    cache.get(self.path, "info", {"<ref>": "0"})
+        with mock.patch.object(cache, "get_config_option", return_value="off"):
+            self.assertIsNone(cache.get(self.path, "info", {"<ref>": "0"}))
@@ -0,0 +1,34 @@
+from unittest import TestCase
+
+import numpy as np
+
+from xarta.classifier import TagClassifier
+from xarta.vectors import SparseRows
+
+
+class TestTagClassifier(TestCase):
+    def test_classifier(self):
+        texts = [
+            "leptoquark flavour anomalies",
+            "leptoquark models of flavour",
+            "scalar leptoquark couplings",
+            "dark matter direct detection",
+            "dark matter halo",
+            "relic density of dark matter",
+            "leptoquark dark matter",
+        ]
+        labels = np.array(
+            [[1, 0, 0], [1, 0, 0], [1, 0, 0], [0, 1, 0], [0, 1, 0], [0, 1, 0]]
+            + [[1, 1, 1]],
+            dtype=bool,
+        )
+        rows = SparseRows.from_texts(texts + ["flavour of leptoquark", "dark halo"])
+        rows = rows.normalised(np.ones(1 << 20))
+        classifier = TagClassifier.train(
+            rows.take(range(len(texts))), labels, ["lq", "dm", "rare"]
+        )
+        # tags of fewer than three papers are not learned
+        self.assertEqual(classifier.tags, ["lq", "dm"])
+        probabilities = classifier.probabilities(rows.take([7, 8]))
+        self.assertEqual(probabilities.shape, (2, 2))
+        self.assertEqual((probabilities > 0.5).tolist(), [[True, False], [False, True]])
@@ -0,0 +1,98 @@
+import os
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import TestCase, mock
+
+from xarta.database import DEPENDENT_TABLES, PaperDatabase
+
+from helpers import make_database
+
+
+class TestDeletePapers(TestCase):
+    def setUp(self):
+        data = {"title": "leptoquarks", "authors": ["R. Volkas"], "category": "hep-ph"}
+        self.path = make_database(
+            self,
+            [
+                (paper_id, ["lq"], data)
+                for paper_id in ["1704.05849", "hep-ph/9901234", "1911.06334"]
+            ],
+        )
+
+    def test_delete_papers(self):
+        with redirect_stdout(StringIO()):
+            with PaperDatabase(self.path) as paper_database:
+                paper_database.update_tag_model(
+                    ["1704.05849", "hep-ph/9901234", "1911.06334"]
+                )
+                paper_database.delete_papers(["1704.05849", "hep-ph/9901234"])
+
+                cursor = paper_database.cursor
+                cursor.execute("SELECT id FROM papers;")
+                self.assertEqual(cursor.fetchall(), [("1911.06334",)])
+                for table, column in DEPENDENT_TABLES.items():
+                    cursor.execute(
+                        f"SELECT COUNT(*) FROM {table} WHERE {column} != '1911.06334';"
+                    )
+                    self.assertEqual(cursor.fetchall(), [(0,)], table)
+                cursor.execute("SELECT tag, papers FROM tag_model;")
+                self.assertEqual(cursor.fetchall(), [("lq", 1)])
+
+    def test_unused_pdfs_are_removed(self):
+        store = tempfile.TemporaryDirectory()
+        self.addCleanup(store.cleanup)
+        patcher = mock.patch("xarta.utils.get_pdf_directory", return_value=store.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # two papers share a downloaded pdf, the third was added from disk
+        shared = os.path.join("ab", "ab12.pdf")
+        local = os.path.join(store.name, "local.pdf")
+        os.makedirs(os.path.join(store.name, "ab"))
+        for path in [os.path.join(store.name, shared), local]:
+            with open(path, "wb") as f:
+                f.write(b"%PDF-")
+        with redirect_stdout(StringIO()):
+            with PaperDatabase(self.path) as paper_database:
+                paper_database.add_pdf("1704.05849", "ab12", shared, 5, "")
+                paper_database.add_pdf("hep-ph/9901234", "ab12", shared, 5, "")
+                paper_database.add_pdf("1911.06334", "cd34", local, 5, "")
+
+            with PaperDatabase(self.path) as paper_database:
+                paper_database.delete_papers(["1704.05849", "1911.06334"])
+            self.assertTrue(os.path.isfile(os.path.join(store.name, shared)))
+            self.assertTrue(os.path.isfile(local))
+
+            with PaperDatabase(self.path) as paper_database:
+                paper_database.delete_paper("hep-ph/9901234")
+                # files are only removed once the deletion is committed
+                self.assertTrue(os.path.isfile(os.path.join(store.name, shared)))
+            self.assertFalse(os.path.isfile(os.path.join(store.name, shared)))
+            self.assertTrue(os.path.isfile(local))
+
+    def test_replaced_pdfs_are_removed(self):
+        store = tempfile.TemporaryDirectory()
+        self.addCleanup(store.cleanup)
+        patcher = mock.patch("xarta.utils.get_pdf_directory", return_value=store.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        old, new = os.path.join("ab", "ab12.pdf"), os.path.join("cd", "cd34.pdf")
+        for path in [old, new]:
+            os.makedirs(os.path.join(store.name, os.path.dirname(path)))
+            with open(os.path.join(store.name, path), "wb") as f:
+                f.write(b"%PDF-")
+        with PaperDatabase(self.path) as paper_database:
+            paper_database.add_pdf("1704.05849", "ab12", old, 5, "")
+            paper_database.add_pdf("hep-ph/9901234", "ab12", old, 5, "")
+
+        # the old pdf is kept while another paper still has it
+        with PaperDatabase(self.path) as paper_database:
+            paper_database.add_pdf("1704.05849", "cd34", new, 5, "")
+        self.assertTrue(os.path.isfile(os.path.join(store.name, old)))
+
+        with PaperDatabase(self.path) as paper_database:
+            paper_database.add_pdf("hep-ph/9901234", "cd34", new, 5, "")
+        self.assertFalse(os.path.isfile(os.path.join(store.name, old)))
+        self.assertTrue(os.path.isfile(os.path.join(store.name, new)))
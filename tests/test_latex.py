@@ -0,0 +1,23 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from xarta.latex import get_cited_keys
+
+
+class TestCitedKeys(TestCase):
+    def test_project_directory(self):
+        files = {
+            "main.tex": "\\citep[see][p. 2]{1704.05849, weinberg}\n\\nocite{x}\n",
+            "main.aux": "\\citation{1704.05849,hep-ph9901234}\n",
+            "main.bcf": '<bcf:citekey order="1">alias</bcf:citekey>\n',
+            "empty.tex": "",
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            for name, text in files.items():
+                with open(os.path.join(directory, name), "w") as f:
+                    f.write(text)
+            keys = get_cited_keys(directory)
+        self.assertEqual(
+            sorted(keys), ["1704.05849", "alias", "hep-ph9901234", "weinberg", "x"]
+        )
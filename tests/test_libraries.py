@@ -0,0 +1,56 @@
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import TestCase
+
+from xarta.commands.list import List
+from xarta.database import LIBRARY_COLUMN, PaperDatabase
+
+from helpers import make_database
+
+
+class TestLibraries(TestCase):
+    def setUp(self):
+        data = {"authors": ["John Gargalionis"]}
+        self.path = make_database(self, [("1704.05849", ["leptoquarks"], data)])
+        self.group_path = make_database(
+            self, [("1704.05849", ["shared"], data)], "group.db"
+        )
+
+    def test_all_libraries(self):
+        with redirect_stdout(StringIO()):
+            with PaperDatabase(self.path, [("group", self.group_path)]) as db:
+                with db.all_libraries():
+                    papers = db.query_papers(
+                        None, None, None, None, ["shared"], None, silent=True
+                    )
+                    names = db.get_author_names()
+                papers_of_main = db.get_all_papers()
+        self.assertEqual([paper[LIBRARY_COLUMN] for paper in papers], ["group"])
+        self.assertEqual(names, ["John Gargalionis", "John Gargalionis"])
+        self.assertEqual(len(papers_of_main), 1)
+
+    def test_tag_cycle_across_libraries(self):
+        for path, parent, tag in [
+            (self.path, "leptoquarks", "shared"),
+            (self.group_path, "shared", "leptoquarks"),
+        ]:
+            with redirect_stdout(StringIO()):
+                with PaperDatabase(path) as db:
+                    db.edit_tag_parents(parent, [tag], "add")
+        for root in [[], ["physics"]]:
+            if root:
+                with redirect_stdout(StringIO()):
+                    with PaperDatabase(self.path) as db:
+                        db.edit_tag_parents("physics", ["leptoquarks"], "add")
+            output = StringIO()
+            with redirect_stdout(output):
+                with PaperDatabase(self.path, [("group", self.group_path)]) as db:
+                    with db.all_libraries():
+                        List({}).list_tags(db, "alphabetical", None)
+            indent = "  " * len(root)
+            self.assertEqual(
+                output.getvalue().splitlines(),
+                ["List of tags:"]
+                + root
+                + [indent + "leptoquarks", indent + "  shared"],
+            )
@@ -0,0 +1,39 @@
+import hashlib
+import os
+import tempfile
+from unittest import TestCase
+
+from xarta.local import find_pdfs, get_metadata, scan_pdfs
+
+
+class TestLocalPdfs(TestCase):
+    def test_scan(self):
+        files = {
+            "thesis.pdf": b"%PDF-1.4\n<< /Title (A \\(long\\) thesis) /Author (Jane Doe, John Smith) >>\n"
+            + bytes(range(256)) * 20000,
+            "sub/copy.pdf": b"%PDF-1.5\n<prism:doi>10.1103/PhysRevD.82.112004</prism:doi>\n",
+            "sub/My_Notes.pdf": b"%PDF-1.5\n",
+            "sub/notes.txt": b"not a pdf",
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            for name, data in files.items():
+                os.makedirs(
+                    os.path.dirname(os.path.join(directory, name)), exist_ok=True
+                )
+                with open(os.path.join(directory, name), "wb") as f:
+                    f.write(data)
+            paths = find_pdfs(directory)
+            scans = list(scan_pdfs(paths, max_workers=2))
+
+        names = [os.path.relpath(scan["path"], directory) for scan in scans]
+        self.assertEqual(names, ["thesis.pdf", "sub/My_Notes.pdf", "sub/copy.pdf"])
+        thesis, notes, copy = scans
+        self.assertEqual(
+            thesis["sha256"], hashlib.sha256(files["thesis.pdf"]).hexdigest()
+        )
+        self.assertEqual(copy["doi"], "10.1103/PhysRevD.82.112004")
+
+        data = get_metadata(thesis)
+        self.assertEqual(data["title"], "A (long) thesis")
+        self.assertEqual(data["authors"], ["Jane Doe", "John Smith"])
+        self.assertEqual(get_metadata(notes)["title"], "My Notes")
@@ -0,0 +1,97 @@
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import TestCase, mock
+
+from xarta import minhash
+from xarta.commands.duplicates import Duplicates
+from xarta.commands.related import Related
+from xarta.database import PaperDatabase
+
+from helpers import make_database
+
+
+LEPTOQUARKS = (
+    "Leptoquark explanations of the flavour anomalies in B meson decays and "
+    "their connection to radiative neutrino masses at one loop"
+)
+# the same abstract, as revised in a later version of the paper
+LEPTOQUARKS_REVISED = LEPTOQUARKS + " at colliders"
+DARK_MATTER = (
+    "Direct detection of weakly interacting massive particles with xenon "
+    "time projection chambers deep underground"
+)
+
+
+class TestSignatures(TestCase):
+    def test_similarity(self):
+        leptoquarks = minhash.signature(LEPTOQUARKS)
+        self.assertEqual(len(leptoquarks), minhash.NUM_PERMUTATIONS)
+        self.assertEqual(len(minhash.band_buckets(leptoquarks)), minhash.BANDS)
+        self.assertTrue(
+            (minhash.from_blob(minhash.to_blob(leptoquarks)) == leptoquarks).all()
+        )
+        self.assertEqual(
+            minhash.similarity(leptoquarks, minhash.signature(LEPTOQUARKS.upper())),
+            1.0,
+        )
+        revised = minhash.signature(LEPTOQUARKS_REVISED)
+        self.assertGreater(minhash.similarity(leptoquarks, revised), 0.8)
+        dark_matter = minhash.signature(DARK_MATTER)
+        self.assertLess(minhash.similarity(leptoquarks, dark_matter), 0.2)
+        self.assertIsNone(minhash.signature("the and of"))
+
+
+class TestSimilarPapers(TestCase):
+    def setUp(self):
+        self.path = make_database(
+            self,
+            [
+                ("1704.05849", [], {"abstract": LEPTOQUARKS}),
+                ("1911.06334", [], {"abstract": LEPTOQUARKS_REVISED}),
+                ("hep-ph/9901234", [], {"abstract": DARK_MATTER}),
+            ],
+        )
+
+    def run_database(self, method, *args):
+        with redirect_stdout(StringIO()):
+            with PaperDatabase(self.path) as paper_database:
+                return getattr(paper_database, method)(*args)
+
+    def run_command(self, command, options):
+        output = StringIO()
+        with mock.patch(
+            "xarta.commands.base.get_database_path", return_value=self.path
+        ), redirect_stdout(output):
+            command(options).run()
+        return output.getvalue()
+
+    def test_duplicates_and_related(self):
+        duplicates = self.run_database("get_duplicate_papers", 0.6)
+        self.assertEqual(
+            [pair[1:] for pair in duplicates], [("1704.05849", "1911.06334")]
+        )
+        self.assertEqual(self.run_database("get_duplicate_papers", 1.0), [])
+        related = self.run_database("get_related_papers", "1704.05849", 0.2)
+        self.assertEqual([paper[1] for paper in related], ["1911.06334"])
+        self.assertEqual(
+            self.run_database("get_related_papers", "hep-ph/9901234", 0.2), []
+        )
+
+        output = self.run_command(Duplicates, {"--threshold": None})
+        self.assertIn("1704.05849", output)
+        self.assertNotIn("hep-ph/9901234", output)
+        options = {"<ref>": "hep-ph/9901234", "--threshold": None, "--number": "10"}
+        output = self.run_command(Related, options)
+        self.assertEqual(output, "No papers related to hep-ph/9901234 found.\n")
+
+    def test_backfill(self):
+        # as for papers added before signatures were stored
+        with redirect_stdout(StringIO()):
+            with PaperDatabase(self.path) as paper_database:
+                expected = paper_database.get_duplicate_papers(0.6)
+                paper_database.cursor.execute("DELETE FROM minhashes;")
+                paper_database.cursor.execute("DELETE FROM lsh_buckets;")
+                self.assertEqual(paper_database.get_duplicate_papers(0.6), [])
+                self.assertEqual(paper_database.backfill_minhashes(), 3)
+                self.assertEqual(paper_database.backfill_minhashes(), 0)
+                self.assertEqual(paper_database.get_duplicate_papers(0.6), expected)
@@ -0,0 +1,365 @@
+"""Tests for the network helpers, run against a local http server."""
+
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import TestCase, mock
+from urllib.parse import parse_qs, urlsplit
+
+from xarta import metrics, providers
+from xarta.commands.download import Download, store_pdf
+from xarta.database import PaperDatabase
+from xarta.metrics import summarise
+from xarta.network import RateLimiter, download_file
+from xarta.utils import XartaError, get_arxiv_listing
+
+from helpers import make_database, use_temporary_state
+
+
+PAYLOAD = b"%PDF-1.4\n" + bytes(range(256)) * 1000
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves PAYLOAD, honouring range requests unless `ignore_range` is set."""
+
+    ignore_range = False
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(self.headers.get("Range"))
+        range_header = self.headers.get("Range")
+        if range_header and not self.ignore_range:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.end_headers()
+                return
+            body = PAYLOAD[start:]
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}"
+            )
+        else:
+            body = PAYLOAD
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDownloadFile(TestCase):
+    def setUp(self):
+        use_temporary_state(self)
+        RangeHandler.ignore_range = False
+        RangeHandler.requests_seen = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/1704.05849.pdf"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.partial = os.path.join(self.tmp.name, "1704.05849.part")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def assert_complete(self, sha256, size):
+        self.assertEqual(sha256, hashlib.sha256(PAYLOAD).hexdigest())
+        self.assertEqual(size, len(PAYLOAD))
+        with open(self.partial, "rb") as f:
+            self.assertEqual(f.read(), PAYLOAD)
+
+    def test_full_download(self):
+        self.assert_complete(*download_file(self.url, self.partial))
+        self.assertEqual(RangeHandler.requests_seen, [None])
+
+    def test_resumes_partial_download(self):
+        with open(self.partial, "wb") as f:
+            f.write(PAYLOAD[:1000])
+        self.assert_complete(*download_file(self.url, self.partial))
+        self.assertEqual(RangeHandler.requests_seen, ["bytes=1000-"])
+
+    def test_restarts_when_range_is_ignored(self):
+        RangeHandler.ignore_range = True
+        with open(self.partial, "wb") as f:
+            f.write(b"garbage")
+        self.assert_complete(*download_file(self.url, self.partial))
+
+    def test_already_complete(self):
+        with open(self.partial, "wb") as f:
+            f.write(PAYLOAD)
+        self.assert_complete(*download_file(self.url, self.partial))
+
+
+class TestStorePdf(TestCase):
+    def setUp(self):
+        use_temporary_state(self)
+        RangeHandler.ignore_range = False
+        RangeHandler.requests_seen = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{self.server.server_port}/pdf"
+        patcher = mock.patch(
+            "xarta.commands.download.get_pdf_url", lambda ref: f"{url}/{ref}"
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = self.tmp.name
+        os.makedirs(os.path.join(self.store, "partial"))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_identical_pdfs_are_stored_once(self):
+        sha256 = hashlib.sha256(PAYLOAD).hexdigest()
+        path = os.path.join(sha256[:2], sha256 + ".pdf")
+        for ref in ["1704.05849", "hep-ph/9901234"]:
+            result = store_pdf(ref, self.store)
+            self.assertEqual(result[:3], (sha256, path, len(PAYLOAD)))
+        self.assertEqual(
+            os.listdir(os.path.join(self.store, sha256[:2])), [sha256 + ".pdf"]
+        )
+        self.assertEqual(os.listdir(os.path.join(self.store, "partial")), [])
+        with open(os.path.join(self.store, path), "rb") as f:
+            self.assertEqual(f.read(), PAYLOAD)
+
+    def test_papers_added_from_disk_are_skipped(self):
+        path = make_database(
+            self, [("local:ab12cd34", [], {}), ("1704.05849", [], {})]
+        )
+        for target, value in [
+            ("xarta.commands.base.get_database_path", path),
+            ("xarta.commands.download.get_pdf_directory", self.store),
+            ("xarta.utils.get_pdf_directory", self.store),
+        ]:
+            patcher = mock.patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        output = StringIO()
+        with redirect_stdout(output):
+            Download({"--jobs": "2", "--all": True, "--force": True}).run()
+        self.assertIn("Skipping 1 papers added from disk.", output.getvalue())
+        self.assertEqual(len(RangeHandler.requests_seen), 1)
+        with PaperDatabase(path) as paper_database:
+            self.assertTrue(paper_database.get_pdf_path("1704.05849"))
+
+    def test_jobs_must_be_a_number(self):
+        with self.assertRaises(XartaError):
+            Download({"--jobs": "abc", "--all": True}).run()
+
+
+class TestRateLimiter(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "rate-limits.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_buckets_are_shared_through_file(self):
+        # two limiters on the same file behave like two xarta processes
+        limits = {"example.org": (20.0, 1)}
+        first = RateLimiter(self.path, limits)
+        second = RateLimiter(self.path, limits)
+        start = time.monotonic()
+        for limiter in [first, second, first, second, first]:
+            limiter.acquire("https://example.org/a")
+        # one request from the burst, then four more at 20 per second
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+    def test_unlisted_hosts_are_not_limited(self):
+        limiter = RateLimiter(self.path, {"example.org": (0.001, 1)})
+        start = time.monotonic()
+        for _ in range(5):
+            limiter.acquire("http://127.0.0.1:8000/a")
+        self.assertLess(time.monotonic() - start, 0.1)
+
+
+class TestMetrics(TestCase):
+    def test_log_is_rotated(self):
+        path = os.path.join(use_temporary_state(self), "network-metrics.jsonl")
+        with mock.patch("xarta.metrics.MAX_METRICS_BYTES", 300):
+            for attempt in range(10):
+                metrics.record("request", endpoint="api", attempt=attempt)
+        self.assertLessEqual(os.path.getsize(path), 300)
+        self.assertTrue(os.path.isfile(path + ".1"))
+        events = metrics.read_events(path)
+        attempts = [event["attempt"] for event in events]
+        self.assertEqual(attempts, sorted(attempts))
+        self.assertEqual(attempts[-1], 9)
+
+    def test_summarise(self):
+        events = [
+            {"event": "request", "endpoint": "api", "status": 200, "seconds": 0.05},
+            {"event": "request", "endpoint": "api", "status": 503, "seconds": 0.3},
+            {
+                "event": "request",
+                "endpoint": "api",
+                "status": 200,
+                "seconds": 0.7,
+                "attempt": 1,
+            },
+            {"event": "request", "endpoint": "api", "status": None, "seconds": 30},
+            {"event": "cache", "endpoint": "api", "hits": 3, "misses": 1},
+        ]
+        summary = summarise(events)["api"]
+        self.assertEqual(summary["requests"], 4)
+        self.assertEqual(summary["failed"], 2)
+        self.assertEqual(summary["retried"], 1)
+        self.assertEqual((summary["cache_hits"], summary["cache_misses"]), (3, 1))
+        self.assertEqual(summary["histogram"], [1, 0, 1, 1, 0, 0, 0, 1])
+        self.assertEqual(summary["statuses"], {"200": 2, "503": 1, "error": 1})
+
+
+# a response of the INSPIRE literature search, as recorded
+INSPIRE_RESPONSE = b"""@article{Gargalionis:2017ggt,
+    author = "Gargalionis, John and Volkas, Raymond R.",
+    title = "{Exploding operators for Majorana neutrino masses and beyond}",
+    eprint = "1704.05849",
+    archivePrefix = "arXiv",
+    year = "2017"
+}
+
+@article{Weinberg:1999xx,
+    author = "Weinberg, Steven",
+    title = "{An old paper}",
+    eprint = "hep-ph/9901234",
+    year = "1999"
+}
+"""
+
+
+class InspireHandler(BaseHTTPRequestHandler):
+    """Stands in for the INSPIRE literature api."""
+
+    queries = []
+
+    def do_GET(self):
+        self.queries.append(parse_qs(urlsplit(self.path).query))
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(INSPIRE_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(INSPIRE_RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestInspireBatch(TestCase):
+    def setUp(self):
+        use_temporary_state(self)
+        InspireHandler.queries = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), InspireHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{self.server.server_port}/api/literature"
+        patcher = mock.patch.object(providers, "INSPIRE_LITERATURE_URL", url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_entries_are_matched_to_papers(self):
+        ids = ["hep-ph/9901234", "1704.05849", "2001.00001"]
+        bibtex = providers.fetch_inspire_bibtex(ids)
+
+        self.assertEqual(len(InspireHandler.queries), 1)
+        query = InspireHandler.queries[0]["q"][0]
+        self.assertEqual(
+            query, "arxiv:hep-ph/9901234 or arxiv:1704.05849 or arxiv:2001.00001"
+        )
+        self.assertTrue(bibtex["1704.05849"].startswith("@article{Gargalionis"))
+        self.assertTrue(bibtex["hep-ph/9901234"].startswith("@article{Weinberg"))
+        self.assertEqual(bibtex["2001.00001"], "")
+
+
+# part of the rss feed of new hep-ph submissions, as recorded
+LISTING_RESPONSE = b"""<?xml version='1.0' encoding='UTF-8'?>
+<rss xmlns:arxiv="http://arxiv.org/schemas/atom" xmlns:dc="http://purl.org/dc/elements/1.1/" version="2.0">
+  <channel>
+    <title>hep-ph updates on arXiv.org</title>
+    <item>
+      <title>Leptoquarks and the flavour anomalies</title>
+      <link>https://arxiv.org/abs/2410.01234</link>
+      <description>arXiv:2410.01234v1 Announce Type: new
+Abstract: We revisit leptoquark explanations
+ of the anomalies.</description>
+      <arxiv:announce_type>new</arxiv:announce_type>
+      <dc:creator>John Gargalionis, Raymond R. Volkas</dc:creator>
+    </item>
+    <item>
+      <title>Axion dark matter</title>
+      <link>https://arxiv.org/abs/2410.05678</link>
+      <description>arXiv:2410.05678v1 Announce Type: cross
+Abstract: Axions as dark matter.</description>
+      <arxiv:announce_type>cross</arxiv:announce_type>
+      <dc:creator>A. Author</dc:creator>
+    </item>
+    <item>
+      <title>An old paper, revised</title>
+      <link>https://arxiv.org/abs/2301.00001</link>
+      <description>arXiv:2301.00001v2 Announce Type: replace
+Abstract: Revised.</description>
+      <arxiv:announce_type>replace</arxiv:announce_type>
+      <dc:creator>B. Author</dc:creator>
+    </item>
+  </channel>
+</rss>
+"""
+
+
+class ListingHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(LISTING_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(LISTING_RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestArxivListing(TestCase):
+    def setUp(self):
+        use_temporary_state(self)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ListingHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{self.server.server_port}/rss/{{category}}"
+        patcher = mock.patch(
+            "xarta.utils.get_config_option",
+            lambda option, default="": url if option == "listing_url" else default,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_new_submissions(self):
+        papers = get_arxiv_listing("hep-ph")
+        self.assertEqual(
+            [paper["id"] for paper in papers], ["2410.01234", "2410.05678"]
+        )
+        self.assertEqual(
+            papers[0]["abstract"],
+            "We revisit leptoquark explanations of the anomalies.",
+        )
+        self.assertEqual(
+            papers[0]["authors"], ["John Gargalionis", "Raymond R. Volkas"]
+        )
+        self.assertEqual(papers[0]["category"], "hep-ph")
@@ -0,0 +1,30 @@
+from unittest import TestCase
+
+from xarta.commands.citations import Citations
+from xarta.commands.duplicates import Duplicates
+from xarta.commands.recommend import Recommend
+from xarta.commands.related import Related
+from xarta.utils import XartaError
+
+
+class TestOptions(TestCase):
+    def assert_invalid(self, command, options):
+        with self.assertRaises(XartaError):
+            command(options).run()
+
+    def test_citations(self):
+        options = {"--tag": None, "--number": "10", "--depth": "1"}
+        self.assert_invalid(Citations, {**options, "--number": "abc"})
+        self.assert_invalid(Citations, {**options, "--depth": "x"})
+        self.assert_invalid(Citations, {**options, "--depth": "0"})
+
+    def test_similarity(self):
+        self.assert_invalid(Duplicates, {"--threshold": "abc"})
+        self.assert_invalid(Duplicates, {"--threshold": "2"})
+        options = {"<ref>": "1704.05849", "--threshold": None, "--number": "10"}
+        self.assert_invalid(Related, {**options, "--threshold": "x"})
+        self.assert_invalid(Related, {**options, "--number": "abc"})
+
+    def test_recommend(self):
+        options = {"<category>": "hep-ph", "--tag": None, "--number": "abc"}
+        self.assert_invalid(Recommend, options)
@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from xarta.picker import FuzzyIndex
+
+
+class TestFuzzyIndex(TestCase):
+    def setUp(self):
+        self.index = FuzzyIndex(
+            [
+                "1704.05849 Neutrino masses from Weinberg operators",
+                "hep-ph/9709356 Leptoquarks in Schrödinger picture",
+                "2001.00001 Dark matter and neutrinos",
+            ]
+        )
+
+    def test_subsequence(self):
+        self.assertEqual(list(self.index.search("wnbrg")), [0])
+        self.assertEqual(list(self.index.search("xyz")), [])
+
+    def test_terms_match_independently(self):
+        self.assertEqual(list(self.index.search("neutrino dark")), [2])
+        self.assertEqual(list(self.index.search("dark neutrino")), [2])
+
+    def test_accents_and_case(self):
+        self.assertEqual(list(self.index.search("SCHRODINGER")), [1])
+        self.assertEqual(list(self.index.search("schrödinger")), [1])
+
+    def test_compact_matches_first(self):
+        # "matter" contains "mat", "masses from weinberg operators" only spread out
+        self.assertEqual(list(self.index.search("mat")), [2, 0])
+
+    def test_backspace(self):
+        self.index.search("neutrinos")
+        self.assertEqual(sorted(self.index.search("neutrino")), [0, 2])
+        self.assertEqual(len(self.index.search("")), 3)
@@ -0,0 +1,104 @@
+import sqlite3
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+from unittest import TestCase, mock
+
+from xarta import cli, profiling
+
+
+class TestSettings(TestCase):
+    def test_read_settings(self):
+        read = profiling.read_settings
+        self.assertEqual(read(["xarta", "list", "tags"], {}), (False, None))
+        self.assertEqual(read(["xarta", "--profile", "list"], {}), (True, None))
+        self.assertEqual(
+            read(["xarta", "list", "--profile=out.prof"], {}), (True, "out.prof")
+        )
+        self.assertEqual(read(["xarta"], {"XARTA_PROFILE": "1"}), (True, None))
+        self.assertEqual(read(["xarta"], {"XARTA_PROFILE": "no"}), (False, None))
+        self.assertEqual(
+            read(["xarta"], {"XARTA_PROFILE": "out.prof"}), (True, "out.prof")
+        )
+
+    def test_remove_option(self):
+        self.assertEqual(
+            profiling.remove_option(["xarta", "--profile", "list", "--profile=f"]),
+            ["xarta", "list"],
+        )
+
+
+class TestProfile(TestCase):
+    def setUp(self):
+        # start from nothing recorded, as for a fresh process
+        for name, value in [
+            ("ENABLED", True),
+            ("STATS_FILE", None),
+            ("_phases", []),
+            ("_statements", []),
+            ("_requests", []),
+            ("_rate_limit_wait", 0.0),
+        ]:
+            patcher = mock.patch.object(profiling, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_cursor(self):
+        connection = sqlite3.connect(":memory:")
+        self.addCleanup(connection.close)
+        cursor = profiling.profile_cursor(connection.cursor())
+        self.assertIsInstance(cursor, profiling.ProfiledCursor)
+        self.assertIs(cursor.execute("CREATE TABLE t (x integer);"), cursor)
+        cursor.executemany("INSERT INTO t (x) VALUES (?);", [(1,), (2,)])
+        cursor.execute("SELECT x FROM t ORDER BY x;")
+        self.assertEqual(cursor.fetchall(), [(1,), (2,)])
+        self.assertEqual(cursor.rowcount, -1)
+
+        statements = [statement for statement, _ in profiling._statements]
+        self.assertEqual(
+            statements,
+            [
+                "CREATE TABLE t (x integer);",
+                "INSERT INTO t (x) VALUES (?);",
+                "SELECT x FROM t ORDER BY x;",
+            ],
+        )
+        self.assertTrue(all(seconds >= 0 for _, seconds in profiling._statements))
+
+    def test_report(self):
+        with profiling.phase("outer"):
+            with profiling.phase("inner"):
+                pass
+        profiling._statements.append(("SELECT  *\n FROM papers;", 0.25))
+        profiling.record_request("arxiv.org", 200, 0.5)
+        profiling.record_request("arxiv.org", 503, 1.5)
+        profiling.record_rate_limit_wait(0.125)
+
+        output = StringIO()
+        profiling.report(output)
+        lines = output.getvalue().splitlines()
+        self.assertTrue(lines[1].startswith("Profile (total"))
+        self.assertRegex(lines[2], r"^  outer +\d+\.\d{3}s$")
+        self.assertRegex(lines[3], r"^    inner +\d+\.\d{3}s$")
+        self.assertEqual(
+            lines[4:],
+            [
+                "SQL statements: 1, total 0.250s, mean 0.2500s, max 0.2500s",
+                "  slowest (0.2500s): SELECT * FROM papers;",
+                "HTTP requests: 2, total 2.000s, mean 1.0000s, max 1.5000s",
+                "  arxiv.org: 2, total 2.000s, mean 1.0000s, max 1.5000s "
+                "(status 200, 503)",
+                "Waiting for rate limits: 0.125s",
+            ],
+        )
+
+    def test_main(self):
+        stdout, stderr = StringIO(), StringIO()
+        argv = ["xarta", "--profile", "hello"]
+        with mock.patch.object(sys, "argv", argv), redirect_stdout(
+            stdout
+        ), redirect_stderr(stderr):
+            cli.main()
+        self.assertEqual(stdout.getvalue(), "Hello, world!\n")
+        phases = [line.split()[0] for line in stderr.getvalue().splitlines()[2:6]]
+        self.assertEqual(phases, ["import", "import", "parse", "run"])
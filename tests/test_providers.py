@@ -0,0 +1,161 @@
+"""Tests for the providers, run against a local stand-in for the CERN document
+server."""
+
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase, mock
+
+from xarta import providers
+from xarta.bibtex import local_entry
+from xarta.utils import is_valid_ref, process_ref
+
+from helpers import use_temporary_state
+
+
+# a MARCXML search result of the CERN document server, as recorded
+CDS_RESPONSE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<collection xmlns="http://www.loc.gov/MARC21/slim">
+<record>
+  <controlfield tag="001">2273281</controlfield>
+  <datafield tag="037" ind1=" " ind2=" ">
+    <subfield code="a">ATL-PHYS-PUB-2017-017</subfield>
+  </datafield>
+  <datafield tag="110" ind1=" " ind2=" ">
+    <subfield code="a">ATLAS Collaboration</subfield>
+  </datafield>
+  <datafield tag="245" ind1=" " ind2=" ">
+    <subfield code="a">Jet reconstruction and performance
+      using particle flow</subfield>
+  </datafield>
+  <datafield tag="520" ind1=" " ind2=" ">
+    <subfield code="a">A new jet algorithm.</subfield>
+  </datafield>
+  <datafield tag="650" ind1="1" ind2="7">
+    <subfield code="2">SzGeCERN</subfield>
+    <subfield code="a">Particle Physics - Experiment</subfield>
+  </datafield>
+  <datafield tag="856" ind1="4" ind2=" ">
+    <subfield code="u">http://cds.cern.ch/record/2273281/files/ATL-PHYS-PUB-2017-017.pdf</subfield>
+  </datafield>
+</record>
+</collection>
+"""
+
+
+class CdsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(CDS_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(CDS_RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+# references of two papers from the INSPIRE literature api, as recorded
+INSPIRE_RESPONSE = json.dumps(
+    {
+        "hits": {
+            "hits": [
+                {
+                    "metadata": {
+                        "arxiv_eprints": [{"value": "1911.06334"}],
+                        "references": [
+                            {"reference": {"arxiv_eprint": "1704.05849"}},
+                            {"reference": {"report_numbers": ["ATL-CONF-2019-001"]}},
+                            {"reference": {"title": {"title": "A book"}}},
+                        ],
+                    }
+                },
+                {"metadata": {"arxiv_eprints": [{"value": "hep-ph/9901234"}]}},
+            ]
+        }
+    }
+).encode()
+
+
+class InspireHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(INSPIRE_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(INSPIRE_RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRefs(TestCase):
+    def test_namespaced_refs(self):
+        self.assertEqual(
+            process_ref(" cern:ATL-PHYS-PUB-2017-017"), "cern:ATL-PHYS-PUB-2017-017"
+        )
+        self.assertTrue(is_valid_ref("cern:ATL-PHYS-PUB-2017-017"))
+        self.assertFalse(is_valid_ref("cern:"))
+        self.assertEqual(process_ref("arXiv:1704.05849v2"), "1704.05849")
+        self.assertTrue(is_valid_ref("hep-ph/9901234"))
+
+    def test_year(self):
+        provider, number = providers.split_ref("cern:CMS-PAS-HIG-19-001")
+        self.assertEqual(provider.year(number), 2019)
+        self.assertEqual(provider.year("ATL-PHYS-PUB-2017-017"), 2017)
+
+
+class TestCdsProvider(TestCase):
+    def setUp(self):
+        use_temporary_state(self)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), CdsHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{self.server.server_port}/search"
+        patcher = mock.patch.object(providers, "CDS_SEARCH_URL", url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_metadata(self):
+        ref = "cern:ATL-PHYS-PUB-2017-017"
+        data = providers.fetch_metadata([ref, "cern:ATL-PHYS-PUB-2017-018"])
+        self.assertEqual(list(data), [ref])
+        self.assertEqual(
+            data[ref]["title"], "Jet reconstruction and performance using particle flow"
+        )
+        self.assertEqual(data[ref]["authors"], ["ATLAS Collaboration"])
+        self.assertEqual(data[ref]["category"], "Particle Physics - Experiment")
+
+        entry = local_entry("key", ref, data[ref]["title"], data[ref]["authors"], "")
+        self.assertTrue(entry.startswith("@techreport{key,\n"))
+        self.assertIn("number = {ATL-PHYS-PUB-2017-017}", entry)
+        self.assertIn("year = {2017}", entry)
+
+
+class TestInspireReferences(TestCase):
+    def setUp(self):
+        use_temporary_state(self)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), InspireHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{self.server.server_port}/api/literature"
+        patcher = mock.patch.object(providers, "INSPIRE_LITERATURE_URL", url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_references(self):
+        references = providers.fetch_inspire_references(
+            ["1911.06334", "hep-ph/9901234", "2001.00001"]
+        )
+        self.assertEqual(
+            references,
+            {
+                "1911.06334": ["1704.05849", "cern:ATL-CONF-2019-001"],
+                "hep-ph/9901234": [],
+            },
+        )
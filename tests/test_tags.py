@@ -0,0 +1,124 @@
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import TestCase
+
+from xarta.database import PaperDatabase
+from xarta.utils import XartaError
+
+from helpers import make_database
+
+
+class TestTagHierarchy(TestCase):
+    def setUp(self):
+        self.path = make_database(
+            self,
+            [
+                ("1704.05849", ["leptoquarks", "neutrino-mass"], {}),
+                ("hep-ph/9901234", ["bsm"], {}),
+                ("1911.06334", ["dark-matter"], {}),
+            ],
+        )
+
+    def run_database(self, method, *args):
+        with redirect_stdout(StringIO()):
+            with PaperDatabase(self.path) as paper_database:
+                return getattr(paper_database, method)(*args)
+
+    def test_hierarchy(self):
+        self.run_database("edit_tag_parents", "bsm", ["leptoquarks"], "add")
+        self.run_database("edit_tag_parents", "physics", ["bsm"], "add")
+        self.run_database("set_tag_alias", "LQ", "leptoquarks")
+
+        self.assertEqual(
+            self.run_database("find_papers_by_tags", ["physics"]),
+            {"1704.05849", "hep-ph/9901234"},
+        )
+        self.assertEqual(
+            self.run_database("find_papers_by_tags", ["LQ"]), {"1704.05849"}
+        )
+        with self.assertRaises(XartaError):
+            self.run_database("edit_tag_parents", "leptoquarks", ["physics"], "add")
+
+        # the tags below a removed tag move up to its parents
+        self.run_database("rename_tag", "bsm")
+        self.assertEqual(
+            self.run_database("get_tag_hierarchy")["physics"], ["leptoquarks"]
+        )
+        self.run_database("rename_tag", "LQ", "lq")
+        self.assertEqual(self.run_database("get_tag_aliases"), {"LQ": "lq"})
+        self.assertEqual(
+            self.run_database("get_tag_counts"),
+            [("dark-matter", 1), ("lq", 1), ("neutrino-mass", 1), ("physics", 1)],
+        )
+
+    def test_collections(self):
+        query = {
+            "paper_id": None,
+            "title": None,
+            "author": None,
+            "category": None,
+            "tags": ["bsm"],
+            "filter_": None,
+        }
+        self.assertEqual(self.run_database("create_collection", "bsm", query), 1)
+
+        # collections follow changes to the tags and the tag hierarchy
+        self.run_database("edit_tag_parents", "bsm", ["dark-matter"], "add")
+        self.run_database("edit_paper_tags", "1704.05849", ["bsm"], "add")
+        self.assertEqual(
+            self.run_database("get_collection_papers", ["bsm"]),
+            {"1704.05849", "hep-ph/9901234", "1911.06334"},
+        )
+        self.run_database("edit_paper_tags", "hep-ph/9901234", [], "set")
+        self.assertEqual(
+            [row[0] for row in self.run_database("get_collection_rows", ["bsm"])],
+            ["1704.05849", "1911.06334"],
+        )
+        with self.assertRaises(XartaError):
+            self.run_database("get_collection_papers", ["missing"])
+
+
+class TestTagSuggestions(TestCase):
+    def setUp(self):
+        self.path = make_database(self)
+
+    def add_paper(self, paper_database, paper_id, abstract, authors, tags):
+        data = {"title": "", "authors": authors, "category": "", "abstract": abstract}
+        paper_database.insert_paper(paper_id, data, tags, "")
+        paper_database.update_tag_model([paper_id])
+
+    def get_model(self, paper_database):
+        paper_database.cursor.execute("SELECT * FROM tag_model ORDER BY tag;")
+        model = paper_database.cursor.fetchall()
+        paper_database.cursor.execute(
+            "SELECT * FROM tag_features ORDER BY tag, feature;"
+        )
+        return model, paper_database.cursor.fetchall()
+
+    def test_suggestions(self):
+        with redirect_stdout(StringIO()):
+            with PaperDatabase(self.path) as paper_database:
+                for paper_id, abstract, authors, tags in [
+                    ("1", "leptoquark flavour anomalies", ["R. Volkas"], ["lq"]),
+                    ("2", "leptoquark neutrino masses", ["R. Volkas"], ["lq", "nu"]),
+                    ("3", "dark matter direct detection", ["S. Weinberg"], ["dm"]),
+                    ("4", "dark matter relic density", ["S. Weinberg"], ["old"]),
+                ]:
+                    self.add_paper(paper_database, paper_id, abstract, authors, tags)
+                paper_database.rename_tag("old", "dm")
+                paper_database.edit_paper_tags("2", ["nu"], "remove")
+                paper_database.delete_paper("1")
+                self.add_paper(
+                    paper_database, "5", "leptoquark flavour", ["R. Volkas"], []
+                )
+
+                # the incrementally updated model is the one counted afresh
+                model = self.get_model(paper_database)
+                for table in ("tag_model", "tag_features", "tag_model_papers"):
+                    paper_database.cursor.execute(f"DELETE FROM {table};")
+                paper_database.backfill_tag_model()
+                self.assertEqual(self.get_model(paper_database), model)
+                self.assertEqual([row[:2] for row in model[0]], [("dm", 2), ("lq", 1)])
+
+                self.assertEqual(paper_database.suggest_tags("5"), ["lq"])
+                self.assertEqual(paper_database.suggest_tags("3"), [])
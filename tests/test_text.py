@@ -0,0 +1,46 @@
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import TestCase
+
+from xarta.database import PaperDatabase
+from xarta.text import author_key
+
+from helpers import make_database
+
+
+class TestAuthorKey(TestCase):
+    def test_spellings_agree(self):
+        for name in ["Erwin Schrödinger", "E. Schrodinger", "Schrödinger, Erwin"]:
+            self.assertEqual(author_key(name), ("schrodinger", "e"))
+
+    def test_initials(self):
+        self.assertEqual(author_key("S.L. Glashow"), ("glashow", "sl"))
+        self.assertEqual(author_key("J.-P. Derendinger"), ("derendinger", "jp"))
+        self.assertEqual(author_key("Jean-Pierre Derendinger"), ("derendinger", "jp"))
+
+    def test_particles_and_suffixes(self):
+        self.assertEqual(author_key("André de Gouvêa"), ("gouvea", "a"))
+        self.assertEqual(author_key("de Gouvea, A."), ("gouvea", "a"))
+        self.assertEqual(author_key("John Smith, Jr."), ("smith", "j"))
+
+
+class TestFindPapersByAuthor(TestCase):
+    def test_author_search(self):
+        path = make_database(
+            self,
+            [
+                ("1704.05849", [], {"authors": ["John Gargalionis", "R. Volkas"]}),
+                ("hep-ph/9901234", [], {"authors": ["Erwin Schrödinger"]}),
+                ("1911.06334", [], {"authors": ["S. Johnson"]}),
+            ],
+        )
+        with redirect_stdout(StringIO()):
+            with PaperDatabase(path) as paper_database:
+                find = paper_database.find_papers_by_author
+                self.assertEqual(find("E. Schrodinger"), {"hep-ph/9901234"})
+                self.assertEqual(find("gargal"), {"1704.05849"})
+                self.assertEqual(find("J. Volkas"), set())
+                # first names and parts of names are matched as substrings, as
+                # well as surnames, e.g. both John Gargalionis and S. Johnson
+                self.assertEqual(find("John"), {"1704.05849", "1911.06334"})
+                self.assertEqual(find("rödinger"), {"hep-ph/9901234"})
@@ -0,0 +1,64 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+import numpy as np
+
+from xarta import vectors
+from xarta.vectors import LibraryVectors, load_library_vectors
+
+
+LIBRARY = [
+    ("1704.05849", "Leptoquarks", "leptoquark models of neutrino masses"),
+    ("1911.06334", "Leptoquarks at colliders", "leptoquark pair production"),
+    ("hep-ph/9901234", "Dark matter", "direct detection of dark matter relics"),
+]
+
+
+class TestLibraryVectors(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "xarta.db.vectors.npz")
+        patcher = mock.patch.object(vectors, "get_cache_path", return_value=self.path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def count_tokenised(self, texts):
+        """Load the vectors of `texts`, returning them and the number of texts
+        that had to be tokenised."""
+        with mock.patch.object(
+            vectors, "term_counts", wraps=vectors.term_counts
+        ) as term_counts:
+            library = load_library_vectors(texts)
+        return library, term_counts.call_count
+
+    def test_cache_is_updated_incrementally(self):
+        library, tokenised = self.count_tokenised(LIBRARY)
+        self.assertEqual(tokenised, 3)
+        self.assertTrue(os.path.isfile(self.path))
+        rows = library.rows.take([0])
+
+        # nothing changed, so the cache is used as it is
+        library, tokenised = self.count_tokenised(LIBRARY)
+        self.assertEqual(tokenised, 0)
+
+        # one paper removed, one added and one changed
+        texts = [LIBRARY[0], ("2001.00001", "Axions", "axion dark matter")]
+        texts.append((LIBRARY[1][0], LIBRARY[1][1], "leptoquarks at the LHC"))
+        library, tokenised = self.count_tokenised(texts)
+        self.assertEqual(tokenised, 2)
+        self.assertEqual(library.ids, ["1704.05849", "2001.00001", "1911.06334"])
+        self.assertTrue((library.rows.take([0]).indices == rows.indices).all())
+        self.assertEqual(LibraryVectors.load(self.path).ids, library.ids)
+
+    def test_scores_rank_papers_on_topic(self):
+        library = load_library_vectors(LIBRARY)
+        leptoquarks = np.array([ref != "hep-ph/9901234" for ref in library.ids])
+        scores = library.group_scores(
+            ["dark matter annihilation", "leptoquark flavour anomalies"],
+            [np.ones(len(library.ids), dtype=bool), leptoquarks],
+        )
+        self.assertEqual(scores.shape, (2, 2))
+        self.assertGreater(scores[1, 1], scores[0, 1])
+        self.assertEqual(scores[0, 1], 0)
@@ -0,0 +1,31 @@
+from unittest import TestCase
+
+from xarta.watchlist import Automaton, Watchlist
+
+
+class TestWatchlist(TestCase):
+    def test_automaton(self):
+        automaton = Automaton(["he", "she", "his", "hers"])
+        self.assertEqual(automaton.search("ushers"), {0, 1, 3})
+        self.assertEqual(automaton.search("this"), {2})
+        self.assertEqual(Automaton([]).search("anything"), set())
+
+    def test_matches(self):
+        watchlist = Watchlist(
+            ["leptoquark", "Dark Matter", "author"], ["S. Weinberg", "Schrödinger"]
+        )
+        paper = {
+            "title": "Leptoquarks and dark\n matter",
+            "abstract": "",
+            "authors": ["Steven Weinberg", "E. Schrodinger"],
+        }
+        self.assertEqual(
+            watchlist.matches(paper),
+            ["leptoquark", "Dark Matter", "S. Weinberg", "Schrödinger"],
+        )
+        paper = {
+            "title": "Darkmatter",
+            "abstract": "No dark matters here",
+            "authors": ["T. Weinberg"],
+        }
+        self.assertEqual(watchlist.matches(paper), ["Dark Matter"])
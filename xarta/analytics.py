@@ -0,0 +1,159 @@
+"""Statistics of the papers in a library, computed with NumPy.
+
+The columns the statistics need are read from the database once and kept as
+integer arrays: every category, tag and author is replaced by its code, the
+index of its name in an array of the distinct names. Counting papers is then a
+bincount, and pairs of tags or authors found on the same paper are
+counted by encoding each pair as a single integer.
+"""
+
+import numpy as np
+
+
+# papers by more authors than this (large collaborations) are left out of the
+# co-author counts, as their number of pairs grows with the square
+MAX_COAUTHORS = 50
+
+
+def encode(names):
+    """Return the distinct names, in the order they first appear, and the code
+    of each name."""
+    # a dictionary is much faster than sorting the strings with np.unique
+    index = {}
+    codes = np.fromiter(
+        (index.setdefault(name, len(index)) for name in names),
+        dtype=np.int64,
+        count=len(names),
+    )
+    return np.array(list(index), dtype=str), codes
+
+
+def count_pairs(papers, codes, number_of_codes, max_per_paper=None):
+    """Count how often each pair of codes appears on the same paper, where
+    `papers` and `codes` are parallel arrays with a row for each code of each
+    paper. A code given twice for a paper (e.g. two authors with the same
+    surname and initial) counts once, and is not paired with itself. Papers
+    with more than `max_per_paper` codes are left out. Returns arrays of the
+    first and second codes of each pair, the first being the smaller, and the
+    number of papers with both."""
+    order = np.lexsort((codes, papers))
+    papers, codes = papers[order], codes[order]
+    if len(papers):
+        distinct = np.ones(len(papers), dtype=bool)
+        distinct[1:] = (papers[1:] != papers[:-1]) | (codes[1:] != codes[:-1])
+        papers, codes = papers[distinct], codes[distinct]
+    if max_per_paper is not None and len(papers):
+        small = np.bincount(papers)[papers] <= max_per_paper
+        papers, codes = papers[small], codes[small]
+
+    # with the rows sorted by paper, a code is paired with the code `offset`
+    # rows further on whenever both rows are of the same paper
+    pairs = []
+    for offset in range(1, len(papers)):
+        same = papers[offset:] == papers[:-offset]
+        if not same.any():
+            break
+        pairs.append(codes[:-offset][same] * number_of_codes + codes[offset:][same])
+    if not pairs:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    pairs, counts = np.unique(np.concatenate(pairs), return_counts=True)
+    return pairs // number_of_codes, pairs % number_of_codes, counts
+
+
+def most_common(names, counts, number=None):
+    """Return (name, count) rows sorted by count, then name, keeping the first
+    `number` rows."""
+    order = np.lexsort((names, -counts))[:number]
+    return [(str(names[i]), int(counts[i])) for i in order]
+
+
+class Library:
+    """The categories, months of submission, tags and authors of every paper of
+    a library, as arrays of codes."""
+
+    def __init__(self, paper_database):
+        rows = paper_database.get_paper_month_rows()
+        self.size = len(rows)
+        self.categories, self.category_codes = encode([row[0] or "" for row in rows])
+
+        # YYMM from the arXiv id, with old ids from 1991 to 2007
+        months = np.array([row[1] for row in rows], dtype=np.int64)
+        year, month = months // 100, months % 100
+        year += np.where(year >= 91, 1900, 2000)
+        dated = (months >= 0) & (month >= 1) & (month <= 12)
+        self.months = np.where(dated, 100 * year + month, -1)
+
+        rows = paper_database.get_paper_tag_rows()
+        self.tag_papers = np.array([row[0] for row in rows], dtype=np.int64)
+        self.tags, self.tag_codes = encode([row[1] for row in rows])
+
+        rows = paper_database.get_paper_author_rows()
+        self.author_papers = np.array([row[0] for row in rows], dtype=np.int64)
+        _, self.author_codes = encode([row[1] for row in rows])
+        # the longest spelling of each name, as in get_author_names
+        names = np.array([row[2] for row in rows], dtype=str)
+        lengths = np.char.str_len(names)
+        order = np.lexsort((-lengths, self.author_codes))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = self.author_codes[order][1:] != self.author_codes[order][:-1]
+        self.authors = names[order[first]]
+
+    def papers_by_date(self, monthly=False):
+        """Count the papers submitted each year, or each month as 'YYYY-MM',
+        leaving out the papers that are not on the arXiv."""
+        months = self.months[self.months >= 0]
+        periods, counts = np.unique(
+            months if monthly else months // 100, return_counts=True
+        )
+        if monthly:
+            periods = [f"{period // 100}-{period % 100:02}" for period in periods]
+        else:
+            periods = [str(period) for period in periods]
+        return list(zip(periods, counts.tolist()))
+
+    def papers_by_category(self):
+        """Count the papers in each category, most papers first."""
+        counts = np.bincount(self.category_codes, minlength=len(self.categories))
+        return most_common(self.categories, counts)
+
+    def papers_by_tag(self):
+        """Count the papers with each tag, most papers first. Unlike 'xarta list
+        tags', the papers tagged below a tag in the hierarchy are not counted."""
+        counts = np.bincount(self.tag_codes, minlength=len(self.tags))
+        return most_common(self.tags, counts)
+
+    def tag_cooccurrence(self, number):
+        """Count the papers with both of each pair of the `number` most used
+        tags. Returns the tags and a symmetric matrix of counts, whose diagonal
+        holds the number of papers with each tag."""
+        counts = np.bincount(self.tag_codes, minlength=len(self.tags))
+        top = np.lexsort((self.tags, -counts))[:number]
+        # recode the most used tags as 0, 1, ... and drop the others
+        recode = np.full(len(self.tags), -1)
+        recode[top] = np.arange(len(top))
+        codes = recode[self.tag_codes]
+        kept = codes >= 0
+        first, second, pair_counts = count_pairs(
+            self.tag_papers[kept], codes[kept], len(top)
+        )
+        matrix = np.zeros((len(top), len(top)), dtype=np.int64)
+        matrix[first, second] = pair_counts
+        matrix += matrix.T
+        matrix[np.diag_indices(len(top))] = counts[top]
+        return self.tags[top].tolist(), matrix
+
+    def coauthors(self, number):
+        """Return the `number` pairs of authors with the most papers together,
+        as (author, author, papers) rows."""
+        first, second, counts = count_pairs(
+            self.author_papers,
+            self.author_codes,
+            len(self.authors),
+            max_per_paper=MAX_COAUTHORS,
+        )
+        order = np.lexsort((second, first, -counts))[:number]
+        return [
+            (str(self.authors[first[i]]), str(self.authors[second[i]]), int(counts[i]))
+            for i in order
+        ]
@@ -0,0 +1,242 @@
+"""Bibtex entries for arXiv papers, generated from the metadata in the library.
+
+Citation keys follow the 'bibtex_key' format string from the config file, by
+default '{ref}' (the arXiv id). The fields available are:
+
+    ref      the arXiv id, e.g. 1704.05849 or hep-ph/9901234, or the
+             namespaced ref of another provider, e.g. cern:ATL-CONF-2019-001
+    year     the year of submission, from the ref
+    surname  the first author's surname, without accents or spaces
+    word     the first significant word of the title
+    alias    the alias of the paper, or its arXiv id if it has none
+
+so that e.g. '{surname}:{year}' gives INSPIRE-like keys. Keys that clash are
+made unique with a letter, as in Weinberg:1999a and Weinberg:1999b.
+"""
+
+import hashlib
+import json
+import os
+import re
+import string
+
+from .providers import ARXIV, split_ref
+from .text import author_key, tokenise
+from .utils import XartaError, get_config_option
+
+
+DEFAULT_KEY_SCHEME = "{ref}"
+KEY_FIELDS = {"ref", "year", "surname", "word", "alias"}
+
+
+def arxiv_year(ref):
+    """The year a paper was submitted to the arXiv, from its id, e.g. 2017 for
+    1704.05849 and 1999 for hep-ph/9901234."""
+    return ARXIV.year(ref)
+
+
+def ref_year(ref):
+    """The year of a paper of any provider, from its ref."""
+    provider, number = split_ref(ref)
+    return provider.year(number)
+
+
+def get_key_scheme():
+    """The citation key format string from the config file, checked for unknown
+    fields."""
+    scheme = get_config_option("bibtex_key", DEFAULT_KEY_SCHEME) or DEFAULT_KEY_SCHEME
+    try:
+        fields = {name for _, name, _, _ in string.Formatter().parse(scheme) if name}
+    except ValueError:
+        raise XartaError(f"Invalid bibtex_key in config file: {scheme}")
+    if not fields <= KEY_FIELDS:
+        unknown = ", ".join(sorted(fields - KEY_FIELDS))
+        raise XartaError(f"Unknown fields in bibtex_key: {unknown}")
+    return scheme
+
+
+def make_key(scheme, ref, authors, title, alias=""):
+    """The citation key of a paper. `authors` is a list of names."""
+    surname = author_key(authors[0])[0].capitalize() if authors else ""
+    words = tokenise(title)
+    return scheme.format(
+        ref=ref,
+        year=ref_year(ref),
+        surname=surname,
+        word=words[0] if words else "",
+        alias=alias or ref,
+    )
+
+
+def make_unique_keys(keys):
+    """Append letters to keys that occur more than once, in order."""
+    counts = {}
+    for key in keys:
+        counts[key] = counts.get(key, 0) + 1
+
+    seen = {}
+    unique = []
+    for key in keys:
+        if counts[key] == 1:
+            unique.append(key)
+            continue
+        n = seen.get(key, 0)
+        seen[key] = n + 1
+        # a, b, ..., z, aa, ab, ...
+        suffix = ""
+        n += 1
+        while n:
+            n, remainder = divmod(n - 1, 26)
+            suffix = string.ascii_lowercase[remainder] + suffix
+        unique.append(key + suffix)
+    return unique
+
+
+# the type and key of a bibtex entry
+ENTRY_KEY = re.compile(r"^(\s*@\w+\s*\{)[^,]*,")
+
+# characters special to LaTeX in text mode that are not escaped yet, and how
+# they are escaped
+SPECIAL_CHARACTERS = re.compile(r"(?<!\\)([&%#_$^~])")
+ESCAPED_CHARACTERS = {"^": r"\^{}", "~": r"\~{}"}
+
+# inline maths, in which the special characters have their meaning
+MATHS = re.compile(r"((?<!\\)\$\$[^$]+\$\$|(?<!\\)\$[^$]+(?<!\\)\$)")
+
+
+def escape(text):
+    """Escape the characters that are special to LaTeX in text mode, unless they
+    already are. Titles often contain maths, which is left alone, but a `$` that
+    does not start or end maths is escaped."""
+    parts = MATHS.split(" ".join(text.split()))
+    # the parts alternate between text and maths
+    for i in range(0, len(parts), 2):
+        parts[i] = SPECIAL_CHARACTERS.sub(
+            lambda match: ESCAPED_CHARACTERS.get(match[1], "\\" + match[1]),
+            parts[i],
+        )
+    return "".join(parts)
+
+
+def alias_ids(ref, alias):
+    """Alternative keys of a paper for biblatex: its arXiv id (without slashes)
+    and its alias."""
+    return [ref.replace("/", "")] + ([alias] if alias else [])
+
+
+def insert_ids_field(bibtex, ids):
+    """Insert an ids field, listing alternative keys for biblatex, after the first
+    line of a bibtex entry."""
+    if bibtex == "" or not ids:
+        return bibtex
+    i = bibtex.find("\n")
+    return bibtex[: i + 1] + "    ids = {" + ", ".join(ids) + "},\n" + bibtex[i + 1 :]
+
+
+def format_entry(entry_type, key, fields, ids=()):
+    """A bibtex entry with the (name, value) `fields`. `ids` are alternative keys
+    for biblatex."""
+    if ids:
+        fields = [("ids", ", ".join(ids))] + fields
+    lines = ",\n".join(f"    {name} = {{{value}}}" for name, value in fields)
+    return f"@{entry_type}{{{key},\n{lines}\n}}\n"
+
+
+def arxiv_entry(key, ref, title, authors, category, ids=()):
+    """A bibtex entry for an arXiv paper. `ids` are alternative keys for biblatex."""
+    fields = [
+        ("author", escape(" and ".join(authors))),
+        # double braces keep the capitalisation of the title
+        ("title", "{" + escape(title) + "}"),
+        ("eprint", ref),
+        ("archivePrefix", "arXiv"),
+        ("primaryClass", category),
+        ("year", str(arxiv_year(ref))),
+        ("url", f"https://arxiv.org/abs/{ref}"),
+    ]
+    return format_entry("misc", key, fields, ids)
+
+
+def set_key(entry, key):
+    """Replace the citation key of a bibtex entry."""
+    return ENTRY_KEY.sub(lambda match: match.group(1) + key + ",", entry, count=1)
+
+
+def local_entry(key, ref, title, authors, category, ids=(), bibtex=""):
+    """A bibtex entry for a paper of any provider: papers that are not on the
+    arXiv are reports, with their report number. Papers added from disk have
+    their `bibtex` from their DOI, if they had one, or a minimal entry."""
+    provider, number = split_ref(ref)
+    if provider is ARXIV:
+        return arxiv_entry(key, ref, title, authors, category, ids)
+    if not provider.remote:
+        if bibtex:
+            return set_key(insert_ids_field(bibtex, list(ids)), key)
+        fields = [("title", "{" + escape(title) + "}")]
+        if any(authors):
+            fields.insert(0, ("author", escape(" and ".join(authors))))
+        return format_entry("misc", key, fields, ids)
+    fields = [
+        ("author", escape(" and ".join(authors))),
+        ("title", "{" + escape(title) + "}"),
+        ("number", escape(number)),
+        ("institution", provider.institution),
+        ("year", str(provider.year(number) or "")),
+        ("url", provider.abs_url(number)),
+    ]
+    return format_entry("techreport", key, fields, ids)
+
+
+def get_manifest_path(path):
+    """The manifest of an exported bibliography: a hidden file next to it."""
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f".{name}.xarta-manifest.json")
+
+
+def write_bibliography(path, entries):
+    """Write `entries`, a list of (ref, bibtex) tuples, to the file at `path`.
+
+    A manifest of the hash of every entry, and the size and modification time of
+    the file, is kept next to it. If the entries are the same as those of the
+    last export, and the file has not been touched since, it is not written at
+    all, so that tools watching it (e.g. latexmk) do not rebuild. Otherwise the
+    file is replaced atomically. Returns the numbers of entries added, changed
+    and removed, or None if the file was left alone."""
+    hashes = [
+        [ref, hashlib.sha256(bibtex.encode("utf-8")).hexdigest()[:16]]
+        for ref, bibtex in entries
+    ]
+
+    manifest_path = get_manifest_path(path)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    try:
+        stat = os.stat(path)
+        untouched = [stat.st_size, stat.st_mtime_ns] == manifest.get("stat")
+    except OSError:
+        untouched = False
+
+    if untouched and manifest.get("entries") == hashes:
+        return None
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        for _, bibtex in entries:
+            f.write(bibtex + "\n\n")
+    os.replace(tmp_path, path)
+
+    stat = os.stat(path)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"stat": [stat.st_size, stat.st_mtime_ns], "entries": hashes}, f)
+    os.replace(tmp_path, manifest_path)
+
+    old = dict(manifest.get("entries", []))
+    new = dict(hashes)
+    added = sum(ref not in old for ref in new)
+    changed = sum(ref in old and old[ref] != h for ref, h in new.items())
+    removed = sum(ref not in new for ref in old)
+    return added, changed, removed
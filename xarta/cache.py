@@ -0,0 +1,159 @@
+"""Cache of the output of read-only commands (browse, info and export).
+
+Results are stored in a small sqlite database next to the other caches of the
+library (see utils.get_cache_path), keyed by the command, its normalised
+arguments and the state of the library database: sqlite's file change counter,
+which is incremented by every transaction that writes to the database, and the
+size and modification time of the file (and its write-ahead log), which change
+when a synced copy is replaced, and likewise of the other libraries read
+alongside it (see utils.get_libraries). The options of the config file are part
+of the key too, as some change what a command may do or print (e.g.
+'enable_filters', or the bibtex key scheme). A result is therefore never used once
+the database has changed, whoever changed it, so answering from the cache does
+not even need the database to be opened. PaperDatabase also clears the cache after
+writing, to free the space of results that can no longer be used.
+
+The cache is bounded by the 'query_cache_size' from the config file, in
+megabytes (by default 16, or 'off' to disable it), with the least recently used
+results evicted first.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from . import __version__
+from .utils import (
+    XartaError,
+    get_cache_path,
+    get_config_option,
+    get_config_options,
+    get_libraries,
+)
+
+
+DEFAULT_CACHE_SIZE = 16
+
+# the file change counter is a 4 byte integer at this offset of the header
+CHANGE_COUNTER_OFFSET = 24
+
+
+def get_cache_size():
+    """The maximum size of the cache in bytes, or 0 if it is disabled."""
+    size = get_config_option("query_cache_size", str(DEFAULT_CACHE_SIZE))
+    if size.lower() in ("", "off", "none", "false"):
+        return 0
+    try:
+        megabytes = float(size)
+    except ValueError:
+        megabytes = -1
+    if not megabytes >= 0:
+        raise XartaError(
+            f"Invalid query_cache_size in the config file: {size} (give a number "
+            "of megabytes, or 'off')"
+        )
+    return int(megabytes * 1024 ** 2)
+
+
+def database_state(database_path):
+    """Describe the state of the database file, changing whenever it is written."""
+    with open(database_path, "rb") as f:
+        header = f.read(CHANGE_COUNTER_OFFSET + 4)
+    state = [header[CHANGE_COUNTER_OFFSET:].hex()]
+    for path in (database_path, database_path + "-wal"):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            state.append([stat.st_size, stat.st_mtime_ns])
+    return state
+
+
+def make_key(database_path, command, options, context=None):
+    """The cache key of `command` run with the docopt `options`. Anything else
+    the result depends on (e.g. the width of the terminal) goes in `context`."""
+    # the order of tags does not change the papers selected
+    options = {
+        key: sorted(value) if isinstance(value, list) else value
+        for key, value in options.items()
+    }
+    # results may include the other libraries read alongside the database
+    state = [database_state(database_path)] + [
+        [name, database_state(path)] for name, path in get_libraries()
+    ]
+    # e.g. a cached --filter result must not be shown once filters are disabled
+    config = get_config_options()
+    key = [__version__, state, config, command, options, context]
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+def connect(database_path):
+    """Open the cache database of a library, creating it if necessary."""
+    connection = sqlite3.connect(get_cache_path("query-cache.db", database_path))
+    # losing the cache in a crash does no harm
+    connection.execute("PRAGMA synchronous = OFF;")
+    connection.execute(
+        """CREATE TABLE IF NOT EXISTS results (key text PRIMARY KEY, value text,
+        size integer, used real);"""
+    )
+    return connection
+
+
+def get(database_path, command, options, context=None):
+    """Return the cached result of a command, or None if it is not cached. Any
+    problem with the cache is treated as a miss."""
+    if not get_cache_size() or not database_path:
+        return None
+    try:
+        key = make_key(database_path, command, options, context)
+        with connect(database_path) as connection:
+            row = connection.execute(
+                "SELECT value FROM results WHERE key = ?;", (key,)
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE results SET used = ? WHERE key = ?;", (time.time(), key)
+                )
+        connection.close()
+        return None if row is None else json.loads(row[0])
+    except (OSError, ValueError, sqlite3.Error):
+        return None
+
+
+def put(database_path, command, options, value, context=None):
+    """Cache the result of a command, which must be JSON serialisable, evicting
+    the least recently used results if the cache grows too large."""
+    max_size = get_cache_size()
+    if not max_size:
+        return
+    try:
+        key = make_key(database_path, command, options, context)
+        value = json.dumps(value)
+        with connect(database_path) as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, used) VALUES (?, ?, ?, ?);",
+                (key, value, len(value), time.time()),
+            )
+            connection.execute(
+                """DELETE FROM results WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (ORDER BY used DESC) AS total
+                        FROM results
+                    ) WHERE total > ?
+                );""",
+                (max_size,),
+            )
+        connection.close()
+    except (OSError, sqlite3.Error):
+        pass
+
+
+def clear(database_path):
+    """Remove every cached result of a library."""
+    try:
+        if os.path.exists(get_cache_path("query-cache.db", database_path)):
+            with connect(database_path) as connection:
+                connection.execute("DELETE FROM results;")
+            connection.close()
+    except (OSError, sqlite3.Error):
+        pass
@@ -0,0 +1,88 @@
+"""A naive Bayes classifier of papers into tags, trained on the library.
+
+Every tag is a separate yes-or-no question, so that a paper can get any number
+of tags, and is answered by comparing the words of the paper with those of the
+papers with the tag and of the other tagged papers. Papers are represented by
+their tf-idf vectors (see vectors.py), scaled to unit length so that long
+abstracts do not give more confident answers than short ones. The probability
+of a tag is then a logistic function of a linear score, so that whole batches
+of papers are scored with a few array operations.
+"""
+
+import numpy as np
+
+
+# additive smoothing of the summed weights of each feature
+SMOOTHING = 0.1
+# tags with fewer papers are not learned
+MIN_EXAMPLES = 3
+# papers scored at once, limiting the memory used to a few tens of megabytes
+BATCH_SIZE = 1024
+
+
+class TagClassifier:
+    """One-vs-rest naive Bayes over the features of vectors.py."""
+
+    def __init__(self, tags, features, weights, biases):
+        self.tags = tags
+        # the sorted features seen in training, and their weight for each tag
+        self.features = features
+        self.weights = weights
+        self.biases = biases
+
+    @classmethod
+    def train(cls, rows, labels, tags):
+        """Train on the normalised SparseRows `rows` of the tagged papers, where
+        `labels` is a boolean array telling which of `tags` each paper has."""
+        examples = labels.sum(axis=0)
+        learned = examples >= MIN_EXAMPLES
+        labels, examples = labels[:, learned], examples[learned]
+        tags = [tag for tag, keep in zip(tags, learned) if keep]
+        features, positions = np.unique(rows.indices, return_inverse=True)
+
+        # the summed weight of each feature over the papers with each tag, from
+        # the rows of the papers repeated once for each of their tags
+        papers, codes = np.nonzero(labels)
+        repeated = rows.take(papers)
+        keys = codes[repeated.row_index()] * len(features) + np.searchsorted(
+            features, repeated.indices
+        )
+        with_tag = np.bincount(
+            keys, weights=repeated.data, minlength=len(tags) * len(features)
+        ).reshape(len(tags), len(features))
+        total = np.bincount(positions, weights=rows.data, minlength=len(features))
+        without_tag = np.maximum(total - with_tag, 0)
+
+        def log_probabilities(sums):
+            return np.log(sums + SMOOTHING) - np.log(
+                sums.sum(axis=1, keepdims=True) + SMOOTHING * len(features)
+            )
+
+        weights = log_probabilities(with_tag) - log_probabilities(without_tag)
+        biases = np.log((examples + 1) / (len(labels) - examples + 1))
+        return cls(tags, features, weights.T.astype(np.float32), biases)
+
+    def probabilities(self, rows):
+        """Return the probability of each tag for each of the normalised
+        SparseRows `rows`, as an array of shape (len(rows), len(self.tags))."""
+        result = np.empty((len(rows), len(self.tags)))
+        for start in range(0, len(rows), BATCH_SIZE):
+            batch = rows.take(np.arange(start, min(start + BATCH_SIZE, len(rows))))
+            positions = np.searchsorted(self.features, batch.indices)
+            positions[positions == len(self.features)] = 0
+            known = self.features[positions] == batch.indices
+            row_index = batch.row_index()[known]
+
+            # add up the weighted features of each paper, which are in order of
+            # the papers, skipping papers with no features seen in training
+            contributions = batch.data[known, None] * self.weights[positions[known]]
+            scores = np.zeros((len(batch), len(self.tags)))
+            if len(row_index):
+                starts = np.flatnonzero(np.diff(row_index, prepend=-1))
+                scores[row_index[starts]] = np.add.reduceat(
+                    contributions, starts, axis=0
+                )
+            result[start : start + len(batch)] = 1 / (
+                1 + np.exp(-(scores + self.biases))
+            )
+        return result
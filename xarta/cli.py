@@ -5,22 +5,51 @@ Usage:
   xarta hello
   xarta open <ref> [--pdf]
   xarta init [<database-file>]
+  xarta add local <path> [--doi=<doi>] [--alias=<alias>] [--jobs=<n>]
+                  [<tag> ...]
   xarta add <ref> [--alias=<alias>] [<tag> ...]
-  xarta delete <ref>
+  xarta add --from=<file> [<tag> ...]
+  xarta delete <refs> ... [--dry-run] [--vacuum]
+  xarta delete --matching [--author=<auth>] [--title=<ttl>] [--ref=<ref>]
+               [--category=<cat>] [--filter=<fltr>] [--dry-run] [--vacuum]
+               [<tag> ...]
   xarta info <ref>
   xarta browse [--author=<auth>] [--title=<ttl>] [--ref=<ref>]
                [--category=<cat>] [--filter=<fltr>] [<tag> ...]
   xarta choose [--author=<auth>] [--title=<ttl>] [--ref=<ref>]
                [--category=<cat>] [--filter=<fltr>] [--pdf] [<tag> ...]
-  xarta export (arxiv|inspire) <bibtex-file> [--export-alias] [--author=<auth>]
-               [--title=<ttl>] [--ref=<ref>] [--category=<cat>]
-               [--filter=<fltr>] [<tag> ...]
+  xarta export (arxiv|inspire) <bibtex-file> [--export-alias] [--remote]
+               [--cited-in=<path>] [--author=<auth>] [--title=<ttl>]
+               [--ref=<ref>] [--category=<cat>] [--filter=<fltr>] [<tag> ...]
   xarta list (authors|tags|aliases) [--sort=<order>] [--contains=<cont>]
   xarta lucky [--author=<auth>] [--title=<ttl>] [--pdf] [<tag> ...]
   xarta tags (set|add|remove) <ref> [<tag> ...]
   xarta alias <ref> [<alias>]
   xarta rename <tag> [<tag>]
-  xarta refresh <ref>
+  xarta hierarchy (add|remove) <parent> <tag> ...
+  xarta hierarchy alias <alias> [<tag>]
+  xarta collection create <name> [--author=<auth>] [--title=<ttl>]
+                   [--ref=<ref>] [--category=<cat>] [--filter=<fltr>]
+                   [<tag> ...]
+  xarta collection (delete <name> | list)
+  xarta refresh (--all | <refs> ...)
+  xarta download [--all] [--force] [--jobs=<n>] [--author=<auth>]
+                 [--title=<ttl>] [--ref=<ref>] [--category=<cat>]
+                 [--filter=<fltr>] [<tag> ...]
+  xarta prefetch [--force] [--jobs=<n>] [--author=<auth>] [--title=<ttl>]
+                 [--ref=<ref>] [--category=<cat>] [--filter=<fltr>] [<tag> ...]
+  xarta recommend [<category>] [--tag=<tg>] [--number=<n>]
+  xarta watch [<category>] [--add=<tag>]
+  xarta duplicates [--threshold=<t>]
+  xarta related <ref> [--threshold=<t>] [--number=<n>]
+  xarta citations [<ref>] [--cited-by] [--depth=<n>] [--tag=<tg>]
+                  [--number=<n>] [--force]
+  xarta autotag [--threshold=<t>] [--dry-run] [--author=<auth>]
+                [--title=<ttl>] [--ref=<ref>] [--category=<cat>]
+                [--filter=<fltr>] [<tag> ...]
+  xarta stats network [--since=<date>]
+  xarta stats (years|months|categories|tags) [--csv]
+  xarta stats (cotags|coauthors) [--number=<n>] [--csv]
   xarta -h | --help
   xarta --version
 
@@ -30,7 +59,8 @@ Command descriptions:
 
   open         Opens the abstract or pdf url of an arXiv ID, or an arXiv
                category's new submissions page. The paper does not need to be
-               in the database.
+               in the database. With --pdf, a downloaded copy of the paper is
+               opened if there is one.
 
   init         Initialise and write the xarta database to '<database-file>'. The
                database path is stored in a config file whoose path is either
@@ -39,9 +69,22 @@ Command descriptions:
                database is written to 'xarta.db' in the same folder as the
                config file.
 
-  add          Add an arXiv ID, optionally with some tags.
-
-  delete       Remove and arXiv ID.
+  add          Add an arXiv ID, optionally with some tags. With --from, adds
+               every arXiv ID listed in <file> (one per line, '-' for stdin),
+               all with the same tags. Reports on the CERN document server are
+               added by report number with a 'cern:' prefix, as in
+               'xarta add cern:ATL-PHYS-PUB-2017-017'. With 'local', adds a
+               pdf from disk, or every pdf in a directory, as local:<hash>.
+               The pdfs stay where they are, and identical files are only
+               added once. Metadata comes from the DOI (given with --doi or
+               found in the pdf) if there is one, otherwise from the pdf.
+               After adding a single arXiv ID, suggests tags from the words and
+               authors of the papers with each tag.
+
+  delete       Remove papers, given by their refs or, with --matching, every
+               paper matching some criteria as in browse, and their downloaded
+               pdfs. With --vacuum, the database file is compacted afterwards,
+               which can take a while for large libraries.
 
   tags         Updates the tags associated with a paper.
 
@@ -49,21 +92,35 @@ Command descriptions:
                paper must be in the database.
 
   browse       Prints all papers, optionally showing only those matching some
-               criteria.
+               criteria. A tag matches the papers with that tag or any tag below
+               it in the tag hierarchy (see 'xarta hierarchy').
 
   choose       Choose a paper to open from a list of papers matching some
-               criteria. Arguments mostly the same as browse.
+               criteria. Arguments mostly the same as browse. In a terminal,
+               the list is filtered as you type (fuzzy matching on the ref,
+               alias, title, authors and tags), otherwise papers are chosen by
+               number.
 
   export       Exports libary to a bibtex bibliography. Bibtex information comes
-               from either arxiv (crosref) or inspire. The --export-alias option
-               will insert an ids field containing the arxiv id and alias into
-               the bibtex entries, for use with biblatex and biber. Papers to be
-               exported can be selected using the same arguments as the browse
-               command.
+               from either arxiv or inspire. arXiv entries are generated from
+               the library, with citation keys following the 'bibtex_key' from
+               the config file (by default '{ref}', see xarta/bibtex.py for
+               other fields, e.g. '{surname}:{year}'). With --remote they are
+               downloaded instead (from crossref for published papers). The
+               option --export-alias will insert an ids field containing the
+               arxiv id and alias into the bibtex entries, for use with
+               biblatex and biber. Papers to be exported can be selected using
+               the same arguments as the browse command, or with --cited-in
+               only those cited (by arXiv ID or alias) in a LaTeX project: a
+               .aux, .bcf or .tex file, or a directory containing them. The
+               file is only rewritten if some entry changed, so that latexmk
+               and biber do not rebuild after every export.
 
   list         Lists authors, tags, or aliases. Can be sorted by date,
                alphabetically, or by number of papers. Optionally print only
-               results containing some substring.
+               results containing some substring. Sorted alphabetically, tags
+               are shown as a tree, with their aliases. Sorted by number, the
+               papers with a tag include those with a tag below it.
 
   lucky        Randomly choose a paper to open from a list of papers matching
                some criteria.
@@ -74,14 +131,114 @@ Command descriptions:
                alias. Aliases can be used in place of arXiv references.
 
   rename       Rename a tag throughout the database, or delete it if no new
-               tag is provided.
-
-  refresh      Refreshes database information for a given paper. Usefull if a
-               new arxiv version was released.
+               tag is provided. A renamed tag keeps its place in the tag
+               hierarchy, and the tags below a deleted tag are moved up to its
+               parents.
+
+  hierarchy    Places tags below (or with 'remove', takes them out from below)
+               the <parent> tag, so that selecting papers by the parent tag
+               also selects those with the tags below it. A tag can have many
+               parents. With 'alias', makes <alias> a short name for <tag> (or
+               removes it, if no tag is given), which can be used wherever a
+               tag is expected, e.g. LNV for lepton-number-violation.
+
+  collection   Saves the search criteria of the browse command as a
+               collection, whose papers are kept up to date as papers are
+               added, refreshed or retagged. Give '@<name>' in place of a tag
+               to select the papers in the collection <name> with browse,
+               export, choose, and so on.
+
+  refresh      Refreshes database information for the given papers, or every
+               paper with --all. Usefull if a new arxiv version was released.
+
+  download     Downloads pdfs for offline access, selected using the same
+               arguments as the browse command (or --all). Downloads run in
+               parallel, are rate limited per host, and resume where they left
+               off when interrupted. Files are stored by content hash in the
+               'pdf_directory' from the config file, by default a 'xarta-pdfs'
+               folder next to the database.
+
+  prefetch     Downloads the arXiv and INSPIRE bibtex of every paper (or those
+               matching some criteria) that does not have it yet, so that
+               exporting does not need the network. Bibtex that could not be
+               found is only looked up again after a week, unless --force is
+               given, which downloads all bibtex again.
+
+  recommend    Recommends papers from today's arXiv listings, ranked by the
+               similarity of their titles and abstracts to the papers in the
+               library (or only those with the tag given by --tag, or a tag
+               below it). Listings are fetched for <category>, or for every
+               arXiv category used in the library.
+
+  watch        Lists the papers in today's arXiv listings for <category> (or
+               the 'watch_categories' from the config file, or every arXiv
+               category used in the library) by watched authors or with
+               watched keywords. These are the 'watch_authors' and
+               'watch_keywords' from the config file, separated by commas or
+               new lines, and every author of at least 'watch_min_papers'
+               papers in the library (by default 3, or 0 for none). Keywords
+               match the start of words, ignoring case and accents. Papers are
+               only listed once. With --add, the papers listed are added to
+               the library with the tag <tag>.
+
+  duplicates   Lists pairs of papers with near-identical titles and abstracts,
+               e.g. different versions of the same proceedings. Similarity is
+               the estimated overlap of the words used, from 0 to 1 [default
+               threshold: 0.8].
+
+  related      Lists the papers in the library most similar to <ref> [default
+               threshold: 0.2].
+
+  citations    Shows the papers in the library cited by <ref>, following
+               citations between papers in the library up to --depth hops, or
+               with --cited-by the papers citing it. Without <ref>, lists the
+               papers most cited by the rest of the library. The references of
+               new and refreshed papers are fetched from INSPIRE first, or of
+               every paper with --force.
+
+  autotag      Tags the papers without tags (or those matching some criteria)
+               with a classifier trained on the tagged papers, proposing every
+               tag whose estimated probability is at least the threshold
+               [default threshold: 0.7]. Only tags of at least 3 papers are
+               learned. With --dry-run, shows the proposed tags without adding
+               them.
+
+  stats        With 'network', summarises the requests made to the arXiv and
+               INSPIRE: the number of requests, failures, retries and bibtex
+               lookups answered from the database, and latency histograms, for
+               each endpoint. Every request is logged to the 'metrics_file'
+               from the config file (by default in the 'state_directory'), or
+               not at all if it is set to 'off'. Otherwise counts the papers
+               submitted each year or month (from their arXiv IDs), in each
+               category or with each tag, how often the --number most used
+               tags appear together, or the pairs of authors with the most
+               papers together. With --csv, prints CSV rather than a table.
 
 With the exception of the --filter option, all search conditions are connected
 by logical disjunction.
 
+Requests to the arXiv and INSPIRE are rate limited, and concurrent xarta
+processes share these limits through a file in the 'state_directory' from the
+config file (by default '$XDG_CACHE_HOME/xarta').
+
+The output of browse, info and export is cached next to the database (or in the
+'cache_directory' from the config file), and reused until the database changes.
+The cache holds at most 'query_cache_size' megabytes from the config file (by
+default 16), or nothing if it is set to 'off'.
+
+Other libraries, such as a group's shared database, can be read alongside your
+own by listing them in the 'libraries' option of the config file, as name:path
+pairs separated by commas or new lines (e.g. 'group:~/Dropbox/group.db').
+browse, list and export then show the papers of every library, with a library
+column in browse, and the tag hierarchies and aliases of all libraries apply
+together. Every other command, and every change, only concerns your own
+database.
+
+Any command can be run with --profile (or with the XARTA_PROFILE environment
+variable set to 1) to print how long each phase of the command took, and the
+SQL statements and HTTP requests it made, to stderr. Use --profile=<file> (or
+XARTA_PROFILE=<file>) to also write cProfile statistics to <file>.
+
 
 
 Options:
@@ -89,11 +246,33 @@ Options:
   --version               Show version.
   --pdf                   Open the pdf url, as opposed to the abstract url.
   --author=<auth>         Searches author metadata of the database entry.
+                          Matches surnames (or their beginning) and initials,
+                          ignoring accents and case, e.g. 'S. Weinberg', and
+                          any part of a name, e.g. 'Steven'.
   --title=<ttl>           Searches title metadata of the database entry.
   --filter=<fltr>         Filter results using python logic. See Examples.
   --sort=<order>          Order to sort lists. Can be sorted by 'date-added',
                           'alphabetical', or by the 'number' of papers,
                           [default: alphabetical]
+  --all                   Select every paper in the database.
+  --from=<file>           File listing arXiv IDs to add, one per line.
+  --force                 Download again even if there is a local copy.
+  --jobs=<n>              Number of parallel downloads [default: 4].
+  --tag=<tg>              Only consider the papers with this tag.
+  --number=<n>            Number of papers (or tags, authors) to show
+                          [default: 10].
+  --threshold=<t>         Minimum similarity of papers to show.
+  --remote                Download arXiv bibtex rather than generating it.
+  --doi=<doi>             DOI to look up the metadata of a local pdf with.
+  --cited-in=<path>       Export only the papers cited in a LaTeX project.
+  --depth=<n>             Number of citation hops to follow [default: 1].
+  --cited-by              Follow citations to a paper, rather than from it.
+  --since=<date>          Only include requests made since a date (YYYY-MM-DD).
+  --csv                   Print comma separated values.
+  --dry-run               Show the changes without making them.
+  --matching              Select papers with the search criteria.
+  --vacuum                Compact the database file.
+  --add=<tag>             Add the papers found with this tag.
 
 
 Examples:
@@ -103,6 +282,10 @@ Examples:
   xarta add 1704.05849 leptosquark neutrino-mass flavour-anomalies
   xarta tags add 1704.05849 self_author
   xarta rename leptosquark leptoquarks
+  xarta hierarchy add bsm leptoquarks neutrino-mass
+  xarta hierarchy alias LNV lepton-number-violation
+  xarta collection create thesis --filter="'Weinberg' in authors" neutrino-mass
+  xarta export arxiv thesis.bib @thesis
   xarta browse
   xarta browse neutrino-mass
   xarta browse --filter="'John' in authors or 'Reconsidering' in title"
@@ -111,7 +294,14 @@ Examples:
   xarta list tags
   xarta list authors
   xarta export ~/Desktop/xarta.bib --author='John'
+  xarta download neutrino-mass --jobs=8
+  xarta recommend hep-ph --tag=neutrino-mass
+  xarta watch hep-ph --add=watched
+  xarta related 1704.05849
+  xarta autotag --category=hep-ph --dry-run
+  xarta stats months --csv > months.csv
   xarta delete 1704.05849
+  xarta delete --matching old-project --dry-run
 
 
 Help:
@@ -124,6 +314,8 @@ import sys
 
 from inspect import ismodule
 
+from . import profiling
+
 from docopt import docopt
 
 from . import __version__ as VERSION
@@ -133,28 +325,35 @@ from .utils import XartaError
 
 def main():
     """Main CLI entrypoint."""
-    import xarta.commands
-
-    options = docopt(__doc__, version=VERSION)
-
-    # some commands are also options now, e.g., 'xarta add' and 'xarta tags
-    # add'. to avoid confusion, first argument,  not options, to determine command
-    first_arg = sys.argv[1]
-
-    if hasattr(xarta.commands, first_arg) and ismodule(
-        getattr(xarta.commands, first_arg)
-    ):
-        # first_arg corresponds to a module in xarta.commands.
-        # obtain the command_class associated with that module
-        command_module = getattr(xarta.commands, first_arg)
-        command_class = getattr(command_module, first_arg.capitalize())
-        # If the naming convention of classes is UpperCamelCase, what is the
-        # convention for variables that point TO a class?
-
-        try:
-            command = command_class(options)
-            command.run()
-        except XartaError as err:
-            print(str(err))
-            # return exit with error
-            sys.exit(1)
+    # --profile may be given with any command, so is handled before docopt
+    sys.argv = profiling.remove_option(sys.argv)
+
+    with profiling.session():
+        with profiling.phase("import commands"):
+            import xarta.commands
+
+        with profiling.phase("parse arguments"):
+            options = docopt(__doc__, version=VERSION)
+
+        # some commands are also options now, e.g., 'xarta add' and 'xarta tags
+        # add'. to avoid confusion, first argument,  not options, to determine command
+        first_arg = sys.argv[1]
+
+        if hasattr(xarta.commands, first_arg) and ismodule(
+            getattr(xarta.commands, first_arg)
+        ):
+            # first_arg corresponds to a module in xarta.commands.
+            # obtain the command_class associated with that module
+            command_module = getattr(xarta.commands, first_arg)
+            command_class = getattr(command_module, first_arg.capitalize())
+            # If the naming convention of classes is UpperCamelCase, what is the
+            # convention for variables that point TO a class?
+
+            try:
+                with profiling.phase(f"run {first_arg}"):
+                    command = command_class(options)
+                    command.run()
+            except XartaError as err:
+                print(str(err))
+                # return exit with error
+                sys.exit(1)
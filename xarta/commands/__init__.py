@@ -13,3 +13,14 @@ from .tags import *
 from .list import *
 from .alias import *
 from .rename import *
+from .download import *
+from .recommend import *
+from .duplicates import *
+from .related import *
+from .stats import *
+from .prefetch import *
+from .citations import *
+from .hierarchy import *
+from .collection import *
+from .autotag import *
+from .watch import *
@@ -1,8 +1,12 @@
-"""The open command."""
+"""The add command."""
 
 
+import os
+import sys
+
 from .base import BaseCommand
 from ..database import PaperDatabase
+from ..network import run_jobs
 from ..utils import process_ref, is_valid_ref, XartaError
 
 
@@ -18,6 +22,16 @@ class Add(BaseCommand):
         for tag in tags:
             if ";" in tag:
                 raise XartaError("Invalid tag, tags cannot contain semicolons.")
+            if tag.startswith("@"):
+                raise XartaError("Invalid tag, tags cannot start with '@'.")
+
+        if options["--from"] is not None:
+            self.add_from_file(options["--from"], tags)
+            return
+
+        if options["local"]:
+            self.add_local(options["<path>"], tags, alias, options["--doi"])
+            return
 
         with PaperDatabase(self.database_path) as paper_database:
             processed_ref = process_ref(ref)
@@ -25,3 +39,91 @@ class Add(BaseCommand):
                 paper_database.add_paper(paper_id=processed_ref, tags=tags, alias=alias)
             else:
                 raise XartaError(f"Not a valid arXiv reference or alias: {ref}")
+
+            suggestions = paper_database.suggest_tags(processed_ref)
+            if suggestions:
+                print(
+                    f"Suggested tags: {' '.join(suggestions)} (add them with"
+                    f" 'xarta tags add {processed_ref} {' '.join(suggestions)}')"
+                )
+
+    def add_from_file(self, path, tags):
+        """Add every reference listed in a file (one per line, or '-' for stdin)."""
+        if path == "-":
+            lines = sys.stdin.read().splitlines()
+        else:
+            try:
+                with open(path) as f:
+                    lines = f.read().splitlines()
+            except OSError as err:
+                raise XartaError(f"Could not read {path}: {err.strerror}")
+
+        refs = []
+        for line in lines:
+            if not line.strip():
+                continue
+            processed_ref = process_ref(line.strip())
+            if not is_valid_ref(processed_ref):
+                raise XartaError(f"Not a valid arXiv reference: {line.strip()}")
+            refs.append(processed_ref)
+
+        with PaperDatabase(self.database_path) as paper_database:
+            paper_database.add_papers(paper_ids=refs, tags=tags)
+
+    def add_local(self, path, tags, alias, doi):
+        """Add a pdf from the local disk, or every pdf in a directory. The pdfs are
+        hashed in parallel processes, and added in a single transaction."""
+        from ..local import find_pdfs, get_metadata, scan_pdfs
+        from ..providers import fetch_doi_metadata
+
+        jobs = self.get_jobs()
+        if not os.path.exists(path):
+            raise XartaError(f"No such file or directory: {path}")
+        paths = find_pdfs(path)
+        if not paths:
+            raise XartaError(f"No pdfs found in {path}")
+        if len(paths) > 1 and (doi or alias):
+            raise XartaError("A DOI or alias can only be given for a single pdf.")
+
+        with PaperDatabase(self.database_path) as paper_database:
+            if alias and alias in paper_database.get_all_aliases():
+                raise XartaError("Alias is not unique!")
+
+            # identical files are only added once
+            known = paper_database.get_pdf_hashes()
+            scans = {}
+            for scan in scan_pdfs(paths, max_workers=jobs):
+                if scan["sha256"] in known:
+                    ref = known[scan["sha256"]]
+                    print(f"{scan['path']} is already in the database as {ref}.")
+                elif scan["sha256"] in scans:
+                    copy = scans[scan["sha256"]]["path"]
+                    print(f"{scan['path']} is a copy of {copy}, skipping it.")
+                else:
+                    scans[scan["sha256"]] = scan
+            scans = list(scans.values())
+            if doi and scans:
+                scans[0]["doi"] = doi
+
+            # the metadata of papers with a DOI is looked up concurrently
+            looked_up = {}
+            results = run_jobs(
+                lambda scan: fetch_doi_metadata(scan["doi"]),
+                [scan for scan in scans if scan["doi"]],
+                max_workers=jobs,
+            )
+            for scan, result, error in results:
+                if error is not None:
+                    print(f"{error}, using the metadata of {scan['path']}")
+                else:
+                    looked_up[scan["sha256"]] = result
+
+            papers = []
+            for scan in scans:
+                data, bibtex = looked_up.get(scan["sha256"], (None, ""))
+                if not data or not data["title"]:
+                    data = get_metadata(scan)
+                papers.append((scan, data, bibtex))
+            paper_database.add_local_papers(papers, tags, alias)
+
+        print(f"{len(papers)} papers added to database!")
@@ -0,0 +1,94 @@
+"""The autotag command."""
+
+
+from .base import BaseCommand
+from ..database import PaperDatabase
+from ..utils import SecretString, XartaError, dots_if_needed, string_to_list
+
+
+class Autotag(BaseCommand):
+    """Tag papers with a classifier trained on the tagged papers of the library."""
+
+    def run(self):
+        import numpy as np
+        from tabulate import tabulate
+        from ..classifier import TagClassifier
+        from ..vectors import load_library_vectors
+
+        options = self.options
+        try:
+            threshold = float(options["--threshold"] or 0.7)
+        except ValueError:
+            raise XartaError("--threshold must be a number.")
+        if not 0 < threshold <= 1:
+            raise XartaError("--threshold must be between 0 and 1.")
+
+        with PaperDatabase(self.database_path) as paper_database:
+            papers = paper_database.get_all_papers()
+            titles = {paper[0]: paper[1] for paper in papers}
+            tags = {
+                paper[0]: [tag for tag in string_to_list(paper[4] or "") if tag]
+                for paper in papers
+            }
+            if self.has_selection():
+                selected = [paper[0] for paper in self.select_papers(paper_database)]
+            else:
+                selected = [ref for ref, paper_tags in tags.items() if not paper_tags]
+            if not selected:
+                print("No papers to tag.")
+                return
+
+            vectors = load_library_vectors(paper_database.get_paper_texts())
+            rows = vectors.rows.normalised(vectors.idf())
+            position = {ref: i for i, ref in enumerate(vectors.ids)}
+
+            tagged = [ref for ref in vectors.ids if tags[ref]]
+            tag_names = sorted({tag for ref in tagged for tag in tags[ref]})
+            tag_codes = {tag: i for i, tag in enumerate(tag_names)}
+            labels = np.zeros((len(tagged), len(tag_names)), dtype=bool)
+            for i, ref in enumerate(tagged):
+                labels[i, [tag_codes[tag] for tag in tags[ref]]] = True
+            classifier = TagClassifier.train(
+                rows.take([position[ref] for ref in tagged]), labels, tag_names
+            )
+            if not classifier.tags:
+                raise XartaError("No tag has enough papers to learn it from.")
+
+            probabilities = classifier.probabilities(
+                rows.take([position[ref] for ref in selected])
+            )
+            proposals = {}
+            for ref, paper_probabilities in zip(selected, probabilities):
+                proposed = [
+                    (classifier.tags[i], paper_probabilities[i])
+                    for i in np.argsort(-paper_probabilities, kind="stable")
+                    if paper_probabilities[i] >= threshold
+                    and classifier.tags[i] not in tags[ref]
+                ]
+                if proposed:
+                    proposals[ref] = proposed
+
+            if not proposals:
+                print(f"No tags proposed for the {len(selected)} papers.")
+                return
+
+            table = [
+                [
+                    SecretString(ref),
+                    dots_if_needed(titles[ref], 50),
+                    "; ".join(f"{tag} ({p:.2f})" for tag, p in proposed),
+                ]
+                for ref, proposed in proposals.items()
+            ]
+            print(tabulate(table, headers=["Ref", "Title", "Tags"], tablefmt="plain"))
+
+            if options["--dry-run"]:
+                print(f"\nWould tag {len(proposals)} of {len(selected)} papers.")
+                return
+            paper_database.add_tags(
+                {
+                    ref: [tag for tag, _ in proposed]
+                    for ref, proposed in proposals.items()
+                }
+            )
+            print(f"\nTagged {len(proposals)} of {len(selected)} papers.")
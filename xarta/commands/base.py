@@ -1,6 +1,8 @@
 """The basic command class."""
 
-from ..utils import get_database_path
+from ..providers import split_ref
+from ..utils import XartaError, arxiv_open, get_database_path, open_file
+from ..utils import process_and_validate_ref
 
 
 class BaseCommand:
@@ -14,3 +16,64 @@ class BaseCommand:
 
     def run(self):
         raise NotImplementedError("You must implement the run() method yourself!")
+
+    def get_jobs(self):
+        """The number of concurrent jobs given by --jobs."""
+        return self.get_whole_number("--jobs")
+
+    def get_whole_number(self, option):
+        """The value of an option that must be a positive whole number, such as
+        --number or --depth."""
+        try:
+            value = int(self.options[option])
+        except ValueError:
+            raise XartaError(f"{option} must be a whole number.")
+        if value < 1:
+            raise XartaError(f"{option} must be positive.")
+        return value
+
+    def get_threshold(self, default):
+        """The similarity or probability given by --threshold, or `default`."""
+        try:
+            threshold = float(self.options["--threshold"] or default)
+        except ValueError:
+            raise XartaError("--threshold must be a number.")
+        if not 0 < threshold <= 1:
+            raise XartaError("--threshold must be between 0 and 1.")
+        return threshold
+
+    def has_selection(self):
+        """True if any of the browse-like search criteria were given."""
+        options = self.options
+        criteria = ["--ref", "--filter", "--author", "--category", "--title"]
+        return any(options.get(key) for key in criteria) or bool(options.get("<tag>"))
+
+    def select_papers(self, paper_database):
+        """Return the papers matching the browse-like search criteria, or all papers
+        if no criteria were given."""
+        options = self.options
+        if not self.has_selection():
+            return paper_database.get_all_papers()
+
+        processed_ref = process_and_validate_ref(options.get("--ref"), paper_database)
+        return paper_database.query_papers(
+            paper_id=processed_ref,
+            title=options.get("--title"),
+            author=options.get("--author"),
+            category=options.get("--category"),
+            tags=options.get("<tag>"),
+            filter_=options.get("--filter"),
+            silent=True,
+        )
+
+    def open_paper(self, paper_database, ref, pdf=False):
+        """Open the abstract or pdf url of a paper, preferring a local copy of the
+        pdf when there is one. Papers added from disk only have their pdf."""
+        provider, _ = split_ref(ref)
+        local_pdf = (pdf or not provider.remote) and paper_database.get_pdf_path(ref)
+        if local_pdf:
+            open_file(local_pdf)
+        elif not provider.remote:
+            raise XartaError(f"The pdf of {ref} is missing.")
+        else:
+            arxiv_open(ref, pdf=pdf)
@@ -1,9 +1,11 @@
 """The browse command."""
 
+import shutil
 
 from .base import BaseCommand
-from ..database import PaperDatabase
-from ..utils import process_and_validate_ref
+from .. import cache
+from ..database import PaperDatabase, DATA_HEADERS, LIBRARY_COLUMN
+from ..utils import format_table, get_libraries, process_and_validate_ref
 
 
 class Browse(BaseCommand):
@@ -11,6 +13,34 @@ class Browse(BaseCommand):
 
     def run(self):
         options = self.options
+
+        # the table is fitted to the terminal
+        columns = shutil.get_terminal_size().columns
+        table = cache.get(self.database_path, "browse", options, columns)
+        if table is not None:
+            print(table)
+            return
+
+        libraries = get_libraries()
+        with PaperDatabase(self.database_path, libraries) as paper_database:
+            with paper_database.all_libraries():
+                papers = self.get_papers(paper_database)
+
+        headers = DATA_HEADERS
+        if libraries:
+            # show which library each paper is from
+            headers = DATA_HEADERS + ["library"]
+            papers = [
+                paper[: len(DATA_HEADERS)] + (paper[LIBRARY_COLUMN],)
+                for paper in papers
+            ]
+        table = format_table(papers, headers, False)
+        cache.put(self.database_path, "browse", options, table, columns)
+        print(table)
+
+    def get_papers(self, paper_database):
+        """Get the papers matching the search criteria, or all papers."""
+        options = self.options
         ref = options["--ref"]
         tag = options["<tag>"]
         filter_ = options["--filter"]
@@ -18,20 +48,19 @@ class Browse(BaseCommand):
         category = options["--category"]
         title = options["--title"]
 
-        with PaperDatabase(self.database_path) as paper_database:
-            if (ref or filter_ or author or category or title) is None and (
-                tag is None or tag == []
-            ):
-                # no search criteria, show all papers
-                paper_database.print_all_papers()
-            else:
-
-                processed_ref = process_and_validate_ref(ref, paper_database)
-                paper_database.query_papers(
-                    paper_id=processed_ref,
-                    title=title,
-                    author=author,
-                    category=category,
-                    tags=tag,
-                    filter_=filter_,
-                )
+        if (ref or filter_ or author or category or title) is None and (
+            tag is None or tag == []
+        ):
+            # no search criteria, show all papers
+            return paper_database.get_all_papers()
+
+        processed_ref = process_and_validate_ref(ref, paper_database)
+        return paper_database.query_papers(
+            paper_id=processed_ref,
+            title=title,
+            author=author,
+            category=category,
+            tags=tag,
+            filter_=filter_,
+            silent=True,
+        )
@@ -1,11 +1,28 @@
 """The choose command."""
 
 
+import sys
+
 from .base import BaseCommand
-from ..utils import arxiv_open, process_and_validate_ref, XartaError
+from ..utils import process_and_validate_ref, XartaError
 from ..database import PaperDatabase
 
 
+def choose_interactively(paper_data):
+    """Let the user filter `paper_data` by typing, returning the chosen row or None
+    if they aborted."""
+    from ..picker import pick
+
+    # ref, title, authors, category, tags, alias
+    lines = [f"{row[0]:<18} {row[1]} ({row[2]})" for row in paper_data]
+    haystacks = [
+        " ".join([row[0], row[5] or "", row[1], row[2], row[4] or ""])
+        for row in paper_data
+    ]
+    choice = pick(lines, haystacks, prompt="Paper to open: ")
+    return None if choice is None else paper_data[choice]
+
+
 class Choose(BaseCommand):
     """ List papers (by metadata) with an option to open. """
 
@@ -24,6 +41,18 @@ class Choose(BaseCommand):
 
         with PaperDatabase(self.database_path) as paper_database:
 
+            if sys.stdin.isatty() and sys.stdout.isatty():
+                # filter the papers as the user types
+                paper_data = self.select_papers(paper_database)
+                if len(paper_data) == 1:
+                    print("Only one match, opening ...")
+                    row = paper_data[0]
+                else:
+                    row = choose_interactively(paper_data)
+                if row is not None:
+                    self.open_paper(paper_database, row[0], pdf=pdf)
+                return
+
             processed_ref = process_and_validate_ref(ref, paper_database)
 
             if print_all:
@@ -56,8 +85,6 @@ class Choose(BaseCommand):
                 except KeyboardInterrupt:
                     # KeyboardInterrupt causes an ugly error message when aborting
                     # input. So just catch and exit
-                    import sys
-
                     sys.exit(0)
 
                 # check input
@@ -66,4 +93,4 @@ class Choose(BaseCommand):
 
             # open the paper!
             ref_to_open = paper_data[choice][0]
-            arxiv_open(ref_to_open, pdf=pdf)
+            self.open_paper(paper_database, ref_to_open, pdf=pdf)
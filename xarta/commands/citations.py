@@ -0,0 +1,53 @@
+"""The citations command."""
+
+
+from .base import BaseCommand
+from ..database import PaperDatabase
+from ..utils import SecretString, dots_if_needed, process_and_validate_ref
+
+
+class Citations(BaseCommand):
+    """Show how the papers in the library cite each other. The references of
+    papers that are new to the library (or were refreshed) are fetched from
+    INSPIRE first."""
+
+    def run(self):
+        from tabulate import tabulate
+
+        options = self.options
+        tag = options["--tag"]
+        number = self.get_whole_number("--number")
+        depth = self.get_whole_number("--depth")
+
+        with PaperDatabase(self.database_path) as paper_database:
+            ref = process_and_validate_ref(options["<ref>"], paper_database)
+            if ref:
+                paper_database.assert_contains(ref)
+
+            paper_database.fetch_citations(force_refresh=options["--force"])
+
+            if ref:
+                rows = paper_database.get_citation_neighbourhood(
+                    ref, depth, cited_by=options["--cited-by"]
+                )
+                headers = ["Hops", "Ref", "Title"]
+            else:
+                rows = paper_database.get_most_cited()
+                headers = ["Citations", "Ref", "Title"]
+            papers = {paper[0]: paper for paper in paper_database.get_all_papers()}
+            if tag is not None:
+                tagged = paper_database.find_papers_by_tags([tag])
+                rows = [row for row in rows if row[0] in tagged]
+
+        if not ref:
+            rows = rows[:number]
+
+        if not rows:
+            print("No citations found.")
+            return
+
+        table = [
+            [count, SecretString(paper_id), dots_if_needed(papers[paper_id][1], 70)]
+            for paper_id, count in rows
+        ]
+        print(tabulate(table, headers=headers, tablefmt="plain"))
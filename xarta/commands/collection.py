@@ -0,0 +1,60 @@
+"""The collection command."""
+
+
+from .base import BaseCommand
+from ..database import PaperDatabase
+from ..utils import XartaError, process_and_validate_ref
+
+# the options of the search criteria of a collection, and the matching keyword
+# arguments of PaperDatabase.query_papers
+CRITERIA = {
+    "--ref": "paper_id",
+    "--title": "title",
+    "--author": "author",
+    "--category": "category",
+    "--filter": "filter_",
+}
+
+
+class Collection(BaseCommand):
+    """ Create, delete and list saved searches. """
+
+    def run(self):
+        options = self.options
+        name = options["<name>"]
+
+        with PaperDatabase(self.database_path) as paper_database:
+            if options["create"]:
+                if not self.has_selection():
+                    raise XartaError("A collection needs some search criteria.")
+                query = {key: options[option] for option, key in CRITERIA.items()}
+                query["paper_id"] = process_and_validate_ref(
+                    query["paper_id"], paper_database
+                )
+                query["tags"] = options["<tag>"]
+                number = paper_database.create_collection(name, query)
+                print(f"Created the collection @{name} with {number} papers.")
+            elif options["delete"]:
+                paper_database.delete_collection(name)
+                print(f"Deleted the collection @{name}.")
+            else:
+                self.list_collections(paper_database)
+
+    def list_collections(self, paper_database):
+        """Print every collection, its number of papers and search criteria."""
+        from tabulate import tabulate
+
+        collections = paper_database.get_collections()
+        if not collections:
+            print("No collections.")
+            return
+
+        table = []
+        for name, query, number in collections:
+            criteria = [
+                f"{option}={query[key]}"
+                for option, key in CRITERIA.items()
+                if query[key] is not None
+            ]
+            table.append(["@" + name, number, " ".join(criteria + query["tags"])])
+        print(tabulate(table, headers=["Name", "Papers", "Criteria"], tablefmt="plain"))
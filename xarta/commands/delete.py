@@ -1,21 +1,46 @@
 """The delete command."""
 
 
-import os
-
 from .base import BaseCommand
-from ..database import PaperDatabase
-from ..utils import process_and_validate_ref
+from ..database import PaperDatabase, vacuum_database
+from ..utils import SecretString, XartaError, dots_if_needed, process_and_validate_ref
 
 
 class Delete(BaseCommand):
-    """ Remove an arXiv paper and its metadata from the database. """
+    """ Remove papers and their metadata from the database. """
 
     def run(self):
+        from tabulate import tabulate
+
         options = self.options
-        ref = options["<ref>"]
 
         with PaperDatabase(self.database_path) as paper_database:
-            processed_ref = process_and_validate_ref(ref, paper_database)
-            paper_database.assert_contains(processed_ref)
-            paper_database.delete_paper(processed_ref)
+            if options["--matching"]:
+                if not self.has_selection():
+                    raise XartaError("Give some criteria to select papers to delete.")
+                papers = self.select_papers(paper_database)
+            else:
+                refs = [
+                    process_and_validate_ref(ref, paper_database)
+                    for ref in options["<refs>"]
+                ]
+                for ref in refs:
+                    paper_database.assert_contains(ref)
+                papers = paper_database.get_papers(set(refs))
+            refs = [paper[0] for paper in papers]
+
+            if options["--dry-run"]:
+                rows = [[SecretString(p[0]), dots_if_needed(p[1], 70)] for p in papers]
+                print(tabulate(rows, headers=["Ref", "Title"], tablefmt="plain"))
+                print(f"\nWould delete {len(refs)} papers.")
+                return
+            if len(refs) == 1:
+                paper_database.delete_paper(refs[0])
+            else:
+                paper_database.delete_papers(refs)
+
+        if options["--vacuum"]:
+            before, after = vacuum_database(self.database_path)
+            print(
+                f"Database compacted from {before / 1024:.0f} to {after / 1024:.0f} KiB."
+            )
@@ -0,0 +1,77 @@
+"""The download command."""
+
+
+import os
+
+from .base import BaseCommand
+from ..database import PaperDatabase
+from ..network import download_file, run_jobs
+from ..providers import split_ref
+from ..utils import XartaError, get_pdf_directory, get_pdf_url
+
+
+def store_pdf(ref, store):
+    """Download the pdf of `ref` and move it to its content-addressed location in
+    `store`. Partial downloads are kept in `store/partial` so that an interrupted
+    download can be resumed. Returns the hash, path relative to the store, size
+    and url of the pdf."""
+    url = get_pdf_url(ref)
+    partial_path = os.path.join(store, "partial", ref.replace("/", "_") + ".part")
+    sha256, size = download_file(url, partial_path, endpoint="pdf")
+
+    with open(partial_path, "rb") as f:
+        if f.read(5) != b"%PDF-":
+            os.remove(partial_path)
+            raise XartaError(f"Downloaded file for {ref} is not a pdf.")
+
+    path = os.path.join(sha256[:2], sha256 + ".pdf")
+    os.makedirs(os.path.join(store, sha256[:2]), exist_ok=True)
+    # identical files are stored once
+    os.replace(partial_path, os.path.join(store, path))
+    return sha256, path, size, url
+
+
+class Download(BaseCommand):
+    """Download pdfs of papers for offline access."""
+
+    def run(self):
+        options = self.options
+        jobs = self.get_jobs()
+
+        if not (options["--all"] or self.has_selection()):
+            raise XartaError("Select papers to download, or use --all.")
+
+        store = get_pdf_directory()
+        os.makedirs(os.path.join(store, "partial"), exist_ok=True)
+
+        with PaperDatabase(self.database_path) as paper_database:
+            refs = [paper[0] for paper in self.select_papers(paper_database)]
+            # papers added from disk only have the pdf they were added with
+            remote = [ref for ref in refs if split_ref(ref)[0].remote]
+            if len(remote) < len(refs):
+                print(f"Skipping {len(refs) - len(remote)} papers added from disk.")
+            refs = remote
+            if not options["--force"]:
+                refs = [ref for ref in refs if not paper_database.get_pdf_path(ref)]
+
+            if not refs:
+                if remote:
+                    print("All selected papers are already downloaded.")
+                return
+
+            print(f"Downloading {len(refs)} papers to {store}")
+            failed = 0
+            results = run_jobs(lambda ref: store_pdf(ref, store), refs, jobs)
+            # the database connection can only be used in this thread, so
+            # results are recorded as they come in
+            for n, (ref, result, error) in enumerate(results, 1):
+                if error is not None:
+                    failed += 1
+                    print(f"[{n}/{len(refs)}] {error}")
+                    continue
+                sha256, path, size, url = result
+                paper_database.add_pdf(ref, sha256, path, size, url)
+                print(f"[{n}/{len(refs)}] {ref} downloaded ({size} bytes)")
+
+        if failed:
+            raise XartaError(f"{failed} downloads failed, run again to resume.")
@@ -0,0 +1,39 @@
+"""The duplicates command."""
+
+
+from .base import BaseCommand
+from ..database import PaperDatabase
+from ..utils import SecretString, dots_if_needed
+
+
+class Duplicates(BaseCommand):
+    """List pairs of papers with near-identical titles and abstracts."""
+
+    def run(self):
+        from tabulate import tabulate
+
+        threshold = self.get_threshold(0.8)
+
+        with PaperDatabase(self.database_path) as paper_database:
+            paper_database.backfill_minhashes()
+            duplicates = paper_database.get_duplicate_papers(threshold)
+            titles = {paper[0]: paper[1] for paper in paper_database.get_all_papers()}
+
+        if not duplicates:
+            print("No duplicates found.")
+            return
+
+        rows = []
+        for similarity, id_a, id_b in duplicates:
+            rows.append(
+                [similarity, SecretString(id_a), dots_if_needed(titles[id_a], 50)]
+            )
+            rows.append(["", SecretString(id_b), dots_if_needed(titles[id_b], 50)])
+        print(
+            tabulate(
+                rows,
+                headers=["Similarity", "Ref", "Title"],
+                tablefmt="plain",
+                floatfmt=".2f",
+            )
+        )
@@ -1,8 +1,16 @@
 """The export command."""
 
+import os
+import time
+
 from .base import BaseCommand
+from .. import cache
+from ..bibtex import alias_ids, get_key_scheme, insert_ids_field, local_entry
+from ..bibtex import write_bibliography
 from ..database import PaperDatabase
-from ..utils import XartaError, process_and_validate_ref
+from ..latex import get_cited_keys
+from ..utils import XartaError, get_libraries, process_and_validate_ref
+from ..utils import string_to_list
 
 
 class Export(BaseCommand):
@@ -14,45 +22,132 @@ class Export(BaseCommand):
     def run(self):
         options = self.options
         bibtex_file = options["<bibtex-file>"]
+        cited_in = options["--cited-in"]
+        cited_keys = None
+
+        if cited_in is not None:
+            if not os.path.exists(cited_in):
+                raise XartaError(f"No such file or directory: {cited_in}")
+            cited_keys = sorted(get_cited_keys(cited_in))
+
+        # bibtex that could not be found is looked up again after some days, so
+        # results are only reused on the day they were made
+        context = [cited_keys, get_key_scheme(), time.strftime("%Y-%m-%d")]
+        result = cache.get(self.database_path, "export", options, context)
+        if result is None:
+            entries, unresolved = self.get_entries(cited_keys)
+            cache.put(
+                self.database_path, "export", options, [entries, unresolved], context
+            )
+        else:
+            entries, unresolved = result
+
+        # nothing is written if no entry changed, so as not to trigger rebuilds
+        changes = write_bibliography(bibtex_file, entries)
+        if changes is None:
+            print(bibtex_file + " is up to date.")
+        else:
+            print(
+                bibtex_file
+                + " successfully written! (%d added, %d changed, %d removed)" % changes
+            )
+
+        if unresolved:
+            print(
+                f"{len(unresolved)} cited keys are not in the library: "
+                + ", ".join(unresolved)
+            )
+
+    def get_entries(self, cited_keys):
+        """Select the papers to export, and return a list of their (ref, bibtex)
+        and a list of the cited keys that are not in the library."""
+        options = self.options
         ref = options["--ref"]
         tag = options["<tag>"]
         filter_ = options["--filter"]
         author = options["--author"]
         category = options["--category"]
         title = options["--title"]
+        # arxiv entries are generated from the library unless --remote is given
+        local = not options["--remote"]
+        unresolved = []
 
-        with PaperDatabase(self.database_path) as paper_database:
-            if (ref or filter_ or author or category or title) is None and (
-                tag is None or tag == []
-            ):
-                # no search criteria, export all papers
-                papers = paper_database.get_all_papers()
-            else:
+        with PaperDatabase(self.database_path, get_libraries()) as paper_database:
+            with paper_database.all_libraries():
+                if (ref or filter_ or author or category or title) is None and (
+                    tag is None or tag == []
+                ):
+                    # no search criteria, export all papers
+                    papers = paper_database.get_all_papers()
+                else:
 
-                processed_ref = process_and_validate_ref(ref, paper_database)
-                papers = paper_database.query_papers(
-                    paper_id=processed_ref,
-                    title=title,
-                    author=author,
-                    category=category,
-                    tags=tag,
-                    filter_=filter_,
-                    silent=True,
-                )
+                    processed_ref = process_and_validate_ref(ref, paper_database)
+                    papers = paper_database.query_papers(
+                        paper_id=processed_ref,
+                        title=title,
+                        author=author,
+                        category=category,
+                        tags=tag,
+                        filter_=filter_,
+                        silent=True,
+                    )
+
+                citation_keys = None
+                if local:
+                    citation_keys = paper_database.get_citation_keys(get_key_scheme())
+
+                # \nocite{*} cites everything
+                if cited_keys is not None and "*" not in cited_keys:
+                    resolved, unresolved = paper_database.resolve_keys(
+                        cited_keys, citation_keys
+                    )
+                    cited = set(resolved.values())
+                    papers = [paper for paper in papers if paper[0] in cited]
 
+            # a paper in several libraries is exported once
+            unique = {}
+            for paper in papers:
+                unique.setdefault(paper[0], paper)
+            papers = list(unique.values())
             paper_refs = [paper_data[0] for paper_data in papers]
 
-            with open(bibtex_file, "w+") as f:
+            # download any missing bibtex concurrently, rather than one by one
+            # below. Only the papers in the database are looked up, as the bibtex
+            # of other libraries cannot be stored.
+            sources = ["inspire"] if options["inspire"] else []
+            if not local:
+                sources.append("arxiv")
+            if sources:
+                paper_database.fetch_bibtex(paper_refs, sources=sources)
 
-                for ref in paper_refs:
+            # bibtex of papers added from disk is stored even if generating entries
+            with paper_database.all_libraries():
+                stored = paper_database.get_stored_bibtex(paper_refs)
 
-                    bibtex_arxiv, bibtex_inspire = paper_database.get_bibtex_data(
-                        ref, insert_alias=options["--export-alias"]
-                    )
+        entries = []
+        for ref, title, authors, category, _, alias in (paper[:6] for paper in papers):
+            # anything missing was just fetched, or could not be found
+            bibtex_arxiv, bibtex_inspire = stored.get(ref, ("", ""))
+            ids = alias_ids(ref, alias) if options["--export-alias"] else []
+
+            if local:
+                key = citation_keys[ref]
+                bibtex_arxiv = local_entry(
+                    key,
+                    ref,
+                    title,
+                    string_to_list(authors),
+                    category,
+                    [x for x in ids if x != key],
+                    bibtex_arxiv,
+                )
+            else:
+                bibtex_arxiv = insert_ids_field(bibtex_arxiv, ids)
+            bibtex_inspire = insert_ids_field(bibtex_inspire, ids)
 
-                    if options["arxiv"] or bibtex_inspire == "":
-                        f.write(bibtex_arxiv + "\n\n")
-                    elif options["inspire"] or bibtex_arxiv == "":
-                        f.write(bibtex_inspire + "\n\n")
+            if options["arxiv"] or bibtex_inspire == "":
+                entries.append((ref, bibtex_arxiv))
+            elif options["inspire"] or bibtex_arxiv == "":
+                entries.append((ref, bibtex_inspire))
 
-                print(bibtex_file + " successfully written!")
+        return entries, unresolved
@@ -0,0 +1,32 @@
+"""The tag hierarchy command."""
+
+
+from .base import BaseCommand
+from ..database import PaperDatabase
+from ..utils import XartaError
+
+
+class Hierarchy(BaseCommand):
+    """ Edit the tag hierarchy and the tag aliases. """
+
+    def run(self):
+        options = self.options
+        tags = options["<tag>"]
+
+        for tag in tags + [options["<parent>"] or "", options["<alias>"] or ""]:
+            if ";" in tag:
+                raise XartaError("Invalid tag, tags cannot contain semicolons.")
+            if tag.startswith("@"):
+                raise XartaError("Invalid tag, tags cannot start with '@'.")
+
+        with PaperDatabase(self.database_path) as paper_database:
+            if options["alias"]:
+                if len(tags) > 1:
+                    raise XartaError("Too many arguments.")
+                paper_database.set_tag_alias(options["<alias>"], *tags)
+            elif options["add"]:
+                paper_database.edit_tag_parents(options["<parent>"], tags, "add")
+            elif options["remove"]:
+                paper_database.edit_tag_parents(options["<parent>"], tags, "remove")
+            else:
+                raise XartaError("Invalid tag hierarchy action.")
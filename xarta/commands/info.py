@@ -2,6 +2,7 @@
 
 
 from .base import BaseCommand
+from .. import cache
 from ..database import PaperDatabase
 from ..utils import process_and_validate_ref, XartaError
 
@@ -13,6 +14,11 @@ class Info(BaseCommand):
         options = self.options
         ref = options["<ref>"]
 
+        text = cache.get(self.database_path, "info", options)
+        if text is not None:
+            print(text)
+            return
+
         with PaperDatabase(self.database_path) as paper_database:
             processed_ref = process_and_validate_ref(ref, paper_database)
             paper_database.assert_contains(processed_ref)
@@ -29,9 +35,16 @@ class Info(BaseCommand):
             if len(info) == 0:
                 raise XartaError("Paper not found.")
             info = info[0]
-            print(f"arXiv Ref: {info[0]}")
-            print(f"Title: {info[1]}")
-            print(f"Authors: {info[2]}")
-            print(f"Category: {info[3]}")
-            print(f"Tags: {info[4]}")
-            print(f"Alias: {info[5]}")
+            text = "\n".join(
+                [
+                    f"arXiv Ref: {info[0]}",
+                    f"Title: {info[1]}",
+                    f"Authors: {info[2]}",
+                    f"Category: {info[3]}",
+                    f"Tags: {info[4]}",
+                    f"Alias: {info[5]}",
+                ]
+            )
+
+        cache.put(self.database_path, "info", options, text)
+        print(text)
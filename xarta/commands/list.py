@@ -3,7 +3,8 @@
 from collections import namedtuple
 from .base import BaseCommand
 from ..database import PaperDatabase, DATA_HEADERS
-from ..utils import XartaError, string_to_list
+from ..text import normalise_text
+from ..utils import XartaError, get_libraries, string_to_list
 
 
 class List(BaseCommand):
@@ -31,18 +32,35 @@ class List(BaseCommand):
         if order != "alphabetical" and column == "alias":
             raise XartaError("Aliases can only be sorted alphabetically.")
 
-        with PaperDatabase(self.database_path) as paper_database:
-            papers = paper_database.get_all_papers()
+        with PaperDatabase(self.database_path, get_libraries()) as paper_database:
+            with paper_database.all_libraries():
+                if column == "tags":
+                    self.list_tags(paper_database, order, cont)
+                    return
+                papers = paper_database.get_all_papers()
+                if column == "authors":
+                    # spellings of the same name are merged using the author index
+                    author_names = paper_database.get_author_names()
 
         # get data of interest from list of papers
         items = []
-        for paper in papers:
-            index = DATA_HEADERS.index(column)
-            string_list = paper[index]
-            list_ = string_to_list(string_list)
-            for item in list_:
-                if item:  # dont print empty tags/aliases
-                    items.append(item)
+        if column == "authors":
+            items = author_names
+        else:
+            for paper in papers:
+                index = DATA_HEADERS.index(column)
+                string_list = paper[index]
+                list_ = string_to_list(string_list)
+                for item in list_:
+                    if item:  # dont print empty tags/aliases
+                        items.append(item)
+
+        if cont is not None and column == "authors":
+            # match names regardless of accents and case
+            cont = normalise_text(cont)
+            matches = lambda item: cont in normalise_text(item)
+        else:
+            matches = lambda item: cont is None or cont in item
 
         # time to start sorting!
 
@@ -86,15 +104,71 @@ class List(BaseCommand):
             # just print desired fields
             print(f"List of {name}:")
             for item in data:
-                if cont is None:
-                    print(item)
-                elif cont in item:
+                if matches(item):
                     print(item)
         else:
             # print count and field
             print(f"List of {name} and total occurrences:")
             for num, item in zip(count, data):
-                if cont is None:
-                    print(num, item)
-                elif cont in item:
+                if matches(item):
                     print(num, item)
+
+    def list_tags(self, paper_database, order, cont):
+        """Print the tags, as a tree of the tag hierarchy if sorted alphabetically."""
+        matches = lambda tag: cont is None or cont in tag
+
+        if order == "number":
+            print("List of tags and total occurrences:")
+            for tag, number in paper_database.get_tag_counts():
+                if matches(tag):
+                    print(number, tag)
+            return
+
+        print("List of tags:")
+        if order == "date-added":
+            for tag in paper_database.get_tags_by_date():
+                if matches(tag):
+                    print(tag)
+            return
+
+        hierarchy = paper_database.get_tag_hierarchy()
+        aliases = {}
+        for alias, tag in paper_database.get_tag_aliases().items():
+            aliases.setdefault(tag, []).append(alias)
+
+        # a tag is shown if it, or any tag below it, matches. The hierarchies of
+        # different libraries may together have cycles, so a tag is never
+        # followed below itself
+        def shown(tag, ancestors):
+            ancestors = ancestors | {tag}
+            return matches(tag) or any(
+                shown(child, ancestors)
+                for child in hierarchy[tag]
+                if child not in ancestors
+            )
+
+        def print_tree(tag, depth, ancestors):
+            if not shown(tag, ancestors):
+                return
+            names = ", ".join(aliases.get(tag, []))
+            print("  " * depth + tag + (f" ({names})" if names else ""))
+            for child in hierarchy[tag]:
+                if child not in ancestors | {tag}:
+                    print_tree(child, depth + 1, ancestors | {tag})
+
+        # the roots are the tags without parents, then the first of any tags
+        # only reachable through a cycle
+        children = {child for tags in hierarchy.values() for child in tags}
+        tags = sorted(hierarchy, key=str.lower)
+        roots = [tag for tag in tags if tag not in children]
+        reached = set()
+        for tag in roots + tags:
+            if tag in reached:
+                continue
+            print_tree(tag, 0, frozenset())
+            stack = [tag]
+            while stack:
+                below = stack.pop()
+                if below not in reached:
+                    reached.add(below)
+                    stack.extend(hierarchy[below])
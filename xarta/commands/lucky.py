@@ -2,7 +2,6 @@
 
 
 from .base import BaseCommand
-from ..utils import arxiv_open
 from ..database import PaperDatabase
 
 
@@ -27,4 +26,4 @@ class Lucky(BaseCommand):
                 filter_=filter_,
             )
             lucky_paper_ref = ans[0][0]
-            arxiv_open(lucky_paper_ref, pdf)
+            self.open_paper(paper_database, lucky_paper_ref, pdf)
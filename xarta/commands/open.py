@@ -3,7 +3,7 @@
 
 from .base import BaseCommand
 from ..database import PaperDatabase
-from ..utils import arxiv_open, process_and_validate_ref
+from ..utils import process_and_validate_ref
 
 
 class Open(BaseCommand):
@@ -16,4 +16,4 @@ class Open(BaseCommand):
 
         with PaperDatabase(self.database_path) as paper_database:
             processed_ref = process_and_validate_ref(ref, paper_database)
-            arxiv_open(processed_ref, pdf=pdf)
+            self.open_paper(paper_database, processed_ref, pdf=pdf)
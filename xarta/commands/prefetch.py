@@ -0,0 +1,27 @@
+"""The prefetch command."""
+
+
+from .base import BaseCommand
+from ..database import PaperDatabase
+
+
+class Prefetch(BaseCommand):
+    """Download all missing bibtex, so that exports work offline."""
+
+    def run(self):
+        options = self.options
+        jobs = self.get_jobs()
+
+        with PaperDatabase(self.database_path) as paper_database:
+            paper_ids = None
+            if self.has_selection():
+                paper_ids = [paper[0] for paper in self.select_papers(paper_database)]
+
+            fetched = paper_database.fetch_bibtex(
+                paper_ids,
+                force_refresh=options["--force"],
+                max_workers=jobs,
+                progress=True,
+            )
+
+        print(f"{fetched} bibtex entries fetched.")
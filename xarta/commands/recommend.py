@@ -0,0 +1,102 @@
+"""The recommend command."""
+
+
+from .base import BaseCommand
+from ..database import PaperDatabase
+from ..utils import (
+    ARXIV_CATEGORIES,
+    XartaError,
+    SecretString,
+    dots_if_needed,
+    get_arxiv_listing,
+    is_arxiv_category,
+    string_to_list,
+)
+
+
+class Recommend(BaseCommand):
+    """Recommend papers from today's arXiv listings by their similarity to the
+    papers in the library."""
+
+    def run(self):
+        import numpy as np
+        from tabulate import tabulate
+        from ..vectors import load_library_vectors
+
+        options = self.options
+        category = options["<category>"]
+        tag = options["--tag"]
+        number = self.get_whole_number("--number")
+
+        with PaperDatabase(self.database_path) as paper_database:
+            papers = paper_database.get_all_papers()
+            texts = paper_database.get_paper_texts()
+            if tag is not None:
+                # the papers with the tag, an alias of it, or a tag below it
+                tagged = paper_database.find_papers_by_tags([tag])
+                if not tagged:
+                    raise XartaError(f"No papers are tagged '{tag}'.")
+
+        if not papers:
+            raise XartaError("The library is empty, there is nothing to compare to.")
+
+        if category is not None:
+            if not is_arxiv_category(category):
+                raise XartaError(f"Not an arXiv category: {category}")
+            categories = [category]
+        else:
+            # the archives of the papers in the library, e.g. 'math' for 'math.AG'
+            categories = {paper[3].split(".")[0] for paper in papers}
+            categories = sorted(categories & ARXIV_CATEGORIES)
+
+        vectors = load_library_vectors(texts)
+
+        listing = {}
+        for listing_category in categories:
+            for new_paper in get_arxiv_listing(listing_category):
+                listing.setdefault(new_paper["id"], new_paper)
+        in_library = set(vectors.ids)
+        new_papers = [p for p in listing.values() if p["id"] not in in_library]
+        if not new_papers:
+            print("No new papers in " + ", ".join(categories))
+            return
+
+        # one group with the whole library, then one group per tag, or just the
+        # group of papers selected by --tag
+        if tag is None:
+            tags = {paper[0]: string_to_list(paper[4]) for paper in papers}
+            tag_names = sorted(
+                {t for paper_tags in tags.values() for t in paper_tags if t}
+            )
+        else:
+            tags = {ref: [tag] if ref in tagged else [] for ref in vectors.ids}
+            tag_names = [tag]
+        tag_codes = {name: i for i, name in enumerate(tag_names)}
+        groups = np.zeros((len(tag_names) + 1, len(vectors.ids)), dtype=bool)
+        groups[0] = True
+        for i, ref in enumerate(vectors.ids):
+            for t in tags[ref]:
+                if t:
+                    groups[tag_codes[t] + 1, i] = True
+
+        scores = vectors.group_scores(
+            [p["title"] + " " + p["abstract"] for p in new_papers], groups
+        )
+        column = 0 if tag is None else 1
+        ranking = np.argsort(-scores[:, column], kind="stable")[:number]
+
+        rows = []
+        for i in ranking:
+            row = [
+                scores[i, column],
+                SecretString(new_papers[i]["id"]),
+                dots_if_needed(new_papers[i]["title"], 70),
+            ]
+            if tag is None and tag_names:
+                row.append(tag_names[int(np.argmax(scores[i, 1:]))])
+            rows.append(row)
+
+        headers = ["Score", "Ref", "Title"]
+        if tag is None and tag_names:
+            headers.append("Closest tag")
+        print(tabulate(rows, headers=headers, tablefmt="plain", floatfmt=".3f"))
@@ -12,8 +12,17 @@ class Refresh(BaseCommand):
 
     def run(self):
         options = self.options
-        ref = options["<ref>"]
+        refs = options["<refs>"]
 
         with PaperDatabase(self.database_path) as paper_database:
-            processed_ref = process_and_validate_ref(ref, paper_database)
-            paper_database.refresh_paper(processed_ref)
+            if options["--all"]:
+                processed_refs = [p[0] for p in paper_database.get_all_papers()]
+            else:
+                processed_refs = [
+                    process_and_validate_ref(ref, paper_database) for ref in refs
+                ]
+
+            if len(processed_refs) == 1:
+                paper_database.refresh_paper(processed_refs[0])
+            else:
+                paper_database.refresh_papers(processed_refs)
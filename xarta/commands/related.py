@@ -0,0 +1,41 @@
+"""The related command."""
+
+
+from .base import BaseCommand
+from ..database import PaperDatabase
+from ..utils import SecretString, dots_if_needed, process_and_validate_ref
+
+
+class Related(BaseCommand):
+    """List the papers in the library most similar to a paper."""
+
+    def run(self):
+        from tabulate import tabulate
+
+        options = self.options
+        threshold = self.get_threshold(0.2)
+        number = self.get_whole_number("--number")
+
+        with PaperDatabase(self.database_path) as paper_database:
+            processed_ref = process_and_validate_ref(options["<ref>"], paper_database)
+            paper_database.assert_contains(processed_ref)
+            paper_database.backfill_minhashes()
+            related = paper_database.get_related_papers(processed_ref, threshold)
+            titles = {paper[0]: paper[1] for paper in paper_database.get_all_papers()}
+
+        if not related:
+            print(f"No papers related to {processed_ref} found.")
+            return
+
+        rows = [
+            [similarity, SecretString(ref), dots_if_needed(titles[ref], 70)]
+            for similarity, ref in related[:number]
+        ]
+        print(
+            tabulate(
+                rows,
+                headers=["Similarity", "Ref", "Title"],
+                tablefmt="plain",
+                floatfmt=".2f",
+            )
+        )
@@ -16,6 +16,8 @@ class Rename(BaseCommand):
         for tag in tags:
             if ";" in tag:
                 raise XartaError("Invalid tag, tags cannot contain semicolons.")
+            if tag.startswith("@"):
+                raise XartaError("Invalid tag, tags cannot start with '@'.")
         if len(tags) > 2:
             raise XartaError("Too many arguments.")
 
@@ -0,0 +1,138 @@
+"""The stats command."""
+
+import csv
+import os
+import sys
+from datetime import datetime
+
+from .base import BaseCommand
+from ..database import PaperDatabase
+from ..metrics import LATENCY_BUCKETS, get_metrics_path, read_events, summarise
+from ..utils import XartaError
+
+
+def format_bucket(i):
+    """Label of the i-th latency histogram bucket, e.g. '0.25-0.5s'."""
+    upper = LATENCY_BUCKETS[i]
+    lower = LATENCY_BUCKETS[i - 1] if i else 0
+    if upper == float("inf"):
+        return f">{lower}s"
+    return f"{lower}-{upper}s"
+
+
+class Stats(BaseCommand):
+    """Print statistics."""
+
+    def run(self):
+        if self.options["network"]:
+            self.network_stats()
+        else:
+            self.library_stats()
+
+    def library_stats(self):
+        from ..analytics import Library
+
+        options = self.options
+        try:
+            number = int(options["--number"])
+        except ValueError:
+            raise XartaError("--number must be a whole number.")
+
+        with PaperDatabase(self.database_path) as paper_database:
+            library = Library(paper_database)
+        if not library.size:
+            print("No papers in the library.")
+            return
+
+        if options["years"] or options["months"]:
+            headers = ["Year" if options["years"] else "Month", "Papers"]
+            rows = library.papers_by_date(monthly=options["months"])
+        elif options["categories"]:
+            headers = ["Category", "Papers"]
+            rows = library.papers_by_category()
+        elif options["tags"]:
+            headers = ["Tag", "Papers"]
+            rows = library.papers_by_tag()
+        elif options["cotags"]:
+            tags, matrix = library.tag_cooccurrence(number)
+            headers = ["Tag"] + tags
+            rows = [[tag] + counts for tag, counts in zip(tags, matrix.tolist())]
+        elif options["coauthors"]:
+            headers = ["Author", "Author", "Papers"]
+            rows = library.coauthors(number)
+        else:
+            raise XartaError("Invalid statistics.")
+
+        if options["--csv"]:
+            writer = csv.writer(sys.stdout)
+            writer.writerow(headers)
+            writer.writerows(rows)
+        elif not rows:
+            print("Nothing to show.")
+        else:
+            from tabulate import tabulate
+
+            print(tabulate(rows, headers=headers))
+
+    def network_stats(self):
+        from tabulate import tabulate
+
+        since = self.options["--since"]
+        if since is not None:
+            try:
+                since = datetime.strptime(since, "%Y-%m-%d").timestamp()
+            except ValueError:
+                raise XartaError("--since must be a date, as in 2020-01-31.")
+
+        path = get_metrics_path()
+        if path is None:
+            raise XartaError("Network metrics are disabled in the config file.")
+        if not os.path.isfile(path):
+            raise XartaError(f"No network metrics recorded yet (in {path}).")
+
+        summaries = summarise(read_events(path, since))
+        if not summaries:
+            print("No network requests recorded in this period.")
+            return
+
+        rows = []
+        for endpoint, summary in sorted(summaries.items()):
+            lookups = summary["cache_hits"] + summary["cache_misses"]
+            cache = (
+                f"{summary['cache_hits']}/{lookups}"
+                f" ({100 * summary['cache_hits'] / lookups:.0f}%)"
+                if lookups
+                else "-"
+            )
+            latencies = [
+                f"{summary[key]:.2f}s" if key in summary else "-"
+                for key in ("p50", "p95", "max")
+            ]
+            rows.append(
+                [
+                    endpoint,
+                    summary["requests"],
+                    summary["failed"],
+                    summary["retried"],
+                    cache,
+                    *latencies,
+                    f"{summary['wait']:.1f}s",
+                ]
+            )
+        headers = ["Endpoint", "Requests", "Failed", "Retried", "Cache hits"]
+        headers += ["p50", "p95", "Max", "Rate limited"]
+        print(f"Network metrics from {path}\n")
+        print(tabulate(rows, headers=headers))
+
+        for endpoint, summary in sorted(summaries.items()):
+            if not summary["requests"]:
+                continue
+            statuses = ", ".join(
+                f"{status}: {count}"
+                for status, count in sorted(summary["statuses"].items())
+            )
+            print(f"\n{endpoint} (status codes {statuses})")
+            largest = max(summary["histogram"])
+            for i, count in enumerate(summary["histogram"]):
+                bar = "#" * round(40 * count / largest)
+                print(f"  {format_bucket(i):>10} {count:>7}  {bar}".rstrip())
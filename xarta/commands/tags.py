@@ -26,6 +26,8 @@ class Tags(BaseCommand):
         for tag in tags:
             if ";" in tag:
                 raise XartaError("Invalid tag, tags cannot contain semicolons.")
+            if tag.startswith("@"):
+                raise XartaError("Invalid tag, tags cannot start with '@'.")
 
         with PaperDatabase(self.database_path) as paper_database:
             processed_ref = process_and_validate_ref(ref, paper_database)
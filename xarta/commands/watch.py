@@ -0,0 +1,89 @@
+"""The watch command."""
+
+
+from .base import BaseCommand
+from ..database import PaperDatabase
+from ..utils import (
+    ARXIV_CATEGORIES,
+    XartaError,
+    SecretString,
+    dots_if_needed,
+    get_arxiv_listing,
+    get_config_list,
+    get_config_option,
+    is_arxiv_category,
+)
+
+
+class Watch(BaseCommand):
+    """Report new papers on the arXiv by watched authors or with watched
+    keywords."""
+
+    def run(self):
+        from tabulate import tabulate
+        from ..watchlist import Watchlist
+
+        options = self.options
+        category = options["<category>"]
+        tag = options["--add"]
+        if tag is not None and (";" in tag or tag.startswith("@")):
+            raise XartaError("Invalid tag, tags cannot contain ';' or start with '@'.")
+        try:
+            min_papers = int(get_config_option("watch_min_papers", "3"))
+        except ValueError:
+            raise XartaError("watch_min_papers in the config file must be a number.")
+
+        with PaperDatabase(self.database_path) as paper_database:
+            papers = paper_database.get_all_papers()
+            authors = get_config_list("watch_authors")
+            if min_papers > 0:
+                authors += paper_database.get_frequent_authors(min_papers)
+            watchlist = Watchlist(get_config_list("watch_keywords"), authors)
+            if not len(watchlist):
+                raise XartaError(
+                    "Nothing to watch, see 'xarta --help' for the watch options "
+                    "of the config file."
+                )
+
+            if category is not None:
+                categories = [category]
+            elif get_config_list("watch_categories"):
+                categories = get_config_list("watch_categories")
+            else:
+                # the archives of the papers in the library, as in recommend
+                categories = {paper[3].split(".")[0] for paper in papers}
+                categories = sorted(categories & ARXIV_CATEGORIES)
+            for listing_category in categories:
+                if not is_arxiv_category(listing_category):
+                    raise XartaError(f"Not an arXiv category: {listing_category}")
+
+            listing = {}
+            for listing_category in categories:
+                for new_paper in get_arxiv_listing(listing_category):
+                    listing.setdefault(new_paper["id"], new_paper)
+            known = {paper[0] for paper in papers} | paper_database.get_watched_papers()
+
+            matches = {}
+            for ref, new_paper in listing.items():
+                if ref not in known:
+                    found = watchlist.matches(new_paper)
+                    if found:
+                        matches[ref] = found
+            if not matches:
+                print("No new papers to report in " + ", ".join(categories))
+                return
+
+            rows = [
+                [
+                    SecretString(ref),
+                    dots_if_needed(listing[ref]["title"], 60),
+                    "; ".join(found),
+                ]
+                for ref, found in matches.items()
+            ]
+            print(tabulate(rows, headers=["Ref", "Title", "Matches"], tablefmt="plain"))
+            paper_database.add_watched_papers(list(matches))
+
+            if tag is not None:
+                print()
+                paper_database.add_papers(list(matches), [tag], data=listing)
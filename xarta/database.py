@@ -1,14 +1,133 @@
 """PaperDatabase class."""
 
+import json
 import sqlite3
 import os
-from . import utils
+from contextlib import contextmanager
+from . import cache, metrics, profiling, providers, utils
+from .bibtex import alias_ids, insert_ids_field, make_key, make_unique_keys
 from .utils import XartaError, string_to_list, check_filter_is_sanitary, print_table
-import requests
-from arxivcheck.arxiv import check_arxiv_published
+from .network import DEFAULT_WORKERS, run_jobs
+from .providers import chunks
 
 DATA_HEADERS = ["ref", "title", "authors", "category", "tags", "alias"]
 
+# number of papers looked up in each INSPIRE literature search
+INSPIRE_BATCH_SIZE = 50
+
+# Tables holding data derived from, or attached to, the papers table. They are
+# versioned with sqlite's user_version pragma rather than the column count of
+# the papers table, and every statement is idempotent so that a database of any
+# older version can be brought up to date by running all of them.
+DATABASE_VERSION = 13
+AUXILIARY_TABLES = [
+    # locally stored pdfs, keyed by the sha256 of their contents. For
+    # downloaded papers the path is relative to the pdf store directory.
+    """CREATE TABLE IF NOT EXISTS pdfs (id text UNIQUE, sha256 text, path text,
+    size integer, url text, added text DEFAULT CURRENT_TIMESTAMP);""",
+    "CREATE INDEX IF NOT EXISTS pdfs_sha256 ON pdfs (sha256);",
+    # abstracts are only needed for text similarity, so are kept out of the
+    # papers table (and its "SELECT *" queries)
+    "CREATE TABLE IF NOT EXISTS abstracts (id text UNIQUE, abstract text);",
+    # minhash signatures of titles and abstracts, and their lsh band buckets
+    "CREATE TABLE IF NOT EXISTS minhashes (id text UNIQUE, signature blob);",
+    "CREATE TABLE IF NOT EXISTS lsh_buckets (band integer, bucket integer, id text);",
+    "CREATE INDEX IF NOT EXISTS lsh_buckets_bucket ON lsh_buckets (band, bucket);",
+    "CREATE INDEX IF NOT EXISTS lsh_buckets_id ON lsh_buckets (id);",
+    # every author of every paper, with their folded surname and initials (see
+    # text.author_key) so that author searches can use an index
+    """CREATE TABLE IF NOT EXISTS authors (id text, position integer, name text,
+    surname text, initials text);""",
+    "CREATE INDEX IF NOT EXISTS authors_surname ON authors (surname, initials);",
+    "CREATE INDEX IF NOT EXISTS authors_id ON authors (id);",
+    # bibtex that was looked up but not found (e.g. INSPIRE has no record of a
+    # new paper yet), so that it is not requested again on every export
+    """CREATE TABLE IF NOT EXISTS missing_bibtex (id text, source text,
+    checked text DEFAULT CURRENT_TIMESTAMP, UNIQUE (id, source));""",
+    # the citation graph: an edge for every paper cited by a paper in the
+    # library, whether the cited paper is in the library or not, so that papers
+    # added later are linked without fetching the references again
+    "CREATE TABLE IF NOT EXISTS citations (citing text, cited text, UNIQUE (citing, cited));",
+    "CREATE INDEX IF NOT EXISTS citations_cited ON citations (cited);",
+    # papers whose references have been fetched (possibly finding none)
+    """CREATE TABLE IF NOT EXISTS references_fetched (id text UNIQUE,
+    checked text DEFAULT CURRENT_TIMESTAMP);""",
+    # the tags of every paper, one per row, kept in step with the tags column so
+    # that papers can be found by tag with an index
+    "CREATE TABLE IF NOT EXISTS paper_tags (id text, tag text, UNIQUE (id, tag));",
+    "CREATE INDEX IF NOT EXISTS paper_tags_tag ON paper_tags (tag);",
+    # the tag hierarchy: the parents given to each tag, and every (ancestor,
+    # descendant) pair of tags with the length of the shortest path between them
+    "CREATE TABLE IF NOT EXISTS tag_parents (tag text, parent text, UNIQUE (tag, parent));",
+    """CREATE TABLE IF NOT EXISTS tag_closure (ancestor text, descendant text,
+    depth integer, UNIQUE (ancestor, descendant));""",
+    # short names standing in for tags, e.g. 'LNV' for 'lepton-number-violation'
+    "CREATE TABLE IF NOT EXISTS tag_aliases (alias text UNIQUE, tag text);",
+    # saved searches, with their search criteria as json, and the papers they
+    # currently match, which are updated whenever a paper changes
+    "CREATE TABLE IF NOT EXISTS collections (name text UNIQUE, query text);",
+    """CREATE TABLE IF NOT EXISTS collection_papers (name text, id text,
+    UNIQUE (name, id));""",
+    "CREATE INDEX IF NOT EXISTS collection_papers_id ON collection_papers (id);",
+    # the model of tagmodel.py: the number of papers with each tag and of their
+    # features, and how often each feature appears in them. The tags and
+    # features each paper was last counted with are kept, so that they can be
+    # taken off again when they change.
+    "CREATE TABLE IF NOT EXISTS tag_model (tag text UNIQUE, papers integer, features integer);",
+    """CREATE TABLE IF NOT EXISTS tag_features (tag text, feature integer,
+    count integer, UNIQUE (tag, feature));""",
+    "CREATE INDEX IF NOT EXISTS tag_features_feature ON tag_features (feature);",
+    """CREATE TABLE IF NOT EXISTS tag_model_papers (id text UNIQUE, tags text,
+    features blob);""",
+    # new papers already reported by the watch command
+    """CREATE TABLE IF NOT EXISTS watched_papers (id text UNIQUE,
+    reported text DEFAULT CURRENT_TIMESTAMP);""",
+]
+
+# older versions of sqlite allow at most 999 parameters in a statement
+SQL_VARIABLE_LIMIT = 900
+
+# tables with rows that must be removed alongside a paper, and the name of the
+# column holding the paper id
+DEPENDENT_TABLES = {
+    "pdfs": "id",
+    "abstracts": "id",
+    "minhashes": "id",
+    "lsh_buckets": "id",
+    "authors": "id",
+    "missing_bibtex": "id",
+    "citations": "citing",
+    "references_fetched": "id",
+    "paper_tags": "id",
+    "collection_papers": "id",
+}
+
+# tables read across every library within PaperDatabase.all_libraries, with
+# their columns
+LIBRARY_TABLES = {
+    "papers": "id, title, authors, category, tags, alias, bibtex_arxiv, bibtex_inspire",
+    "authors": "id, position, name, surname, initials",
+    "paper_tags": "id, tag",
+    "tag_parents": "tag, parent",
+    "tag_closure": "ancestor, descendant, depth",
+    "tag_aliases": "alias, tag",
+}
+
+# the column of rows of the papers table read across libraries holding the name
+# of their library, which follows the columns of the papers table
+LIBRARY_COLUMN = 8
+
+# bibtex that was not found is looked up again after this many days
+MISSING_BIBTEX_RETRY_DAYS = 7
+
+# papers reported by the watch command are forgotten after this many days, by
+# when they have long left the listings
+WATCHED_PAPERS_DAYS = 60
+
+# fetched bibtex is committed after every this many entries, so that little is
+# lost if a long download is interrupted
+BIBTEX_CHECKPOINT = 50
+
 
 def initialise_database(database_path):
     """Initialise database with empty table. If file already exists, do nothing"""
@@ -24,17 +143,40 @@ def initialise_database(database_path):
     with sqlite3.connect(database_path) as connection:
         print("Initialising database...")
         connection.execute(init_command)
+        for command in AUXILIARY_TABLES:
+            connection.execute(command)
+        connection.execute(f"PRAGMA user_version = {DATABASE_VERSION};")
         connection.commit()
     connection.close()
 
     print("Database initialised!")
 
 
+def vacuum_database(database_path):
+    """Rebuild the database file, returning the space of deleted rows to the
+    file system. Returns the sizes of the file before and after, in bytes."""
+    size = os.path.getsize(database_path)
+    connection = sqlite3.connect(database_path)
+    try:
+        connection.execute("VACUUM;")
+    finally:
+        connection.close()
+    return size, os.path.getsize(database_path)
+
+
 class PaperDatabase:
-    """The paper database interface."""
+    """The paper database interface. Other libraries, given as a list of (name,
+    path) tuples, are attached to be read alongside the database (see
+    all_libraries)."""
 
-    def __init__(self, path):
+    def __init__(self, path, libraries=()):
         self.path = path
+        self.libraries = list(libraries)
+        # true within all_libraries
+        self.reading_libraries = False
+        # files of the pdf store no longer used by any paper, removed once the
+        # transaction that stopped using them is committed
+        self.unused_pdfs = []
         self.connection = None
         self.cursor = None
 
@@ -45,18 +187,30 @@ class PaperDatabase:
             raise XartaError(f"Database does not exist in {path}")
 
     def __enter__(self):
-        self.connection = sqlite3.connect(self.path)
-        self.cursor = self.connection.cursor()
-        self.check_database_version()
+        with profiling.phase("open database"):
+            self.connection = sqlite3.connect(self.path)
+            self.cursor = profiling.profile_cursor(self.connection.cursor())
+            # databases cannot be attached once a transaction has begun
+            self.attach_libraries()
+            with profiling.phase("check database version"):
+                self.check_database_version()
         return self
 
     def __exit__(self, error_type, value, traceback):
+        with profiling.phase("commit and close database"):
+            if traceback is None:
+                self.connection.commit()
+            else:
+                self.connection.rollback()
+            changed = traceback is None and self.connection.total_changes > 0
+            self.cursor.close()
+            self.connection.close()
+        if changed:
+            # cached results are keyed on the state of the database, so would not
+            # be used again anyway
+            cache.clear(self.path)
         if traceback is None:
-            self.connection.commit()
-        else:
-            self.connection.rollback()
-        self.cursor.close()
-        self.connection.close()
+            self.remove_unused_pdfs()
 
     def check_database_version(self):
         """Check version of database. If database was created using an older version of
@@ -87,6 +241,83 @@ class PaperDatabase:
                 'ALTER TABLE papers ADD COLUMN bibtex_inspire text DEFAULT "";'
             )
 
+        self.cursor.execute("PRAGMA user_version")
+        version = self.cursor.fetchall()[0][0]
+        if version < DATABASE_VERSION:
+            for command in AUXILIARY_TABLES:
+                self.cursor.execute(command)
+            self.backfill_authors()
+            self.backfill_paper_tags()
+            self.backfill_tag_model()
+            self.cursor.execute(f"PRAGMA user_version = {DATABASE_VERSION};")
+
+    def attach_libraries(self):
+        """Attach the other libraries, which must be up to date."""
+        for name, path in self.libraries:
+            if not os.path.isfile(path):
+                raise XartaError(f"Library {name} does not exist in {path}")
+            self.cursor.execute(f'ATTACH DATABASE ? AS "{name}";', (path,))
+            self.cursor.execute(f'PRAGMA "{name}".user_version;')
+            if self.cursor.fetchall()[0][0] < DATABASE_VERSION:
+                raise XartaError(
+                    f"The library {name} was made by an older version of xarta. "
+                    f"Update it by running xarta with {path} as the database."
+                )
+
+    @contextmanager
+    def all_libraries(self):
+        """Read every library at once within this context. The tables in
+        LIBRARY_TABLES are replaced by temporary views of the same names joining
+        the tables of every library with UNION ALL, so that each query still
+        reads them all at once. Their rows end with the name of their library
+        (and for papers, a rowid ordering them by library). The views cannot be
+        written to."""
+        if not self.libraries:
+            yield
+            return
+
+        schemas = ["main"] + [name for name, _ in self.libraries]
+        for table, columns in LIBRARY_TABLES.items():
+            selects = []
+            for i, schema in enumerate(schemas):
+                rowid = f", ({i} << 40) + rowid AS rowid" if table == "papers" else ""
+                selects.append(
+                    f"""SELECT {columns}, '{schema}' AS library{rowid}
+                    FROM "{schema}".{table}"""
+                )
+            self.cursor.execute(
+                f"CREATE TEMP VIEW {table} AS {' UNION ALL '.join(selects)};"
+            )
+        self.reading_libraries = True
+        try:
+            yield
+        finally:
+            self.reading_libraries = False
+            for table in LIBRARY_TABLES:
+                self.cursor.execute(f"DROP VIEW IF EXISTS temp.{table};")
+
+    def paper_key(self, row):
+        """The key of a row of the papers table in the sets of papers found by
+        find_papers_by_author and the like: its id, or within all_libraries, its
+        library and id, as the same paper may be in several libraries."""
+        if self.reading_libraries:
+            return (row[LIBRARY_COLUMN], row[0])
+        return row[0]
+
+    def paper_key_columns(self, table):
+        """The columns of `table` to select the keys of its papers with."""
+        if self.reading_libraries:
+            return f"{table}.library, {table}.id"
+        return f"{table}.id"
+
+    def fetch_paper_keys(self):
+        """Fetch the results of a query selecting paper_key_columns as a set of
+        keys of papers."""
+        rows = self.cursor.fetchall()
+        if self.reading_libraries:
+            return set(rows)
+        return {row[0] for row in rows}
+
     def get_all_aliases(self):
         """get a list of all aliases."""
         self.cursor.execute("SELECT alias FROM papers")
@@ -103,6 +334,47 @@ class PaperDatabase:
             return False
         return results[0][0]
 
+    def resolve_keys(self, keys, citation_keys=None):
+        """Find the papers that citation keys refer to, by arXiv id (also without
+        the slash of old ids, as in the ids field of exported bibtex), alias, or
+        the keys of generated bibtex, given by `citation_keys` (see
+        get_citation_keys). All keys are resolved with a single query. Returns a
+        dictionary mapping the keys that were found to paper ids, and a list of
+        those that were not."""
+        self.cursor.execute("SELECT id, alias FROM papers;")
+        lookup = {}
+        for paper_id, alias in self.cursor.fetchall():
+            lookup[paper_id] = lookup[paper_id.replace("/", "")] = paper_id
+            if alias:
+                lookup.setdefault(alias, paper_id)
+        for paper_id, key in (citation_keys or {}).items():
+            lookup.setdefault(key, paper_id)
+
+        resolved, unresolved = {}, []
+        for key in keys:
+            paper_id = lookup.get(key) or lookup.get(utils.process_ref(key))
+            if paper_id:
+                resolved[key] = paper_id
+            else:
+                unresolved.append(key)
+        return resolved, unresolved
+
+    def get_citation_keys(self, scheme):
+        """Get a dictionary mapping the id of every paper to the key of its
+        generated bibtex in the key `scheme` (see bibtex.make_key). Keys are made
+        unique across the whole library, in the order the papers were added, so
+        that a paper has the same key whichever papers are exported."""
+        papers = {}
+        for paper in self.get_all_papers():
+            papers.setdefault(paper[0], paper)
+        keys = make_unique_keys(
+            [
+                make_key(scheme, p[0], string_to_list(p[2]), p[1], p[5])
+                for p in papers.values()
+            ]
+        )
+        return dict(zip(papers, keys))
+
     def get_alias(self, paper_id):
         """Find the alias associated with a paper. Return false if it does not have an alias."""
         self.cursor.execute("SELECT alias FROM papers WHERE id=?", (paper_id,))
@@ -112,12 +384,43 @@ class PaperDatabase:
         return results[0][0]
 
     def refresh_paper(self, paper_id):
-        """Referesh arxiv info on paper (e.g., get newest version.)"""
+        """Referesh the info on a paper (e.g., get newest arXiv version.)"""
 
         if not self.contains(paper_id):
             raise XartaError("This paper is not in the database.")
 
-        data = utils.get_arxiv_data(paper_id)
+        self.update_paper_data(paper_id, providers.get_metadata(paper_id))
+        self.update_collections([paper_id])
+        self.update_tag_model([paper_id])
+
+        # update bibtex
+        self.get_bibtex_data(paper_id, force_refresh=True)
+
+        print(f"{paper_id} information has been updated!")
+
+    def refresh_papers(self, paper_ids):
+        """Refresh the info of many papers at once. Metadata is requested in
+        batches from each provider and bibtex is fetched concurrently."""
+
+        for paper_id in paper_ids:
+            self.assert_contains(paper_id)
+
+        data = providers.fetch_metadata(paper_ids)
+        for paper_id in paper_ids:
+            if paper_id not in data:
+                print(f"No data found for {paper_id}")
+                continue
+            self.update_paper_data(paper_id, data[paper_id])
+        self.update_collections(list(data))
+        self.update_tag_model(list(data))
+
+        self.fetch_bibtex(list(data), force_refresh=True)
+
+        print(f"{len(data)} papers have been updated!")
+
+    def update_paper_data(self, paper_id, data):
+        """Overwrite the info of a paper with `data`, as returned by
+        providers.get_metadata."""
         authors = utils.list_to_string(data["authors"])
         title, category = data["title"], data["category"]
         # tags = [utils.expand_tag(tag, data) for tag in tags]
@@ -126,15 +429,15 @@ class PaperDatabase:
         )
 
         self.cursor.execute(insert_command, (title, authors, category, paper_id))
-
-        # update bibtex
-        self.get_bibtex_data(paper_id, force_refresh=True)
-
-        print(f"{paper_id} information has been updated!")
+        self.set_authors(paper_id, data["authors"])
+        self.set_abstract(paper_id, data["abstract"])
+        self.set_minhashes([(paper_id, title, data["abstract"])])
+        # the references may have changed with the new version
+        self.cursor.execute("DELETE FROM references_fetched WHERE id = ?;", (paper_id,))
 
     def add_paper(self, paper_id, tags, alias):
-        """Add paper to database. paper_id is the arxiv number as a string. The
-        tags are a list of strings.
+        """Add paper to database. paper_id is the arxiv number, or a namespaced ref
+        of another provider, as a string. The tags are a list of strings.
         """
         if alias and alias in self.get_all_aliases():
             raise XartaError("Alias is not unique!")
@@ -142,61 +445,709 @@ class PaperDatabase:
         if self.contains(paper_id):
             raise XartaError("This paper is already in the database.")
 
-        data = utils.get_arxiv_data(paper_id)
+        self.insert_paper(paper_id, providers.get_metadata(paper_id), tags, alias)
+        self.update_collections([paper_id])
+        self.update_tag_model([paper_id])
+
+        # get bibtex data
+        self.get_bibtex_data(paper_id)
+
+        print(f"{paper_id} added to database!")
+
+    def add_papers(self, paper_ids, tags, data=None):
+        """Add many papers with the same tags. Papers already in the database are
+        skipped. Metadata is requested in batches from each provider, unless it
+        is given in `data` as returned by providers.fetch_metadata, and bibtex is
+        fetched concurrently."""
+
+        new_ids = []
+        for paper_id in dict.fromkeys(paper_ids):
+            if self.contains(paper_id):
+                print(f"{paper_id} is already in the database.")
+            else:
+                new_ids.append(paper_id)
+
+        if data is None:
+            data = providers.fetch_metadata(new_ids)
+        data = {paper_id: data[paper_id] for paper_id in new_ids if paper_id in data}
+        for paper_id in new_ids:
+            if paper_id not in data:
+                print(f"No data found for {paper_id}")
+                continue
+            self.insert_paper(paper_id, data[paper_id], list(tags), "")
+        self.update_collections(list(data))
+        self.update_tag_model(list(data))
+
+        self.fetch_bibtex(list(data))
+
+        print(f"{len(data)} papers added to database!")
+
+    def insert_paper(self, paper_id, data, tags, alias):
+        """Insert a paper with `data`, as returned by providers.get_metadata."""
         authors = utils.list_to_string(data["authors"])
-        # tags = [utils.expand_tag(tag, data) for tag in tags]
+        tags = self.resolve_tags(tags)
         tags.sort(key=str.lower)
-        tags = utils.list_to_string(tags)
         title, category = data["title"], data["category"]
         insert_command = "INSERT INTO papers (id, title, authors, category, tags, alias) VALUES (?, ?, ?, ?, ?, ?);"
 
         self.cursor.execute(
-            insert_command, (paper_id, title, authors, category, tags, alias)
+            insert_command,
+            (paper_id, title, authors, category, utils.list_to_string(tags), alias),
+        )
+        self.set_paper_tags(paper_id, tags)
+        self.set_authors(paper_id, data["authors"])
+        self.set_abstract(paper_id, data["abstract"])
+        self.set_minhashes([(paper_id, title, data["abstract"])])
+
+    def set_authors(self, paper_id, authors):
+        """Index the authors of a paper, given as a list of names."""
+        from .text import author_key
+
+        self.cursor.execute("DELETE FROM authors WHERE id = ?;", (paper_id,))
+        self.cursor.executemany(
+            """INSERT INTO authors (id, position, name, surname, initials)
+            VALUES (?, ?, ?, ?, ?);""",
+            [
+                (paper_id, position, name) + author_key(name)
+                for position, name in enumerate(authors)
+                if name
+            ],
         )
 
-        # get bibtex data
-        self.get_bibtex_data(paper_id)
+    def backfill_authors(self):
+        """Index the authors of all papers that are not indexed yet (e.g. those
+        added with an older version of xarta)."""
+        self.cursor.execute(
+            "SELECT id, authors FROM papers WHERE id NOT IN (SELECT id FROM authors);"
+        )
+        for paper_id, authors in self.cursor.fetchall():
+            self.set_authors(paper_id, string_to_list(authors or ""))
+
+    def find_papers_by_author(self, author):
+        """Get the keys (see paper_key) of the papers by `author`. Names are compared by folded
+        surname, which may be abbreviated, and initials, if given, so that e.g.
+        'Schrodinger', 'schröd' and 'E. Schrödinger' all match 'Erwin
+        Schrödinger'. Any name containing `author`, ignoring accents and case,
+        matches too, so that e.g. 'Erwin' or 'rodinger' also work."""
+        from .text import author_key, normalise_text
+
+        keys = set()
+        surname, initials = author_key(author)
+        if surname:
+            # folded surnames only contain letters and digits, which sort before "~"
+            self.cursor.execute(
+                f"""SELECT DISTINCT {self.paper_key_columns("authors")} FROM authors
+                WHERE surname BETWEEN ? AND ?
+                AND (? LIKE initials || '%' OR initials LIKE ? || '%');""",
+                (surname, surname + "~", initials, initials),
+            )
+            keys = self.fetch_paper_keys()
 
-        print(f"{paper_id} added to database!")
+        folded = normalise_text(author).strip()
+        if not folded:
+            return keys
+        self.cursor.execute(
+            f"SELECT {self.paper_key_columns('authors')}, name FROM authors;"
+        )
+        return keys | {
+            row[:-1] if self.reading_libraries else row[0]
+            for row in self.cursor.fetchall()
+            if folded in normalise_text(row[-1])
+        }
+
+    def get_frequent_authors(self, min_papers):
+        """Get the names of the authors of at least `min_papers` papers, counting
+        different spellings of a name together and giving the longest one."""
+        self.cursor.execute(
+            """SELECT name, max(length(name)) FROM authors
+            GROUP BY surname, substr(initials, 1, 1)
+            HAVING COUNT(DISTINCT id) >= ? ORDER BY surname;""",
+            (min_papers,),
+        )
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def get_author_names(self):
+        """Get the name of every author of every paper, in the order the papers
+        were added. Different spellings of a name (e.g. 'S. Weinberg' and 'Steven
+        Weinberg') are replaced by the longest one."""
+        library = (
+            "AND authors.library = papers.library" if self.reading_libraries else ""
+        )
+        self.cursor.execute(
+            f"""SELECT authors.name, authors.surname, substr(authors.initials, 1, 1)
+            FROM authors JOIN papers ON authors.id = papers.id {library}
+            ORDER BY papers.rowid, authors.position;"""
+        )
+        rows = self.cursor.fetchall()
+        longest = {}
+        for name, surname, initial in rows:
+            key = (surname, initial)
+            if len(name) > len(longest.get(key, "")):
+                longest[key] = name
+        return [longest[(surname, initial)] for _, surname, initial in rows]
+
+    def set_abstract(self, paper_id, abstract):
+        """Store the abstract of a paper."""
+        self.cursor.execute(
+            "INSERT OR REPLACE INTO abstracts (id, abstract) VALUES (?, ?);",
+            (paper_id, abstract),
+        )
+
+    def get_paper_texts(self):
+        """Get the id, title, and abstract (empty if unknown) of every paper."""
+        self.cursor.execute(
+            """SELECT papers.id, papers.title, IFNULL(abstracts.abstract, "")
+            FROM papers LEFT JOIN abstracts ON papers.id = abstracts.id;"""
+        )
+        return self.cursor.fetchall()
+
+    def set_minhashes(self, texts):
+        """Compute and store the minhash signatures and lsh buckets of papers.
+        `texts` is a list of (id, title, abstract) tuples."""
+        from . import minhash
+
+        signatures, buckets = [], []
+        for paper_id, title, abstract in texts:
+            signature = minhash.signature(title + " " + abstract)
+            if signature is None:
+                continue
+            signatures.append((paper_id, minhash.to_blob(signature)))
+            buckets += [
+                (band, bucket, paper_id)
+                for band, bucket in enumerate(minhash.band_buckets(signature))
+            ]
+
+        ids = [(paper_id,) for paper_id, _, _ in texts]
+        self.cursor.executemany("DELETE FROM minhashes WHERE id = ?;", ids)
+        self.cursor.executemany("DELETE FROM lsh_buckets WHERE id = ?;", ids)
+        self.cursor.executemany(
+            "INSERT INTO minhashes (id, signature) VALUES (?, ?);", signatures
+        )
+        self.cursor.executemany(
+            "INSERT INTO lsh_buckets (band, bucket, id) VALUES (?, ?, ?);", buckets
+        )
+
+    def backfill_minhashes(self):
+        """Compute the minhash signatures of all papers that do not have one yet
+        (e.g. those added with an older version of xarta). Returns the number of
+        papers processed."""
+        self.cursor.execute(
+            """SELECT papers.id, papers.title, IFNULL(abstracts.abstract, "")
+            FROM papers LEFT JOIN abstracts ON papers.id = abstracts.id
+            WHERE papers.id NOT IN (SELECT id FROM minhashes);"""
+        )
+        texts = self.cursor.fetchall()
+        if texts:
+            self.set_minhashes(texts)
+        return len(texts)
+
+    def get_minhashes(self, paper_ids):
+        """Get a dictionary of the minhash signatures of the given papers."""
+        from . import minhash
+
+        signatures = {}
+        for chunk in chunks(list(paper_ids), SQL_VARIABLE_LIMIT):
+            placeholders = ", ".join("?" * len(chunk))
+            self.cursor.execute(
+                f"SELECT id, signature FROM minhashes WHERE id IN ({placeholders});",
+                chunk,
+            )
+            for paper_id, blob in self.cursor.fetchall():
+                signatures[paper_id] = minhash.from_blob(blob)
+        return signatures
+
+    def get_related_papers(self, paper_id, threshold):
+        """Find papers similar to `paper_id` among those sharing an lsh bucket with
+        it. Returns a list of (similarity, id) tuples, most similar first."""
+        from . import minhash
+
+        self.cursor.execute(
+            """SELECT DISTINCT other.id FROM lsh_buckets AS this
+            JOIN lsh_buckets AS other
+            ON this.band = other.band AND this.bucket = other.bucket
+            WHERE this.id = ? AND other.id != ?;""",
+            (paper_id, paper_id),
+        )
+        candidates = [row[0] for row in self.cursor.fetchall()]
+        signatures = self.get_minhashes(candidates + [paper_id])
+        if paper_id not in signatures:
+            return []
+
+        related = []
+        for candidate in candidates:
+            similarity = minhash.similarity(signatures[paper_id], signatures[candidate])
+            if similarity >= threshold:
+                related.append((similarity, candidate))
+        return sorted(related, reverse=True)
+
+    def get_duplicate_papers(self, threshold):
+        """Find pairs of papers with a similarity of at least `threshold` among
+        those sharing an lsh bucket. Returns a list of (similarity, id, id)
+        tuples, most similar first."""
+        from . import minhash
+
+        self.cursor.execute(
+            """SELECT DISTINCT a.id, b.id FROM lsh_buckets AS a
+            JOIN lsh_buckets AS b ON a.band = b.band AND a.bucket = b.bucket
+            WHERE a.id < b.id;"""
+        )
+        pairs = self.cursor.fetchall()
+        signatures = self.get_minhashes(
+            {paper_id for pair in pairs for paper_id in pair}
+        )
+
+        duplicates = []
+        for id_a, id_b in pairs:
+            similarity = minhash.similarity(signatures[id_a], signatures[id_b])
+            if similarity >= threshold:
+                duplicates.append((similarity, id_a, id_b))
+        return sorted(duplicates, reverse=True)
 
     def delete_paper(self, paper_id):
         """Remove paper from database."""
-        self.cursor.execute("DELETE FROM papers WHERE id = ?;", (paper_id,))
+        self.delete_papers([paper_id], silent=True)
 
         print(f"{paper_id} deleted from database!")
 
+    def delete_papers(self, paper_ids, silent=False):
+        """Remove many papers from the database, with a single statement for the
+        papers table and for each dependent table. Their pdfs in the pdf store
+        are removed too, unless another paper has an identical pdf."""
+        self.cursor.execute("CREATE TEMP TABLE deleted_papers (id text PRIMARY KEY);")
+        try:
+            self.cursor.executemany(
+                "INSERT OR IGNORE INTO deleted_papers (id) VALUES (?);",
+                [(paper_id,) for paper_id in paper_ids],
+            )
+            self.cursor.execute(
+                """SELECT DISTINCT sha256, path FROM pdfs
+                WHERE id IN (SELECT id FROM deleted_papers);"""
+            )
+            stored = self.cursor.fetchall()
+            self.cursor.execute(
+                "DELETE FROM papers WHERE id IN (SELECT id FROM deleted_papers);"
+            )
+            for table, column in DEPENDENT_TABLES.items():
+                self.cursor.execute(
+                    f"""DELETE FROM {table}
+                    WHERE {column} IN (SELECT id FROM deleted_papers);"""
+                )
+        finally:
+            self.cursor.execute("DROP TABLE temp.deleted_papers;")
+        self.release_pdfs(stored)
+        self.update_tag_model(paper_ids)
+
+        if not silent:
+            print(f"{len(paper_ids)} papers deleted from database!")
+
     def get_tags(self, paper_id):
         """Get list of tags for some paper"""
         self.cursor.execute("SELECT tags FROM papers WHERE id=?;", (paper_id,))
         tags_string = self.cursor.fetchall()[0][0]
         return utils.string_to_list(tags_string)
 
+    def set_paper_tags(self, paper_id, tags):
+        """Index the tags of a paper, given as a list of strings."""
+        self.cursor.execute("DELETE FROM paper_tags WHERE id = ?;", (paper_id,))
+        self.cursor.executemany(
+            "INSERT OR IGNORE INTO paper_tags (id, tag) VALUES (?, ?);",
+            [(paper_id, tag) for tag in tags if tag],
+        )
+
+    def backfill_paper_tags(self):
+        """Index the tags of all papers (e.g. those added with an older version of
+        xarta)."""
+        self.cursor.execute("DELETE FROM paper_tags;")
+        self.cursor.execute("SELECT id, tags FROM papers;")
+        for paper_id, tags in self.cursor.fetchall():
+            self.set_paper_tags(paper_id, string_to_list(tags or ""))
+
+    def get_paper_features(self, paper_ids):
+        """Get a dictionary of the features of the given papers in the tag model,
+        as (indices, counts) tuples (see tagmodel.paper_features)."""
+        from . import tagmodel
+
+        features = {}
+        for chunk in chunks(list(paper_ids), SQL_VARIABLE_LIMIT):
+            placeholders = ", ".join("?" * len(chunk))
+            self.cursor.execute(
+                f"""SELECT id, surname, initials FROM authors
+                WHERE id IN ({placeholders}) ORDER BY id, position;""",
+                chunk,
+            )
+            authors = {}
+            for paper_id, surname, initials in self.cursor.fetchall():
+                authors.setdefault(paper_id, []).append((surname, initials))
+            self.cursor.execute(
+                f"""SELECT papers.id, IFNULL(papers.title, ""),
+                IFNULL(abstracts.abstract, "")
+                FROM papers LEFT JOIN abstracts ON papers.id = abstracts.id
+                WHERE papers.id IN ({placeholders});""",
+                chunk,
+            )
+            for paper_id, title, abstract in self.cursor.fetchall():
+                features[paper_id] = tagmodel.paper_features(
+                    title, abstract, authors.get(paper_id, [])
+                )
+        return features
+
+    def update_tag_model(self, paper_ids):
+        """Bring the tag model (see tagmodel.py) up to date with changes to the
+        tags, text or authors of the given papers, which may also have been
+        deleted. Only the counts of the tags of these papers are changed."""
+        from . import tagmodel
+
+        counted, tags = {}, {}
+        for chunk in chunks(list(paper_ids), SQL_VARIABLE_LIMIT):
+            placeholders = ", ".join("?" * len(chunk))
+            self.cursor.execute(
+                f"""SELECT id, tags, features FROM tag_model_papers
+                WHERE id IN ({placeholders});""",
+                chunk,
+            )
+            for paper_id, paper_tags, blob in self.cursor.fetchall():
+                counted[paper_id] = (paper_tags, blob)
+            self.cursor.execute(
+                f"SELECT id, tag FROM paper_tags WHERE id IN ({placeholders});", chunk
+            )
+            for paper_id, tag in self.cursor.fetchall():
+                tags.setdefault(paper_id, []).append(tag)
+
+        # only tagged papers are counted
+        current = {
+            paper_id: (";".join(sorted(tags[paper_id])), tagmodel.to_blob(*features))
+            for paper_id, features in self.get_paper_features(list(tags)).items()
+        }
+
+        model, feature_counts, changed = {}, {}, []
+        for paper_id in dict.fromkeys(paper_ids):
+            if counted.get(paper_id) == current.get(paper_id):
+                continue
+            changed.append(paper_id)
+            # take off what the paper was counted with, and count it again
+            for sign, paper in (
+                (-1, counted.get(paper_id)),
+                (1, current.get(paper_id)),
+            ):
+                if paper is None:
+                    continue
+                indices, counts = tagmodel.from_blob(paper[1])
+                for tag in paper[0].split(";"):
+                    totals = model.setdefault(tag, [0, 0])
+                    totals[0] += sign
+                    totals[1] += sign * int(counts.sum())
+                    for feature, count in zip(indices.tolist(), counts.tolist()):
+                        key = (tag, feature)
+                        feature_counts[key] = feature_counts.get(key, 0) + sign * count
+
+        self.cursor.executemany(
+            """INSERT INTO tag_features (tag, feature, count) VALUES (?, ?, ?)
+            ON CONFLICT (tag, feature) DO UPDATE SET count = count + excluded.count;""",
+            [key + (count,) for key, count in feature_counts.items() if count],
+        )
+        self.cursor.executemany(
+            "DELETE FROM tag_features WHERE tag = ? AND feature = ? AND count <= 0;",
+            [key for key, count in feature_counts.items() if count < 0],
+        )
+        self.cursor.executemany(
+            """INSERT INTO tag_model (tag, papers, features) VALUES (?, ?, ?)
+            ON CONFLICT (tag) DO UPDATE SET papers = papers + excluded.papers,
+            features = features + excluded.features;""",
+            [(tag, papers, features) for tag, (papers, features) in model.items()],
+        )
+        self.cursor.executemany(
+            "DELETE FROM tag_model WHERE tag = ? AND papers <= 0;",
+            [(tag,) for tag in model],
+        )
+        self.cursor.executemany(
+            "DELETE FROM tag_model_papers WHERE id = ?;",
+            [(paper_id,) for paper_id in changed],
+        )
+        self.cursor.executemany(
+            "INSERT INTO tag_model_papers (id, tags, features) VALUES (?, ?, ?);",
+            [
+                (paper_id,) + current[paper_id]
+                for paper_id in changed
+                if paper_id in current
+            ],
+        )
+
+    def backfill_tag_model(self):
+        """Count every tagged paper in the tag model (e.g. those added with an
+        older version of xarta)."""
+        self.cursor.execute("SELECT DISTINCT id FROM paper_tags;")
+        self.update_tag_model([row[0] for row in self.cursor.fetchall()])
+
+    def suggest_tags(self, paper_id):
+        """Suggest tags for a paper from the tag model, other than those it has."""
+        from . import tagmodel
+
+        self.cursor.execute("SELECT tag, papers, features FROM tag_model;")
+        tags = self.cursor.fetchall()
+        features = self.get_paper_features([paper_id])
+        if not tags or paper_id not in features:
+            return []
+
+        indices, counts = features[paper_id]
+        feature_counts = []
+        for chunk in chunks(indices.tolist(), SQL_VARIABLE_LIMIT):
+            placeholders = ", ".join("?" * len(chunk))
+            self.cursor.execute(
+                f"""SELECT tag, feature, count FROM tag_features
+                WHERE feature IN ({placeholders});""",
+                chunk,
+            )
+            feature_counts += self.cursor.fetchall()
+        probabilities = tagmodel.score_tags(indices, counts, tags, feature_counts)
+        return tagmodel.best_tags(probabilities, exclude=self.get_tags(paper_id))
+
+    def resolve_tags(self, tags):
+        """Replace the tag aliases in a list of tags by the tags they stand for,
+        removing any duplicates."""
+        self.cursor.execute("SELECT alias, tag FROM tag_aliases;")
+        aliases = dict(self.cursor.fetchall())
+        return list(dict.fromkeys(aliases.get(tag, tag) for tag in tags))
+
+    def find_papers_by_tags(self, tags):
+        """Get the keys (see paper_key) of the papers with any of `tags`, or any
+        tag below one of them in the tag hierarchy. Aliases are resolved first."""
+        tags = self.resolve_tags(tags)
+        if not tags:
+            return set()
+        placeholders = ", ".join("?" * len(tags))
+        self.cursor.execute(
+            f"""SELECT DISTINCT {self.paper_key_columns("paper_tags")} FROM paper_tags
+            WHERE tag IN ({placeholders})
+            OR tag IN (SELECT descendant FROM tag_closure
+                       WHERE ancestor IN ({placeholders}));""",
+            tags + tags,
+        )
+        return self.fetch_paper_keys()
+
+    def get_tag_hierarchy(self):
+        """Get every tag, used by a paper or in the hierarchy, as a dictionary
+        mapping each tag to a list of its children (in alphabetical order)."""
+        self.cursor.execute(
+            """SELECT tag FROM paper_tags UNION SELECT tag FROM tag_parents
+            UNION SELECT parent FROM tag_parents;"""
+        )
+        hierarchy = {row[0]: [] for row in self.cursor.fetchall()}
+        self.cursor.execute("SELECT DISTINCT parent, tag FROM tag_parents;")
+        for parent, tag in self.cursor.fetchall():
+            hierarchy[parent].append(tag)
+        for children in hierarchy.values():
+            children.sort(key=str.lower)
+        return hierarchy
+
+    def get_tags_by_date(self):
+        """Get every tag used by a paper, in the order they were first used."""
+        library = (
+            "AND paper_tags.library = papers.library" if self.reading_libraries else ""
+        )
+        self.cursor.execute(
+            f"""SELECT paper_tags.tag FROM paper_tags
+            JOIN papers ON papers.id = paper_tags.id {library}
+            GROUP BY paper_tags.tag
+            ORDER BY MIN(papers.rowid), lower(paper_tags.tag);"""
+        )
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def get_paper_month_rows(self):
+        """Get a (category, month) row for every paper, in the order they were
+        added. The month of submission comes from the arXiv id, as YYMM, or is -1
+        for papers that are not on the arXiv."""
+        self.cursor.execute(
+            """SELECT category, CASE
+                WHEN id GLOB '[0-9][0-9][0-9][0-9].[0-9][0-9][0-9][0-9]*'
+                THEN CAST(substr(id, 1, 4) AS integer)
+                WHEN id GLOB '[a-z]*/[0-9][0-9][0-9][0-9][0-9][0-9][0-9]'
+                THEN CAST(substr(id, instr(id, '/') + 1, 4) AS integer)
+                ELSE -1 END
+            FROM papers ORDER BY rowid;"""
+        )
+        return self.cursor.fetchall()
+
+    def get_paper_tag_rows(self):
+        """Get a (paper, tag) row for every tag of every paper, where papers are
+        given by their rowid."""
+        self.cursor.execute(
+            """SELECT papers.rowid, paper_tags.tag FROM paper_tags
+            JOIN papers ON papers.id = paper_tags.id;"""
+        )
+        return self.cursor.fetchall()
+
+    def get_paper_author_rows(self):
+        """Get a (paper, key, name) row for every author of every paper, where
+        papers are given by their rowid, and the key is the surname and first
+        initial, which is shared by different spellings of a name."""
+        self.cursor.execute(
+            """SELECT papers.rowid, authors.surname || ' '
+                || substr(authors.initials, 1, 1), authors.name
+            FROM authors JOIN papers ON papers.id = authors.id;"""
+        )
+        return self.cursor.fetchall()
+
+    def get_tag_counts(self):
+        """Count the papers with every tag, including those with a tag below it in
+        the hierarchy. Returns a list of (tag, papers) tuples, most papers first."""
+        self.cursor.execute(
+            """WITH tags (tag) AS (
+                SELECT tag FROM paper_tags UNION SELECT tag FROM tag_parents
+                UNION SELECT parent FROM tag_parents
+            ), subtags (ancestor, descendant) AS (
+                SELECT tag, tag FROM tags
+                UNION ALL SELECT ancestor, descendant FROM tag_closure
+            )
+            SELECT subtags.ancestor, COUNT(DISTINCT paper_tags.id) AS n
+            FROM subtags LEFT JOIN paper_tags ON paper_tags.tag = subtags.descendant
+            GROUP BY subtags.ancestor
+            ORDER BY n DESC, lower(subtags.ancestor);"""
+        )
+        return self.cursor.fetchall()
+
+    def get_tag_aliases(self):
+        """Get a dictionary mapping every tag alias to the tag it stands for."""
+        self.cursor.execute("SELECT alias, tag FROM tag_aliases ORDER BY alias;")
+        return dict(self.cursor.fetchall())
+
+    def set_tag_alias(self, alias, tag=None):
+        """Make `alias` stand for `tag`, or remove the alias if no tag is given."""
+        self.cursor.execute("DELETE FROM tag_aliases WHERE alias = ?;", (alias,))
+        if tag is None:
+            self.refresh_collections()
+            print(f"Removed the tag alias {alias}")
+            return
+
+        self.cursor.execute(
+            """SELECT 1 FROM paper_tags WHERE tag = ?
+            UNION SELECT 1 FROM tag_parents WHERE ? IN (tag, parent);""",
+            (alias, alias),
+        )
+        if self.cursor.fetchall():
+            raise XartaError(f"'{alias}' is already used as a tag.")
+        [tag] = self.resolve_tags([tag])
+        if tag == alias:
+            raise XartaError("A tag cannot be an alias of itself.")
+        self.cursor.execute(
+            "INSERT INTO tag_aliases (alias, tag) VALUES (?, ?);", (alias, tag)
+        )
+        self.refresh_collections()
+        print(f"{alias} now stands for the tag: {tag}")
+
+    def edit_tag_parents(self, parent, tags, action):
+        """Place `tags` below `parent` in the tag hierarchy, or with
+        action='remove' take them out from below it."""
+        [parent] = self.resolve_tags([parent])
+        pairs = [(tag, parent) for tag in self.resolve_tags(tags)]
+        if action == "add":
+            self.cursor.executemany(
+                "INSERT OR IGNORE INTO tag_parents (tag, parent) VALUES (?, ?);", pairs
+            )
+        elif action == "remove":
+            self.cursor.executemany(
+                "DELETE FROM tag_parents WHERE tag = ? AND parent = ?;", pairs
+            )
+        else:
+            raise XartaError(f"Unkown tag hierarchy action: {action}")
+        self.update_tag_closure()
+        self.refresh_collections()
+
+        below = "now" if action == "add" else "no longer"
+        for tag, _ in pairs:
+            print(f"{tag} is {below} below {parent}")
+
+    def update_tag_closure(self):
+        """Rebuild the closure table of the tag hierarchy from the parents of the
+        tags, after checking that no tag has become its own ancestor."""
+        self.cursor.execute("SELECT tag, parent FROM tag_parents;")
+        parents = {}
+        for tag, parent in self.cursor.fetchall():
+            parents.setdefault(tag, []).append(parent)
+
+        for tag in parents:
+            ancestors, stack = set(), list(parents[tag])
+            while stack:
+                parent = stack.pop()
+                if parent not in ancestors:
+                    ancestors.add(parent)
+                    stack.extend(parents.get(parent, []))
+            if tag in ancestors:
+                raise XartaError(
+                    f"The tag '{tag}' would be below itself in the hierarchy."
+                )
+
+        self.cursor.execute("DELETE FROM tag_closure;")
+        self.cursor.execute(
+            """INSERT INTO tag_closure (ancestor, descendant, depth)
+            WITH RECURSIVE closure (ancestor, descendant, depth) AS (
+                SELECT parent, tag, 1 FROM tag_parents
+                UNION
+                SELECT closure.ancestor, tag_parents.tag, closure.depth + 1
+                FROM closure JOIN tag_parents ON tag_parents.parent = closure.descendant
+            )
+            SELECT ancestor, descendant, MIN(depth) FROM closure
+            GROUP BY ancestor, descendant;"""
+        )
+
     def set_paper_alias(self, paper_id, alias):
         """Edit the alias of a paper in the database."""
 
         self.cursor.execute(
             "UPDATE papers SET alias = ? WHERE id = ?;", (alias, paper_id),
         )
+        self.update_collections([paper_id])
         if alias:
             print(f"{paper_id} is now aliased to: {alias}")
         else:
             print(f"Removed alias from {paper_id}")
 
     def rename_tag(self, old_tag, new_tag=None):
-        """Rename or remove a tag from every paper"""
-
-        matching_papers = self.query_papers(
-            None, None, None, None, [old_tag], None, silent=True, exact_tags=True
-        )
-        for paper in matching_papers:
+        """Rename or remove a tag from every paper. The tag keeps its place in the
+        tag hierarchy under its new name, or if it is removed, the tags below it
+        are moved up to its parents."""
+        [old_tag] = self.resolve_tags([old_tag])
+        if new_tag is not None:
+            [new_tag] = self.resolve_tags([new_tag])
+
+        self.cursor.execute("SELECT id FROM paper_tags WHERE tag = ?;", (old_tag,))
+        for (paper_id,) in self.cursor.fetchall():
             self.edit_paper_tags(
-                paper_id=paper[0], tags=[old_tag], action="remove", silent=True,
+                paper_id=paper_id, tags=[old_tag], action="remove", silent=True,
             )
             if new_tag is not None:
                 self.edit_paper_tags(
-                    paper_id=paper[0], tags=[new_tag], action="add", silent=True,
+                    paper_id=paper_id, tags=[new_tag], action="add", silent=True,
                 )
 
+        if new_tag is None:
+            self.cursor.execute(
+                """INSERT OR IGNORE INTO tag_parents (tag, parent)
+                SELECT children.tag, parents.parent
+                FROM tag_parents AS children JOIN tag_parents AS parents
+                ON children.parent = ? AND parents.tag = ?;""",
+                (old_tag, old_tag),
+            )
+            self.cursor.execute(
+                "DELETE FROM tag_parents WHERE ? IN (tag, parent);", (old_tag,)
+            )
+            self.cursor.execute("DELETE FROM tag_aliases WHERE tag = ?;", (old_tag,))
+        else:
+            # merged into any place the new tag already has in the hierarchy
+            for column in ("tag", "parent"):
+                self.cursor.execute(
+                    f"UPDATE OR IGNORE tag_parents SET {column} = ? WHERE {column} = ?;",
+                    (new_tag, old_tag),
+                )
+            self.cursor.execute(
+                "DELETE FROM tag_parents WHERE ? IN (tag, parent) OR tag = parent;",
+                (old_tag,),
+            )
+            self.cursor.execute(
+                "UPDATE tag_aliases SET tag = ? WHERE tag = ?;", (new_tag, old_tag)
+            )
+        self.update_tag_closure()
+        self.refresh_collections()
+
         if new_tag is None:
             print(f"All instances of the tag '{old_tag}' were removed")
         else:
@@ -206,8 +1157,8 @@ class PaperDatabase:
 
     def edit_paper_tags(self, paper_id, tags, action, silent=False):
         """Edit paper tags in database."""
-        # first: remove duplicates in tags
-        tags = list(set(tags))
+        # first: remove duplicates in tags, and replace aliases
+        tags = self.resolve_tags(tags)
 
         if action == "set":
             new_tags = tags
@@ -224,87 +1175,352 @@ class PaperDatabase:
             raise XartaError(f"Unkown tag editing action: {action}")
 
         new_tags.sort(key=str.lower)
+        self.set_paper_tags(paper_id, new_tags)
         new_tags = utils.list_to_string(new_tags)
         self.cursor.execute(
             f"""UPDATE papers SET tags = ?
                                 WHERE id = ?;""",
             (new_tags, paper_id),
         )
+        self.update_collections([paper_id])
+        self.update_tag_model([paper_id])
 
         if not silent:
             print(f"{paper_id} now has the following tags in the database: {new_tags}")
 
-    def get_bibtex_data(self, paper_id, force_refresh=False, insert_alias=False):
+    def get_bibtex_data(
+        self, paper_id, force_refresh=False, insert_alias=False, fetch=True
+    ):
         """Get bibtex data for a paper. If it is not in the database, try and download
-        it. The function can also insert an alias-field into the bibtex output
-        for biblAtex+biber citation-aliases. If insert_alias=True, exports with
-        an alias to the arxiv ID and to the paper's alias in the database (if it
-        has one)."""
+        it (unless fetch=False). The function can also insert an alias-field into
+        the bibtex output for biblAtex+biber citation-aliases. If
+        insert_alias=True, exports with an alias to the arxiv ID and to the
+        paper's alias in the database (if it has one)."""
 
         self.cursor.execute("SELECT bibtex_arxiv FROM papers WHERE id=?", (paper_id,))
         bibtex_arxiv = self.cursor.fetchall()[0][0]
 
-        if bibtex_arxiv == "" or force_refresh:
-            # get data from arxiv using the arxivcheck package
+        if fetch and (bibtex_arxiv == "" or force_refresh):
             print(f"Fetching arXiv bibtex for {paper_id}")
-            bib_info = check_arxiv_published(paper_id)
-            if bib_info[0]:
-                bibtex_arxiv = bib_info[2] + "\n"
-                self.cursor.execute(
-                    f"""UPDATE papers SET bibtex_arxiv = ?
-                                        WHERE id = ?;""",
-                    (bibtex_arxiv, paper_id),
-                )
+            fetched = providers.fetch_bibtex([paper_id], "arxiv")[paper_id]
+            self.store_fetched_bibtex(paper_id, "arxiv", fetched)
+            bibtex_arxiv = fetched or bibtex_arxiv
 
         self.cursor.execute("SELECT bibtex_inspire FROM papers WHERE id=?", (paper_id,))
         bibtex_inspire = self.cursor.fetchall()[0][0]
-        if bibtex_inspire == "" or force_refresh:
+        if fetch and (bibtex_inspire == "" or force_refresh):
             print("Fetching inspire bibtex for", paper_id)
-            # request data from inspire
-            # format should work for both old and new arxiv ids
-            url = f"https://inspirehep.net/api/arxiv/{paper_id}?format=bibtex"
-            response = requests.get(url)
-
-            try:
-                # Raise error if HTTPS error was returned
-                response.raise_for_status()
-                bibtex_inspire = response.text
+            bibtex_inspire = providers.fetch_bibtex([paper_id], "inspire")[paper_id]
+            if bibtex_inspire == "":
                 print("Inspire bibtex information not found.")
-            except requests.exceptions.HTTPError:
-                # For some reason the bibtex information was not found (the
-                # paper may only recently have appeared on the arXiv)
-                bibtex_inspire = ""
+            self.store_fetched_bibtex(paper_id, "inspire", bibtex_inspire)
 
+        if insert_alias:
+            ids = alias_ids(paper_id, self.get_alias(paper_id))
+            bibtex_arxiv = insert_ids_field(bibtex_arxiv, ids)
+            bibtex_inspire = insert_ids_field(bibtex_inspire, ids)
+
+        return (bibtex_arxiv, bibtex_inspire)
+
+    def add_pdf(self, paper_id, sha256, path, size, url):
+        """Record a locally stored pdf of a paper, replacing any previous one."""
+        self.cursor.execute("SELECT sha256, path FROM pdfs WHERE id = ?;", (paper_id,))
+        previous = self.cursor.fetchall()
+        self.cursor.execute(
+            "INSERT OR REPLACE INTO pdfs (id, sha256, path, size, url) VALUES (?, ?, ?, ?, ?);",
+            (paper_id, sha256, path, size, url),
+        )
+        self.release_pdfs(previous)
+
+    def release_pdfs(self, stored):
+        """Mark the files of the pdf store given as (sha256, path) tuples, which
+        papers have stopped using, to be removed after committing, unless another
+        paper has an identical pdf. Pdfs added from disk have absolute paths, and
+        are left where they are."""
+        for sha256, path in stored:
+            if os.path.isabs(path):
+                continue
             self.cursor.execute(
-                f"""UPDATE papers SET bibtex_inspire = ?
-                                    WHERE id = ?;""",
-                (bibtex_inspire, paper_id),
+                "SELECT 1 FROM pdfs WHERE sha256 = ? LIMIT 1;", (sha256,)
             )
+            if not self.cursor.fetchall():
+                self.unused_pdfs.append(path)
 
-        if insert_alias:
-
-            # paper_id might contain a slash (hep-ph/9....)
-            paper_id_str = paper_id.replace("/", "")
+    def remove_unused_pdfs(self):
+        """Remove the files of the pdf store that no paper uses any more."""
+        directory = utils.get_pdf_directory()
+        for path in self.unused_pdfs:
+            try:
+                os.remove(os.path.join(directory, path))
+            except FileNotFoundError:
+                pass
+        self.unused_pdfs = []
+
+    def get_pdf_hashes(self):
+        """Get a dictionary mapping the sha256 of every stored pdf to its paper."""
+        self.cursor.execute("SELECT sha256, id FROM pdfs;")
+        return dict(self.cursor.fetchall())
+
+    def add_tags(self, paper_tags):
+        """Add tags to many papers, given as a dictionary mapping paper ids to
+        lists of tags."""
+        for paper_id, tags in paper_tags.items():
+            tags = self.resolve_tags(self.get_tags(paper_id) + tags)
+            tags = sorted(filter(None, tags), key=str.lower)
+            self.set_paper_tags(paper_id, tags)
+            self.cursor.execute(
+                "UPDATE papers SET tags = ? WHERE id = ?;",
+                (utils.list_to_string(tags), paper_id),
+            )
+        self.update_collections(list(paper_tags))
+        self.update_tag_model(list(paper_tags))
+
+    def add_local_papers(self, papers, tags, alias=""):
+        """Add pdfs from the local disk, given as (scan, data, bibtex) tuples of
+        the result of local.scan_pdf, the metadata of the paper, and its bibtex
+        (from its DOI, or empty). The pdfs are recorded where they are."""
+        from .providers import LOCAL
+
+        for scan, data, bibtex in papers:
+            paper_id = LOCAL.format_ref(scan["sha256"][: LOCAL.digits])
+            self.insert_paper(paper_id, data, list(tags), alias)
+            path = os.path.abspath(scan["path"])
+            self.add_pdf(paper_id, scan["sha256"], path, scan["size"], "")
+            if bibtex:
+                self.set_bibtex(paper_id, "arxiv", bibtex)
+            print(f"{paper_id} added to database! ({data['title']})")
+        paper_ids = [
+            LOCAL.format_ref(scan["sha256"][: LOCAL.digits]) for scan, _, _ in papers
+        ]
+        self.update_collections(paper_ids)
+        self.update_tag_model(paper_ids)
+
+    def get_pdf_path(self, paper_id):
+        """Return the absolute path of the local pdf of a paper, or None if there is
+        no local copy (or it has since been removed from disk)."""
+        self.cursor.execute("SELECT path FROM pdfs WHERE id = ?;", (paper_id,))
+        results = self.cursor.fetchall()
+        if not results:
+            return None
+        # the paths of pdfs added from disk are absolute, and kept by the join
+        path = os.path.join(utils.get_pdf_directory(), results[0][0])
+        return path if os.path.isfile(path) else None
 
-            alias = self.get_alias(paper_id)
+    def set_bibtex(self, paper_id, source, bibtex):
+        """Store the bibtex of a paper from `source`, 'arxiv' or 'inspire'."""
+        self.cursor.execute(
+            f"UPDATE papers SET bibtex_{source} = ? WHERE id = ?;", (bibtex, paper_id)
+        )
 
-            # field to be added to bibtex entry after first newline
-            id_string = "    ids = {" + paper_id_str
-            if alias:
-                id_string += ", " + alias
-            id_string += "},\n"
+    def get_stored_bibtex(self, paper_ids):
+        """Get a dictionary mapping the given paper ids to their stored arxiv and
+        inspire bibtex, reading only those papers. A paper in several libraries
+        gets the bibtex of the first."""
+        stored = {}
+        for chunk in chunks(sorted(set(paper_ids)), SQL_VARIABLE_LIMIT):
+            placeholders = ", ".join("?" * len(chunk))
+            self.cursor.execute(
+                f"""SELECT id, bibtex_arxiv, bibtex_inspire FROM papers
+                WHERE id IN ({placeholders}) ORDER BY rowid;""",
+                chunk,
+            )
+            for paper_id, bibtex_arxiv, bibtex_inspire in self.cursor.fetchall():
+                stored.setdefault(paper_id, (bibtex_arxiv, bibtex_inspire))
+        return stored
+
+    def store_fetched_bibtex(self, paper_id, source, bibtex):
+        """Store bibtex downloaded from `source`, remembering if none was found. A
+        missing inspire entry is stored as empty, but a missing arxiv entry leaves
+        the old one in place."""
+        if bibtex or source == "inspire":
+            self.set_bibtex(paper_id, source, bibtex)
+        if bibtex:
+            self.cursor.execute(
+                "DELETE FROM missing_bibtex WHERE id = ? AND source = ?;",
+                (paper_id, source),
+            )
+        else:
+            self.cursor.execute(
+                "INSERT OR REPLACE INTO missing_bibtex (id, source) VALUES (?, ?);",
+                (paper_id, source),
+            )
 
-            if bibtex_arxiv != "":
-                i = bibtex_arxiv.find("\n")
-                bibtex_arxiv = bibtex_arxiv[: i + 1] + id_string + bibtex_arxiv[i + 1 :]
+    def get_bibtex_lookups(self, paper_ids=None, force_refresh=False):
+        """Return (paper id, source, needed) for the arxiv and inspire bibtex of
+        every paper, or only those in `paper_ids`, where `needed` is true if the
+        bibtex should be downloaded: if it is empty and was not looked up in vain
+        in the last MISSING_BIBTEX_RETRY_DAYS days, or if force_refresh is set.
+        The whole library is covered by a single query, and a selection of
+        papers by one query for every SQL_VARIABLE_LIMIT papers."""
+        if paper_ids is None:
+            selections = [[]]
+        else:
+            selections = chunks(sorted(set(paper_ids)), SQL_VARIABLE_LIMIT)
+        lookups = []
+        for chunk in selections:
+            where = ""
+            if paper_ids is not None:
+                where = f"WHERE papers.id IN ({', '.join('?' * len(chunk))})"
+            self.cursor.execute(
+                f"""SELECT papers.rowid, papers.id, sources.source, ? OR (
+                    CASE sources.source
+                        WHEN 'arxiv' THEN papers.bibtex_arxiv
+                        ELSE papers.bibtex_inspire
+                    END = ''
+                    AND IFNULL(missing_bibtex.checked < datetime('now', ?), 1)
+                )
+                FROM papers
+                CROSS JOIN (SELECT 'arxiv' AS source UNION ALL SELECT 'inspire')
+                    AS sources
+                LEFT JOIN missing_bibtex
+                    ON missing_bibtex.id = papers.id
+                    AND missing_bibtex.source = sources.source
+                {where};""",
+                [force_refresh, f"-{MISSING_BIBTEX_RETRY_DAYS} days"] + chunk,
+            )
+            lookups += self.cursor.fetchall()
+        # in the order the papers were added, arxiv first
+        return [lookup[1:] for lookup in sorted(lookups)]
 
-            if bibtex_inspire != "":
-                i = bibtex_inspire.find("\n")
-                bibtex_inspire = (
-                    bibtex_inspire[: i + 1] + id_string + bibtex_inspire[i + 1 :]
+    def fetch_bibtex(
+        self,
+        paper_ids=None,
+        force_refresh=False,
+        max_workers=None,
+        progress=False,
+        sources=("arxiv", "inspire"),
+    ):
+        """Download the bibtex of many papers (by default all of them) from
+        `sources` concurrently, skipping any that are already stored unless
+        force_refresh is set (see get_bibtex_lookups). Results are committed
+        every BIBTEX_CHECKPOINT entries. With progress=True a line is printed for
+        every entry. Returns the number of bibtex entries that were fetched."""
+
+        lookups = self.get_bibtex_lookups(paper_ids, force_refresh)
+        jobs = [
+            (paper_id, source)
+            for paper_id, source, needed in lookups
+            if needed and source in sources
+        ]
+
+        # entries that are already stored are the cache hits of the bibtex apis
+        papers = len(lookups) // 2
+        for source in sources:
+            misses = sum(job[1] == source for job in jobs)
+            metrics.record_cache(f"{source}-bibtex", papers - misses, misses)
+
+        if not jobs:
+            return 0
+
+        print(f"Fetching {len(jobs)} bibtex entries")
+        # papers of the same provider are looked up together where possible
+        batches = providers.bibtex_batches(jobs, INSPIRE_BATCH_SIZE)
+
+        fetched = n = 0
+        results = run_jobs(
+            lambda batch: providers.fetch_bibtex(batch[1], batch[0]),
+            batches,
+            max_workers=max_workers or DEFAULT_WORKERS,
+        )
+        for (source, paper_ids), bibtex, error in results:
+            if error is not None:
+                n += len(paper_ids)
+                print(f"[{n}/{len(jobs)}] {error}" if progress else error)
+                continue
+            for paper_id in paper_ids:
+                n += 1
+                self.store_fetched_bibtex(paper_id, source, bibtex[paper_id])
+                fetched += bool(bibtex[paper_id])
+                if progress:
+                    status = "fetched" if bibtex[paper_id] else "not found"
+                    print(f"[{n}/{len(jobs)}] {source} bibtex of {paper_id} {status}")
+                if n % BIBTEX_CHECKPOINT == 0:
+                    self.connection.commit()
+        return fetched
+
+    def fetch_citations(self, force_refresh=False, max_workers=None):
+        """Download the references of the papers whose references have not been
+        fetched yet (or all of them, with force_refresh) from INSPIRE in
+        batches, and store them in the citations table. Returns the number of
+        papers whose references were fetched."""
+        self.cursor.execute(
+            "SELECT id FROM papers WHERE ? OR id NOT IN (SELECT id FROM references_fetched);",
+            (force_refresh,),
+        )
+        paper_ids = [row[0] for row in self.cursor.fetchall()]
+        if not paper_ids:
+            return 0
+
+        print(f"Fetching the references of {len(paper_ids)} papers")
+        groups = providers.group_refs(paper_ids)
+        batches = [
+            [provider.format_ref(number) for number in batch]
+            for provider, numbers in groups.items()
+            for batch in chunks(numbers, INSPIRE_BATCH_SIZE)
+        ]
+        fetched = 0
+        results = run_jobs(
+            providers.fetch_inspire_references,
+            batches,
+            max_workers=max_workers or DEFAULT_WORKERS,
+        )
+        for batch, references, error in results:
+            if error is not None:
+                print(error)
+                continue
+            for paper_id in batch:
+                # papers unknown to inspire are recorded as citing nothing
+                cited = references.get(paper_id, [])
+                self.cursor.execute(
+                    "DELETE FROM citations WHERE citing = ?;", (paper_id,)
+                )
+                self.cursor.executemany(
+                    "INSERT OR IGNORE INTO citations (citing, cited) VALUES (?, ?);",
+                    [(paper_id, cited_id) for cited_id in cited],
                 )
+                self.cursor.execute(
+                    "INSERT OR REPLACE INTO references_fetched (id) VALUES (?);",
+                    (paper_id,),
+                )
+            fetched += len(batch)
+            self.connection.commit()
+        return fetched
+
+    def get_citation_neighbourhood(self, paper_id, depth=1, cited_by=False):
+        """Find the papers in the library that `paper_id` cites, directly or
+        through up to `depth` steps of citations between papers, or those that
+        cite it with cited_by=True. Returns a list of (id, hops) tuples, nearest
+        first."""
+        start, end = ("cited", "citing") if cited_by else ("citing", "cited")
+        self.cursor.execute(
+            f"""WITH RECURSIVE neighbourhood (id, hops) AS (
+                SELECT ?, 0
+                UNION
+                SELECT citations.{end}, neighbourhood.hops + 1
+                FROM neighbourhood
+                JOIN citations ON citations.{start} = neighbourhood.id
+                WHERE neighbourhood.hops < ?
+            )
+            SELECT neighbourhood.id, MIN(neighbourhood.hops) AS hops
+            FROM neighbourhood JOIN papers ON papers.id = neighbourhood.id
+            WHERE neighbourhood.id != ?
+            GROUP BY neighbourhood.id
+            ORDER BY hops, papers.rowid;""",
+            (paper_id, depth, paper_id),
+        )
+        return self.cursor.fetchall()
 
-        return (bibtex_arxiv, bibtex_inspire)
+    def get_most_cited(self):
+        """Count the citations of every paper in the library by other papers in
+        the library. Returns a list of (id, citations) tuples, most cited first."""
+        self.cursor.execute(
+            """SELECT citations.cited, COUNT(*) AS n FROM citations
+            JOIN papers AS citing ON citing.id = citations.citing
+            JOIN papers AS cited ON cited.id = citations.cited
+            GROUP BY citations.cited
+            ORDER BY n DESC, cited.rowid;"""
+        )
+        return self.cursor.fetchall()
 
     def get_all_papers(self):
         """Get all papers"""
@@ -312,6 +1528,17 @@ class PaperDatabase:
         self.cursor.execute(query_command)
         return self.cursor.fetchall()
 
+    def get_papers(self, paper_ids):
+        """Get the papers with the given ids, in the order they were added."""
+        rows = []
+        for chunk in chunks(list(paper_ids), SQL_VARIABLE_LIMIT):
+            placeholders = ", ".join("?" * len(chunk))
+            self.cursor.execute(
+                f"SELECT rowid, * FROM papers WHERE id IN ({placeholders});", chunk
+            )
+            rows += self.cursor.fetchall()
+        return [row[1:] for row in sorted(rows)]
+
     def print_all_papers(self, select=False):
         """Print a table of all the papers"""
         data = self.get_all_papers()
@@ -319,66 +1546,39 @@ class PaperDatabase:
         if select:
             return data
 
-    def query_papers(
-        self,
-        paper_id,
-        title,
-        author,
-        category,
-        tags,
-        filter_,
-        silent=False,
-        select=False,
-        exact_tags=False,
-    ):
-        """Function to search and filter paper database. Returns a list of
-        tuples and (if `silent` is False) prints a table to the screen. Search
-        parameters connected by a logical OR, thus:
-
-            db.query_papers_contains(paper_id=None, title=None,
-                                     author='Weinberg', category='hep-th',
-                                     tags=[])
-
-        will return every paper in the database from 'hep-th' as well as those
-        by 'Weinberg'. The exact_tags option determines how tag-matching is
-        done. If exact_tags=False, then a search for quarks will return both
-        papers tagged as quarks and leptoquarks.
-        """
+    def paper_matcher(self, paper_id, title, author, category, tags, filter_):
+        """Return a function telling whether a row of the papers table matches the
+        search criteria (see query_papers). Criteria needing the other tables,
+        such as authors and tags, are looked up here, once."""
 
         if filter_ is not None:
             # check if the provided filter is sanitary/safe.
             # throws errors with helpfull messages if not sanitary
             check_filter_is_sanitary(filter_, DATA_HEADERS)
 
-        library_data = self.get_all_papers()
-        data = []
-        for row in library_data:
-            row_dict = dict(zip(DATA_HEADERS, row))
-            if exact_tags:
-                # tags are currently a long, comma separated, string. using the
-                # "in" keyword searches the string. By converting it to a list of
-                # tags, the 'in' keyword will match only complete tags in the
-                # list.
-                row_dict["tags"] = string_to_list(row_dict["tags"])
+        if author is not None:
+            author_ids = self.find_papers_by_author(author)
+
+        if tags:
+            # tags starting with @ are the names of collections
+            names = [tag[1:] for tag in tags if tag.startswith("@")]
+            tag_ids = self.find_papers_by_tags(
+                [tag for tag in tags if not tag.startswith("@")]
+            )
+            tag_ids |= self.get_collection_papers(names)
 
+        def matches(row):
+            row_dict = dict(zip(DATA_HEADERS, row))
             if paper_id is not None and paper_id in row_dict["ref"]:
-                data.append(row)
-                continue
+                return True
             elif title is not None and title in row_dict["title"]:
-                data.append(row)
-                continue
-            elif author is not None and author in row_dict["authors"]:
-                data.append(row)
-                continue
+                return True
+            elif author is not None and self.paper_key(row) in author_ids:
+                return True
             elif category is not None and category in row_dict["category"]:
-                data.append(row)
-                continue
+                return True
             elif tags is not None and tags != []:
-                for tag in tags:
-                    if tag in row_dict["tags"]:
-                        data.append(row)
-                        break  # Don't include same paper twice
-                continue
+                return self.paper_key(row) in tag_ids
             elif filter_ is not None:
                 try:
                     # use a dict to define accesibe variables in the eval: even though
@@ -390,11 +1590,52 @@ class PaperDatabase:
                     for k in DATA_HEADERS:
                         eval_vars[k.capitalize()] = eval_vars[k]
                     # evaliate filter!
-                    if eval(filter_, eval_vars):
-                        data.append(row)
-                        continue
+                    return bool(eval(filter_, eval_vars))
                 except Exception:
                     raise XartaError("Error when evaluating filter.")
+            return False
+
+        return matches
+
+    def query_papers(
+        self,
+        paper_id,
+        title,
+        author,
+        category,
+        tags,
+        filter_,
+        silent=False,
+        select=False,
+    ):
+        """Function to search and filter paper database. Returns a list of
+        tuples and (if `silent` is False) prints a table to the screen. Search
+        parameters connected by a logical OR, thus:
+
+            db.query_papers_contains(paper_id=None, title=None,
+                                     author='Weinberg', category='hep-th',
+                                     tags=[])
+
+        will return every paper in the database from 'hep-th' as well as those
+        by 'Weinberg'. Tags match papers with the tag itself or any tag below it
+        in the tag hierarchy, so that a search for bsm also returns the papers
+        tagged as leptoquarks if leptoquarks is below bsm. Tags of the form
+        '@name' match the papers in the collection 'name'.
+        """
+
+        criteria = (paper_id, title, author, category, filter_)
+        if (
+            tags
+            and all(tag.startswith("@") for tag in tags)
+            and criteria == (None,) * 5
+        ):
+            # only collections, whose papers are looked up directly
+            data = self.get_collection_rows([tag[1:] for tag in tags])
+        else:
+            matches = self.paper_matcher(
+                paper_id, title, author, category, tags, filter_
+            )
+            data = [row for row in self.get_all_papers() if matches(row)]
 
         if not data:
             raise XartaError("No matching papers found!")
@@ -404,6 +1645,129 @@ class PaperDatabase:
 
         return data
 
+    def create_collection(self, name, query):
+        """Save the search criteria `query` (a dictionary of the keyword arguments
+        of query_papers) as the collection `name`, and find its papers. Returns
+        the number of papers found."""
+        if any(tag.startswith("@") for tag in query["tags"]):
+            raise XartaError("Collections cannot include other collections.")
+        self.cursor.execute("SELECT 1 FROM collections WHERE name = ?;", (name,))
+        if self.cursor.fetchall():
+            raise XartaError(f"The collection {name} already exists.")
+        self.cursor.execute(
+            "INSERT INTO collections (name, query) VALUES (?, ?);",
+            (name, json.dumps(query)),
+        )
+        self.refresh_collections([name])
+        return len(self.get_collection_papers([name]))
+
+    def delete_collection(self, name):
+        """Delete the collection `name` (but not its papers)."""
+        self.assert_collections_exist([name])
+        self.cursor.execute("DELETE FROM collections WHERE name = ?;", (name,))
+        self.cursor.execute("DELETE FROM collection_papers WHERE name = ?;", (name,))
+
+    def get_collections(self):
+        """Get a list of (name, query, number of papers) tuples of every
+        collection, where `query` is the dictionary it was created with."""
+        self.cursor.execute(
+            """SELECT collections.name, collections.query, COUNT(collection_papers.id)
+            FROM collections LEFT JOIN collection_papers
+            ON collection_papers.name = collections.name
+            GROUP BY collections.name ORDER BY collections.name;"""
+        )
+        return [
+            (name, json.loads(query), number)
+            for name, query, number in self.cursor.fetchall()
+        ]
+
+    def assert_collections_exist(self, names):
+        """Raise an error if any of the collections `names` does not exist."""
+        self.cursor.execute("SELECT name FROM collections;")
+        missing = set(names) - {row[0] for row in self.cursor.fetchall()}
+        if missing:
+            raise XartaError(f"No such collection: {', '.join(sorted(missing))}")
+
+    def get_collection_papers(self, names):
+        """Get the keys (see paper_key) of the papers in any of the collections
+        `names`."""
+        rows = self.get_collection_rows(names)
+        return {self.paper_key(row) for row in rows}
+
+    def get_collection_rows(self, names, columns="papers.*"):
+        """Get the rows of the papers table of the papers in any of the
+        collections `names`, in the order they were added."""
+        self.assert_collections_exist(names)
+        if not names:
+            return []
+        placeholders = ", ".join("?" * len(names))
+        # collections hold papers of this database, not of the other libraries
+        library = "AND papers.library = 'main'" if self.reading_libraries else ""
+        self.cursor.execute(
+            f"""SELECT {columns} FROM papers WHERE id IN (
+                SELECT id FROM collection_papers WHERE name IN ({placeholders})
+            ) {library} ORDER BY papers.rowid;""",
+            names,
+        )
+        return self.cursor.fetchall()
+
+    def refresh_collections(self, names=None):
+        """Find the papers of every collection again, or only of those in `names`,
+        e.g. after the tag hierarchy changed."""
+        for name, query in self.get_collection_queries(names):
+            matches = self.paper_matcher(**query)
+            self.cursor.execute(
+                "DELETE FROM collection_papers WHERE name = ?;", (name,)
+            )
+            self.cursor.executemany(
+                "INSERT INTO collection_papers (name, id) VALUES (?, ?);",
+                [(name, row[0]) for row in self.get_all_papers() if matches(row)],
+            )
+
+    def update_collections(self, paper_ids):
+        """Bring the collections up to date with changes to the given papers,
+        checking only those papers against each collection."""
+        queries = self.get_collection_queries()
+        if not queries:
+            return
+        rows = self.get_papers(paper_ids)
+        for name, query in queries:
+            matches = self.paper_matcher(**query)
+            self.cursor.executemany(
+                "DELETE FROM collection_papers WHERE name = ? AND id = ?;",
+                [(name, paper_id) for paper_id in paper_ids],
+            )
+            self.cursor.executemany(
+                "INSERT INTO collection_papers (name, id) VALUES (?, ?);",
+                [(name, row[0]) for row in rows if matches(row)],
+            )
+
+    def get_collection_queries(self, names=None):
+        """Get the (name, query) of every collection, or of those in `names`."""
+        self.cursor.execute("SELECT name, query FROM collections ORDER BY name;")
+        return [
+            (name, json.loads(query))
+            for name, query in self.cursor.fetchall()
+            if names is None or name in names
+        ]
+
+    def get_watched_papers(self):
+        """Get the ids of the papers reported by the watch command, forgetting
+        those reported more than WATCHED_PAPERS_DAYS ago."""
+        self.cursor.execute(
+            "DELETE FROM watched_papers WHERE reported < datetime('now', ?);",
+            (f"-{WATCHED_PAPERS_DAYS} days",),
+        )
+        self.cursor.execute("SELECT id FROM watched_papers;")
+        return {row[0] for row in self.cursor.fetchall()}
+
+    def add_watched_papers(self, paper_ids):
+        """Record that the watch command reported the given papers."""
+        self.cursor.executemany(
+            "INSERT OR IGNORE INTO watched_papers (id) VALUES (?);",
+            [(paper_id,) for paper_id in paper_ids],
+        )
+
     def contains(self, ref):
         """Returns a boolean identifying if an entry with reference `ref`
         exists within the database.
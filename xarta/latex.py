@@ -0,0 +1,69 @@
+"""Citation keys used by a LaTeX project, for `xarta export --cited-in`.
+
+Keys are read from the .aux files written by LaTeX (\\citation{...} for bibtex,
+\\abx@aux@cite for biblatex), the .bcf files written by biblatex for biber, and
+the \\cite commands (\\cite, \\citep, \\autocite, \\nocite, ...) of .tex
+sources. Files are scanned as bytes with a memory map, so large projects are
+read without being decoded or split into lines.
+"""
+
+import mmap
+import os
+import re
+
+
+# a citation command with up to two optional arguments, e.g. \citep[see][p. 2]{a,b}
+TEX_CITATIONS = re.compile(
+    rb"\\[A-Za-z]*cite[A-Za-z]*\*?\s*(?:\[[^\]]*\]\s*){0,2}\{([^}]*)\}"
+)
+AUX_CITATIONS = re.compile(
+    rb"\\citation\{([^}]*)\}|\\abx@aux@cite(?:\{[^}]*\})?\{([^}]*)\}"
+)
+BCF_CITATIONS = re.compile(rb"<bcf:citekey[^>]*>([^<]*)</bcf:citekey>")
+
+PATTERNS = {".tex": TEX_CITATIONS, ".aux": AUX_CITATIONS, ".bcf": BCF_CITATIONS}
+
+
+def scan_file(path, pattern):
+    """Yield the citation keys matched by `pattern` in the file at `path`."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for match in pattern.finditer(data):
+                for group in match.groups():
+                    if group is None:
+                        continue
+                    for key in group.split(b","):
+                        key = key.strip()
+                        if key:
+                            yield key.decode("utf-8", errors="replace")
+
+
+def find_project_files(path):
+    """The .aux, .bcf and .tex files in the directory `path` and below."""
+    files = []
+    for directory, subdirectories, names in os.walk(path):
+        subdirectories[:] = [d for d in subdirectories if not d.startswith(".")]
+        for name in sorted(names):
+            if os.path.splitext(name)[1] in PATTERNS:
+                files.append(os.path.join(directory, name))
+    return files
+
+
+def get_cited_keys(path):
+    """The citation keys used in the file at `path`, or in all the LaTeX files of
+    a project if it is a directory, in the order they are first cited. The key
+    '*' of \\nocite{*} is included as is."""
+    if os.path.isdir(path):
+        files = find_project_files(path)
+    else:
+        files = [path]
+
+    keys = {}
+    for file in files:
+        # an unknown extension is scanned as LaTeX source
+        pattern = PATTERNS.get(os.path.splitext(file)[1], TEX_CITATIONS)
+        for key in scan_file(file, pattern):
+            keys.setdefault(key, None)
+    return list(keys)
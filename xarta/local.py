@@ -0,0 +1,112 @@
+"""Pdfs added to the library from the local disk, for `xarta add local`.
+
+Every pdf is identified by the sha256 of its contents, so that the same file is
+only added once wherever it is on disk. Pdfs are left where they are. Metadata
+is taken from the DOI of the paper if it is known (given on the command line,
+or found in the metadata of the pdf), and otherwise from the title and author
+of the pdf, or its file name.
+"""
+
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from .network import hash_file
+
+
+# only the beginning and end of a pdf are searched for its metadata, which is
+# usually stored uncompressed in one of them
+METADATA_BYTES = 1 << 20
+
+DOI_PATTERN = re.compile(
+    rb"\b(?:doi|DOI)\s*[:=/>\s]\s*(10\.\d{4,9}/[^\s\"'<>()\[\]{}]+)"
+)
+INFO_PATTERN = re.compile(rb"/(Title|Author)\s*\(((?:[^()\\]|\\.)*)\)")
+
+
+def decode_pdf_string(raw):
+    """Decode a literal string of a pdf: utf-16 with a byte order mark, or (close
+    enough to) latin-1, with backslash escapes."""
+    raw = re.sub(rb"\\([()\\])", rb"\1", raw)
+    if raw.startswith(b"\xfe\xff"):
+        return raw[2:].decode("utf-16-be", errors="replace")
+    return raw.decode("latin-1")
+
+
+def read_pdf_metadata(data):
+    """Find the DOI, title and author in the metadata of a pdf, given its bytes
+    (e.g. a memory map). Values that are not found are empty strings."""
+    size = len(data)
+    head = data[: min(size, METADATA_BYTES)]
+    tail = data[max(0, size - METADATA_BYTES) :] if size > METADATA_BYTES else b""
+
+    metadata = {"doi": "", "title": "", "author": ""}
+    for chunk in (head, tail):
+        match = DOI_PATTERN.search(chunk)
+        if match and not metadata["doi"]:
+            metadata["doi"] = (
+                match.group(1).decode("ascii", errors="ignore").rstrip(".")
+            )
+        for key, value in INFO_PATTERN.findall(chunk):
+            key = key.decode().lower()
+            if not metadata[key]:
+                metadata[key] = " ".join(decode_pdf_string(value).split())
+    return metadata
+
+
+def scan_pdf(path):
+    """Hash a pdf and read its metadata. Run in worker processes, so returns a
+    plain dictionary."""
+    sha256 = hash_file(path).hexdigest()
+    size = os.path.getsize(path)
+    metadata = {"doi": "", "title": "", "author": ""}
+    if size:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[:5] == b"%PDF-":
+                    metadata = read_pdf_metadata(data)
+    return {"path": path, "sha256": sha256, "size": size, **metadata}
+
+
+def find_pdfs(path):
+    """The pdfs in the directory `path` and below, or `path` itself if it is a
+    file."""
+    if not os.path.isdir(path):
+        return [path]
+    pdfs = []
+    for directory, subdirectories, names in os.walk(path):
+        subdirectories[:] = [d for d in subdirectories if not d.startswith(".")]
+        for name in sorted(names):
+            if name.lower().endswith(".pdf"):
+                pdfs.append(os.path.join(directory, name))
+    return pdfs
+
+
+def scan_pdfs(paths, max_workers=None):
+    """Hash and read the metadata of many pdfs in parallel worker processes,
+    yielding the results in the order of `paths`."""
+    if len(paths) == 1:
+        yield scan_pdf(paths[0])
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(scan_pdf, paths, chunksize=4)
+
+
+def get_metadata(scan):
+    """Metadata of a pdf for the database, from the metadata found in the file."""
+    title = scan["title"]
+    if not title:
+        title = os.path.splitext(os.path.basename(scan["path"]))[0]
+        title = " ".join(title.replace("_", " ").split())
+    authors = re.split(r";|\band\b", scan["author"])
+    # commas separate names, unless they are of the form 'Surname, Forename'
+    if len(authors) == 1 and all(" " in a.strip() for a in authors[0].split(",")):
+        authors = authors[0].split(",")
+    return {
+        "id": scan["sha256"],
+        "title": title,
+        "authors": [author.strip() for author in authors if author.strip()],
+        "category": "local",
+        "abstract": "",
+    }
@@ -0,0 +1,157 @@
+"""Metrics of the requests made to remote services, for `xarta stats network`.
+
+Every request (and every lookup of data that may be stored locally instead of
+fetched, such as bibtex) is appended as one JSON object per line to the
+'metrics_file' from the config file, by default 'network-metrics.jsonl' in the
+state directory. Setting 'metrics_file' to 'off' disables the metrics. Lines
+are written whole in append mode, so concurrent xarta processes can share the
+file. Once the file grows past MAX_METRICS_BYTES it is moved to '<file>.1',
+replacing the previous one, so at most two files' worth of metrics are kept.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+
+from .utils import get_config_option, get_state_directory
+
+
+# upper bounds, in seconds, of the buckets of the latency histograms
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1, 2, 5, 10, float("inf")]
+
+# size at which the metrics file is rotated
+MAX_METRICS_BYTES = 5 * 1024 * 1024
+
+_lock = threading.Lock()
+
+
+def get_metrics_path():
+    """The file metrics are written to, or None if they are disabled."""
+    path = get_config_option("metrics_file", None)
+    if path is None:
+        return os.path.join(get_state_directory(), "network-metrics.jsonl")
+    if path.lower() in ("", "off", "none", "false"):
+        return None
+    return os.path.expanduser(path)
+
+
+def record(event, **fields):
+    """Append an event to the metrics file."""
+    path = get_metrics_path()
+    if path is None:
+        return
+    line = json.dumps({"time": round(time.time(), 3), "event": event, **fields})
+    with _lock:
+        with open(path, "a") as f:
+            f.write(line + "\n")
+            size = f.tell()
+        if size > MAX_METRICS_BYTES:
+            # another process may rotate at the same time, which only loses the
+            # older of the two files
+            try:
+                os.replace(path, path + ".1")
+            except OSError:
+                pass
+
+
+def record_request(endpoint, host, status, seconds, wait, attempt, error=None):
+    """Record a request to `endpoint` (a name for the service, e.g.
+    'inspire-bibtex') that got the HTTP `status` (None if it failed to connect)
+    after `seconds`, having waited `wait` seconds for the rate limiter. Attempts
+    after the first are retries."""
+    record(
+        "request",
+        endpoint=endpoint,
+        host=host,
+        status=status,
+        seconds=round(seconds, 4),
+        wait=round(wait, 4),
+        attempt=attempt,
+        error=error,
+    )
+
+
+def record_cache(endpoint, hits, misses):
+    """Record that data from `endpoint` was found stored locally `hits` times, and
+    had to be fetched `misses` times."""
+    if hits or misses:
+        record("cache", endpoint=endpoint, hits=hits, misses=misses)
+
+
+def read_events(path, since=None):
+    """Read the events in the metrics file and the file it was last rotated to,
+    optionally only those since the unix time `since`. Lines that cannot be
+    parsed (e.g. one being written) are skipped."""
+    events = []
+    for name in [path + ".1", path]:
+        if not os.path.isfile(name):
+            continue
+        with open(name) as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if since is None or event.get("time", 0) >= since:
+                    events.append(event)
+    return events
+
+
+def is_failure(event):
+    """Whether a request failed, i.e., did not connect, or the server refused it
+    or had an error. A 404 is an answer (e.g. INSPIRE does not know a paper)."""
+    status = event.get("status")
+    return status is None or status == 429 or status >= 500
+
+
+def percentile(values, fraction):
+    """The value below which `fraction` of the sorted `values` lie."""
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def summarise(events):
+    """Summarise events per endpoint. Returns a dictionary mapping endpoints to
+    dictionaries of counters, latency percentiles, the counts of status codes,
+    and the counts of latencies in each of LATENCY_BUCKETS."""
+    summaries = {}
+    for event in events:
+        endpoint = event.get("endpoint") or "unknown"
+        summary = summaries.setdefault(
+            endpoint,
+            {
+                "requests": 0,
+                "failed": 0,
+                "retried": 0,
+                "cache_hits": 0,
+                "cache_misses": 0,
+                "wait": 0.0,
+                "latencies": [],
+                "statuses": {},
+            },
+        )
+        if event.get("event") == "cache":
+            summary["cache_hits"] += event.get("hits", 0)
+            summary["cache_misses"] += event.get("misses", 0)
+        elif event.get("event") == "request":
+            summary["requests"] += 1
+            summary["failed"] += is_failure(event)
+            summary["retried"] += event.get("attempt", 0) > 0
+            summary["wait"] += event.get("wait", 0.0)
+            summary["latencies"].append(event.get("seconds", 0.0))
+            status = str(event.get("status") or "error")
+            summary["statuses"][status] = summary["statuses"].get(status, 0) + 1
+
+    for summary in summaries.values():
+        latencies = sorted(summary.pop("latencies"))
+        histogram = [0] * len(LATENCY_BUCKETS)
+        for latency in latencies:
+            histogram[bisect.bisect_right(LATENCY_BUCKETS, latency)] += 1
+        summary["histogram"] = histogram
+        summary["total_seconds"] = sum(latencies)
+        if latencies:
+            summary["p50"] = percentile(latencies, 0.5)
+            summary["p95"] = percentile(latencies, 0.95)
+            summary["max"] = latencies[-1]
+    return summaries
@@ -0,0 +1,62 @@
+"""MinHash signatures and locality sensitive hashing of paper texts.
+
+The fraction of equal entries in the signatures of two papers estimates the
+Jaccard similarity of their sets of words. Signatures are cut into bands, and
+papers sharing the hash of any band are candidates for being similar, so that
+similar papers are found without comparing every pair.
+"""
+
+import zlib
+
+import numpy as np
+
+from .text import tokenise
+
+
+NUM_PERMUTATIONS = 64
+# with 32 bands of 2 rows, papers with a similarity of about 0.2 have an even
+# chance of becoming candidates, and those above 0.5 almost always do
+BANDS = 32
+ROWS = NUM_PERMUTATIONS // BANDS
+
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# the same permutations must be used every time, so they come from a fixed seed
+_generator = np.random.RandomState(1)
+_A = _generator.randint(1, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _generator.randint(0, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def signature(text):
+    """Return the MinHash signature of the set of words in `text`, or None if
+    there are no words."""
+    words = set(tokenise(text))
+    if not words:
+        return None
+    hashes = np.array(
+        [zlib.crc32(word.encode("utf-8")) for word in words], dtype=np.uint64
+    )
+    # uint64 arithmetic wraps around on overflow, which is fine for hashing
+    permuted = ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME) & _MAX_HASH
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def band_buckets(sig):
+    """Return the bucket of each band of a signature."""
+    return [
+        zlib.crc32(sig[band * ROWS : (band + 1) * ROWS].tobytes())
+        for band in range(BANDS)
+    ]
+
+
+def to_blob(sig):
+    return sig.astype("<u4").tobytes()
+
+
+def from_blob(blob):
+    return np.frombuffer(blob, dtype="<u4")
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the papers with the given signatures."""
+    return float(np.mean(sig_a == sig_b))
@@ -0,0 +1,235 @@
+"""Network helpers: rate limited requests shared across processes, concurrent
+jobs, and resumable downloads.
+
+Every request to a remote service should go through `get` (or call `acquire`
+first, for requests made by other libraries), so that all of xarta's traffic,
+including that of other xarta processes running at the same time, stays within
+the limits of each host.
+"""
+
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+
+from . import metrics, profiling
+from .utils import XartaError, get_state_directory
+
+
+# token bucket parameters for each host: the sustained number of requests per
+# second, and the number of requests that may be made in a burst. arXiv asks for
+# at most one request every three seconds to its api, INSPIRE allows 15
+# requests in every 5 second window.
+RATE_LIMITS = {
+    "export.arxiv.org": (1 / 3, 1),
+    "arxiv.org": (1.0, 4),
+    "inspirehep.net": (3.0, 15),
+    "cds.cern.ch": (1.0, 4),
+    "doi.org": (2.0, 5),
+}
+# hosts that are not listed (e.g. a local mirror) are not rate limited
+DEFAULT_RATE_LIMIT = None
+
+# responses that mean "slow down", and are retried after waiting
+RETRY_STATUS_CODES = {429, 503}
+MAX_RETRIES = 3
+
+# number of jobs run in parallel by default, e.g. when fetching bibtex
+DEFAULT_WORKERS = 4
+
+# size of the chunks streamed to disk, and of those of a file fed to the hash
+# function at once
+CHUNK_SIZE = 1 << 16
+HASH_CHUNK_SIZE = 1 << 22
+
+_thread_lock = threading.Lock()
+
+
+def get_host(url):
+    return urlsplit(url).hostname or ""
+
+
+class RateLimiter:
+    """Token buckets for every host, stored in a file so that concurrent xarta
+    processes share them. The file is locked while a bucket is updated.
+
+    A caller takes a token if one is available. Otherwise it takes one anyway,
+    leaving the bucket in debt, and sleeps until the token would have been
+    refilled, so that waiting callers are served in order."""
+
+    def __init__(self, path, limits=None):
+        self.path = path
+        self.limits = RATE_LIMITS if limits is None else limits
+
+    def acquire(self, url):
+        """Block until a request to the host of `url` is allowed. Returns the
+        number of seconds spent waiting."""
+        host = get_host(url)
+        limit = self.limits.get(host, DEFAULT_RATE_LIMIT)
+        if limit is None:
+            return 0.0
+        rate, burst = limit
+
+        with _thread_lock, open(self.path + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            buckets = self._read()
+            now = time.time()
+            tokens, updated = buckets.get(host, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate) - 1
+            buckets[host] = (tokens, now)
+            self._write(buckets)
+
+        if tokens < 0:
+            time.sleep(-tokens / rate)
+            profiling.record_rate_limit_wait(-tokens / rate)
+            return -tokens / rate
+        return 0.0
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, buckets):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(buckets, f)
+        os.replace(tmp_path, self.path)
+
+
+_limiter = None
+
+
+def get_rate_limiter():
+    """The rate limiter shared by everything in this process."""
+    global _limiter
+    if _limiter is None:
+        _limiter = RateLimiter(os.path.join(get_state_directory(), "rate-limits.json"))
+    return _limiter
+
+
+def acquire(url):
+    """Wait until a request to `url` is allowed, returning the seconds waited.
+    Only needed for requests that do not go through `get`, e.g. those made by
+    other packages."""
+    return get_rate_limiter().acquire(url)
+
+
+def record_request(url, endpoint, status, seconds, wait=0.0, attempt=0, error=None):
+    """Record a request in the metrics log and the profile. `endpoint` names the
+    service (by default the host of `url`) and `status` is None if the request
+    failed to connect. Also used for requests made by other packages."""
+    host = get_host(url)
+    profiling.record_request(host, status or "error", seconds)
+    metrics.record_request(
+        endpoint or host, host, status, seconds, wait, attempt, error
+    )
+
+
+def get(url, timeout=30, endpoint=None, **kwargs):
+    """Rate limited requests.get. Requests the server rejects for being too
+    frequent are retried after the delay it asks for (or an increasing delay if
+    it does not say). Connection errors are raised as XartaErrors; the caller
+    is responsible for checking the status of the response. Every attempt is
+    recorded in the metrics under `endpoint`."""
+    for attempt in range(MAX_RETRIES + 1):
+        wait = acquire(url)
+        start = time.perf_counter()
+        try:
+            response = requests.get(url, timeout=timeout, **kwargs)
+        except requests.exceptions.RequestException as err:
+            seconds = time.perf_counter() - start
+            record_request(url, endpoint, None, seconds, wait, attempt, str(err))
+            raise XartaError(f"Could not connect to {get_host(url)}: {err}")
+        seconds = time.perf_counter() - start
+        record_request(url, endpoint, response.status_code, seconds, wait, attempt)
+
+        if response.status_code not in RETRY_STATUS_CODES or attempt == MAX_RETRIES:
+            return response
+
+        retry_after = response.headers.get("Retry-After", "")
+        delay = int(retry_after) if retry_after.isdigit() else 2 ** (attempt + 1)
+        response.close()
+        time.sleep(delay)
+
+
+def run_jobs(function, items, max_workers=DEFAULT_WORKERS):
+    """Call `function` on every item using a pool of threads, yielding (item,
+    result, error) tuples as the jobs finish. `error` is the XartaError raised by
+    a failed job (and `result` None), so that one failure does not stop the
+    others. Rate limits are respected as long as `function` uses `get`."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(function, item): item for item in items}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except XartaError as err:
+                yield futures[future], None, err
+
+
+def hash_file(path, hasher=None):
+    """Return a sha256 object updated with the contents of the file at `path`.
+    The file is memory mapped and hashed in chunks, so that large files are
+    neither read into memory at once nor copied chunk by chunk."""
+    hasher = hasher or hashlib.sha256()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return hasher
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            view = memoryview(data)
+            try:
+                for start in range(0, size, HASH_CHUNK_SIZE):
+                    hasher.update(view[start : start + HASH_CHUNK_SIZE])
+            finally:
+                view.release()
+    return hasher
+
+
+def download_file(url, partial_path, timeout=30, endpoint=None):
+    """Download `url` into `partial_path`, resuming from the bytes already present
+    in that file with an HTTP range request. Servers that ignore the range
+    header send the whole file, in which case the download starts over. Returns
+    the sha256 hex digest and size of the complete file."""
+
+    offset = os.path.getsize(partial_path) if os.path.isfile(partial_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    response = get(
+        url, headers=headers, stream=True, timeout=timeout, endpoint=endpoint
+    )
+
+    with response:
+        if response.status_code == 416 and offset:
+            # requested range starts at the end of the file: nothing left to get
+            hasher = hash_file(partial_path)
+            return hasher.hexdigest(), offset
+
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as err:
+            raise XartaError(f"Could not download {url}: {err}")
+
+        if response.status_code == 206:
+            # continue from where we stopped, hashing what we already have
+            hasher = hash_file(partial_path)
+            mode = "ab"
+        else:
+            hasher = hashlib.sha256()
+            mode = "wb"
+
+        with open(partial_path, mode) as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+                hasher.update(chunk)
+
+    return hasher.hexdigest(), os.path.getsize(partial_path)
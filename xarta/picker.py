@@ -0,0 +1,188 @@
+"""An interactive fuzzy picker, filtering a list as the user types.
+
+All items are folded to lowercase ascii and concatenated into one array of
+bytes. For every character, the sorted positions at which it occurs in that
+array are computed once, so that finding the next occurrence of a character
+after some position, for every remaining item at once, is a single
+`searchsorted`. Typing a character only extends the matches of the previous
+query, so each keystroke costs about one vectorised pass over the items that
+still match.
+"""
+
+import curses
+
+import numpy as np
+
+from .text import normalise_text
+
+
+class FuzzyMatches:
+    """The items matching a query, with the span of the match of the last term of
+    the query (or None if the query ends with a space) and the accumulated span
+    of all previous terms."""
+
+    def __init__(self, indices, term_start, term_end, span):
+        self.indices = indices
+        self.term_start = term_start
+        self.term_end = term_end
+        self.span = span
+        self._ranked = None
+
+    def ranked(self):
+        """Indices of the matching items, most compact matches first."""
+        if self._ranked is None:
+            span = self.span
+            if self.term_start is not None:
+                span = span + (self.term_end - self.term_start)
+            # stable sorts of 16 bit integers are radix sorts, which are much
+            # faster than comparison sorts for large numbers of matches
+            span = np.minimum(span, 0xFFFF).astype(np.uint16)
+            self._ranked = self.indices[np.argsort(span, kind="stable")]
+        return self._ranked
+
+
+class FuzzyIndex:
+    """Index for fuzzy matching: an item matches a query if every space separated
+    term of the query appears in the item as a subsequence, e.g. 'wnbrg' matches
+    'Weinberg'."""
+
+    def __init__(self, strings):
+        texts = [normalise_text(s).replace("\n", " ") for s in strings]
+        joined = "\n".join(texts).encode("ascii", "replace")
+        self.text = np.frombuffer(joined, dtype=np.uint8)
+        lengths = np.array([len(text) for text in texts], dtype=np.int64)
+        self.starts = np.concatenate([[0], np.cumsum(lengths + 1)[:-1]]).astype(
+            np.int64
+        )
+        self.ends = self.starts + lengths
+
+        # positions of every character, grouped by character, in one (radix) sort
+        order = np.argsort(self.text, kind="stable")
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(self.text, minlength=128))])
+        self.positions = [
+            np.append(order[bounds[code] : bounds[code + 1]], len(self.text))
+            for code in range(128)
+        ]
+
+        everything = np.arange(len(texts))
+        span = np.zeros(len(texts), dtype=np.int64)
+        self.cache = {"": FuzzyMatches(everything, None, None, span)}
+
+    def _positions(self, char):
+        """Sorted positions of a character in the text, with a sentinel at the end."""
+        return self.positions[ord(char) if ord(char) < 128 else ord("?")]
+
+    def _extend(self, matches, char):
+        """The matches of a query extended by one character."""
+        if char == " ":
+            if matches.term_start is None:
+                return matches
+            span = matches.span + (matches.term_end - matches.term_start)
+            return FuzzyMatches(matches.indices, None, None, span)
+
+        positions = self._positions(char)
+        if matches.term_end is None:
+            after = self.starts[matches.indices]
+        else:
+            after = matches.term_end + 1
+        following = positions[np.searchsorted(positions, after)]
+        found = following < self.ends[matches.indices]
+
+        term_start = following if matches.term_start is None else matches.term_start
+        return FuzzyMatches(
+            matches.indices[found],
+            term_start[found],
+            following[found],
+            matches.span[found],
+        )
+
+    def search(self, query):
+        """Return the indices of the items matching `query`, best matches first."""
+        query = normalise_text(query)
+
+        # start from the longest query already answered, usually the one before
+        # the last keystroke
+        prefix = query
+        while prefix not in self.cache:
+            prefix = prefix[:-1]
+        matches = self.cache[prefix]
+        for i in range(len(prefix), len(query)):
+            matches = self._extend(matches, query[i])
+            self.cache[query[: i + 1]] = matches
+
+        # forget queries that the user has deleted
+        if len(self.cache) > 64:
+            self.cache = {q: m for q, m in self.cache.items() if query.startswith(q)}
+
+        return matches.ranked()
+
+
+def pick(lines, haystacks, prompt="> "):
+    """Let the user choose one of `lines` by typing to filter them, matching
+    against the corresponding `haystacks`. Returns the index of the chosen line,
+    or None if the user aborted."""
+    index = FuzzyIndex(haystacks)
+    return curses.wrapper(_pick, lines, index, prompt)
+
+
+def _pick(screen, lines, index, prompt):
+    curses.use_default_colors()
+    if hasattr(curses, "set_escdelay"):
+        # escape aborts, don't wait a second to see if it starts a key sequence
+        curses.set_escdelay(25)
+    query = ""
+    selected = 0
+    ranked = index.search(query)
+
+    while True:
+        height, width = screen.getmaxyx()
+        rows = height - 1
+        selected = max(0, min(selected, len(ranked) - 1))
+        # scroll so that the selected line is visible
+        top = max(0, selected - rows + 1)
+
+        screen.erase()
+        for row, i in enumerate(ranked[top : top + rows]):
+            attribute = curses.A_REVERSE if top + row == selected else curses.A_NORMAL
+            screen.addnstr(row, 0, lines[i], width - 1, attribute)
+        status = f"{prompt}{query}"
+        count = f" {len(ranked)}/{len(lines)}"
+        screen.addnstr(
+            rows, 0, status + count.rjust(width - len(status) - 1), width - 1
+        )
+        screen.move(rows, min(len(status), width - 1))
+        screen.refresh()
+
+        try:
+            key = screen.get_wch()
+        except KeyboardInterrupt:
+            return None
+
+        if key in ("\n", "\r", curses.KEY_ENTER):
+            return int(ranked[selected]) if len(ranked) else None
+        elif key in ("\x1b", "\x03", "\x07"):
+            # escape, ctrl-c, ctrl-g
+            return None
+        elif key in (curses.KEY_UP, "\x10", "\x0b"):
+            # up, ctrl-p, ctrl-k
+            selected -= 1
+        elif key in (curses.KEY_DOWN, "\x0e"):
+            # down, ctrl-n
+            selected += 1
+        elif key == curses.KEY_NPAGE:
+            selected += rows
+        elif key == curses.KEY_PPAGE:
+            selected -= rows
+        elif key in (curses.KEY_BACKSPACE, "\x7f", "\x08"):
+            query = query[:-1]
+            ranked = index.search(query)
+            selected = 0
+        elif key == "\x15":
+            # ctrl-u
+            query = ""
+            ranked = index.search(query)
+            selected = 0
+        elif isinstance(key, str) and key.isprintable():
+            query += key
+            ranked = index.search(query)
+            selected = 0
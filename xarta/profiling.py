@@ -0,0 +1,212 @@
+"""Optional timing of what a command spends its time on.
+
+Profiling is enabled by the --profile option, or by setting the XARTA_PROFILE
+environment variable to 1. Either may instead name a file (--profile=<file>,
+XARTA_PROFILE=<file>) to also write cProfile statistics to, for use with
+pstats or snakeviz. A summary of the phases of the command, the SQL statements
+and the HTTP requests is printed to stderr when the command finishes.
+
+When profiling is disabled every hook returns straight away, and database
+cursors are not wrapped at all.
+"""
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+# measured from the moment xarta starts being imported
+STARTED = time.perf_counter()
+
+PROFILE_OPTION = "--profile"
+
+
+def read_settings(argv, environ):
+    """Return whether profiling is enabled, and the file to write cProfile
+    statistics to (or None), from the command line and environment."""
+    for arg in argv[1:]:
+        if arg == PROFILE_OPTION:
+            return True, None
+        if arg.startswith(PROFILE_OPTION + "="):
+            return True, arg.split("=", 1)[1]
+
+    setting = environ.get("XARTA_PROFILE", "")
+    if setting.lower() in ("", "0", "false", "no"):
+        return False, None
+    if setting.lower() in ("1", "true", "yes"):
+        return True, None
+    return True, setting
+
+
+def remove_option(argv):
+    """The command line without the --profile option, which docopt does not know
+    about."""
+    return [
+        arg
+        for arg in argv
+        if arg != PROFILE_OPTION and not arg.startswith(PROFILE_OPTION + "=")
+    ]
+
+
+ENABLED, STATS_FILE = read_settings(sys.argv, os.environ)
+
+_lock = threading.Lock()
+# [name, depth, seconds] for every phase, in the order they started
+_phases = []
+_depth = 0
+# (statement, seconds) for every SQL statement
+_statements = []
+# (host, status, seconds) for every HTTP request
+_requests = []
+_rate_limit_wait = 0.0
+
+
+@contextmanager
+def phase(name):
+    """Time the code in the with block as a phase of the command. Phases may be
+    nested."""
+    global _depth
+    if not ENABLED:
+        yield
+        return
+
+    entry = [name, _depth, None]
+    _phases.append(entry)
+    _depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry[2] = time.perf_counter() - start
+        _depth -= 1
+
+
+def record_request(host, status, seconds):
+    """Record an HTTP request (which may be made from any thread)."""
+    if ENABLED:
+        with _lock:
+            _requests.append((host, status, seconds))
+
+
+def record_rate_limit_wait(seconds):
+    """Record time spent waiting for the rate limiter."""
+    global _rate_limit_wait
+    if ENABLED:
+        with _lock:
+            _rate_limit_wait += seconds
+
+
+class ProfiledCursor:
+    """Wraps an sqlite3 cursor, timing the statements executed with it. The time
+    to fetch the results is added to that of the statement, as sqlite only runs
+    a query as its rows are fetched."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        # position in _statements of the last statement executed
+        self._index = None
+
+    def _timed(self, function, *args):
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            if self._index is not None:
+                statement, seconds = _statements[self._index]
+                seconds += time.perf_counter() - start
+                _statements[self._index] = (statement, seconds)
+
+    def _execute(self, function, statement, *args):
+        self._index = len(_statements)
+        _statements.append((statement, 0.0))
+        result = self._timed(function, statement, *args)
+        return self if result is self._cursor else result
+
+    def execute(self, statement, *args):
+        return self._execute(self._cursor.execute, statement, *args)
+
+    def executemany(self, statement, *args):
+        return self._execute(self._cursor.executemany, statement, *args)
+
+    def fetchone(self):
+        return self._timed(self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._timed(self._cursor.fetchall)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def profile_cursor(cursor):
+    """Return `cursor`, wrapped to record its statements if profiling."""
+    return ProfiledCursor(cursor) if ENABLED else cursor
+
+
+@contextmanager
+def session():
+    """Profile the with block, which runs a command, and print the summary."""
+    if not ENABLED:
+        yield
+        return
+
+    # everything up to now was spent importing xarta and reading the config
+    _phases.insert(0, ["import", 0, time.perf_counter() - STARTED])
+    for entry in _phases[1:]:
+        entry[1] += 1
+
+    profiler = None
+    if STATS_FILE:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(STATS_FILE)
+        report(sys.stderr)
+
+
+def _summarise(seconds):
+    """Count, total, mean and maximum of a list of durations."""
+    total = sum(seconds)
+    return f"{len(seconds)}, total {total:.3f}s, mean {total / len(seconds):.4f}s, max {max(seconds):.4f}s"
+
+
+def report(file):
+    """Print the summary of everything recorded."""
+    total = time.perf_counter() - STARTED
+    print(f"\nProfile (total {total:.3f}s):", file=file)
+    for name, depth, seconds in _phases:
+        label = "  " * (depth + 1) + name
+        duration = "unfinished" if seconds is None else f"{seconds:8.3f}s"
+        print(f"{label:<40} {duration}", file=file)
+
+    if _statements:
+        print(f"SQL statements: {_summarise([s for _, s in _statements])}", file=file)
+        statement, seconds = max(_statements, key=lambda s: s[1])
+        statement = " ".join(statement.split())
+        print(f"  slowest ({seconds:.4f}s): {statement[:70]}", file=file)
+
+    if _requests:
+        print(f"HTTP requests: {_summarise([s for _, _, s in _requests])}", file=file)
+        for host in sorted({host for host, _, _ in _requests}):
+            seconds = [s for h, _, s in _requests if h == host]
+            statuses = sorted({str(status) for h, status, _ in _requests if h == host})
+            print(
+                f"  {host}: {_summarise(seconds)} (status {', '.join(statuses)})",
+                file=file,
+            )
+    if _rate_limit_wait:
+        print(f"Waiting for rate limits: {_rate_limit_wait:.3f}s", file=file)
+
+    if STATS_FILE:
+        print(f"cProfile statistics written to {STATS_FILE}", file=file)
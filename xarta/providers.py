@@ -0,0 +1,549 @@
+"""Services that papers and their metadata come from.
+
+Papers from the arXiv are referred to by their arXiv id, e.g. 1704.05849. Papers
+from other services have namespaced refs, e.g. cern:ATL-PHYS-PUB-2017-017 for a
+report on the CERN document server, and local:<hash> for pdfs added from disk.
+Each provider knows how to parse its refs, and how to fetch metadata and bibtex
+for many papers at once. Requests are rate limited per host (see
+network.RATE_LIMITS), and each provider runs at most `max_workers` of its
+batches at the same time.
+
+Bibtex comes from two places: the provider itself (stored as bibtex_arxiv for
+historical reasons) and INSPIRE, which knows both arXiv papers and CERN reports.
+"""
+
+import re
+import time
+
+import xmltodict
+
+from . import utils
+from .network import acquire, get, record_request, run_jobs
+from .utils import ARXIV_API_URL, XartaError
+
+
+INSPIRE_LITERATURE_URL = "https://inspirehep.net/api/literature"
+CDS_SEARCH_URL = "https://cds.cern.ch/search"
+DOI_URL = "https://doi.org/{doi}"
+CSL_JSON = "application/vnd.citationstyles.csl+json"
+
+# the start of a bibtex entry, and the arXiv id in an INSPIRE entry
+BIBTEX_ENTRY_START = re.compile(r"^@", re.MULTILINE)
+BIBTEX_EPRINT = re.compile(r"""\beprint\s*=\s*["{]([^"}]+)["}]""", re.IGNORECASE)
+
+
+def split_bibtex_entries(text):
+    """Split a bibtex file into its entries, each starting with an @ at the
+    beginning of a line."""
+    starts = [match.start() for match in BIBTEX_ENTRY_START.finditer(text)]
+    return [
+        text[start:end].strip() + "\n"
+        for start, end in zip(starts, starts[1:] + [len(text)])
+    ]
+
+
+def chunks(lst, size):
+    """Split a list into consecutive lists of at most `size` items."""
+    return [lst[i : i + size] for i in range(0, len(lst), size)]
+
+
+def run_batches(function, batches, max_workers):
+    """Call `function` on every batch concurrently, merging the dictionaries it
+    returns. The first error is raised once all batches are done."""
+    results, errors = {}, []
+    for _, result, error in run_jobs(function, batches, max_workers=max_workers):
+        if error is not None:
+            errors.append(error)
+        else:
+            results.update(result)
+    if errors:
+        raise errors[0]
+    return results
+
+
+class Provider:
+    """A service papers come from. Methods taking `numbers` take refs without
+    the namespace, and return dictionaries keyed by them."""
+
+    # namespace of refs, e.g. 'cern' for cern:ATL-PHYS-PUB-2017-017
+    prefix = ""
+    name = ""
+    # publisher of the reports of the provider, for bibtex
+    institution = ""
+    # whether the papers are online (and known to INSPIRE)
+    remote = True
+    # number of papers whose metadata is requested at once, and the number of
+    # such requests made concurrently
+    batch_size = 1
+    max_workers = 1
+    # number of papers whose bibtex is requested from the provider at once
+    bibtex_batch_size = 1
+
+    def format_ref(self, number):
+        return f"{self.prefix}:{number}" if self.prefix else number
+
+    def parse(self, number):
+        """The normalised form of a ref (without the namespace), or None if it is
+        not valid."""
+        raise NotImplementedError
+
+    def fetch_metadata_batch(self, numbers):
+        """Metadata of some papers as dictionaries with the keys 'id', 'title',
+        'authors', 'category' and 'abstract'. Unknown papers are left out."""
+        raise NotImplementedError
+
+    def fetch_metadata(self, numbers):
+        return run_batches(
+            self.fetch_metadata_batch,
+            chunks(numbers, self.batch_size),
+            self.max_workers,
+        )
+
+    def fetch_bibtex(self, numbers):
+        """Bibtex of some papers from the provider itself. Papers without any are
+        mapped to an empty string."""
+        raise NotImplementedError
+
+    def inspire_query(self, number):
+        """INSPIRE search for a paper."""
+        raise NotImplementedError
+
+    def inspire_number(self, entry):
+        """The paper an INSPIRE bibtex entry belongs to, or None."""
+        raise NotImplementedError
+
+    def inspire_record_numbers(self, metadata):
+        """The numbers of a paper in the metadata of its INSPIRE record, or of a
+        reference in its 'reference' field."""
+        raise NotImplementedError
+
+    def year(self, number):
+        raise NotImplementedError
+
+    def abs_url(self, number):
+        raise NotImplementedError
+
+    def pdf_url(self, number):
+        raise NotImplementedError
+
+
+class ArxivProvider(Provider):
+    name = "arXiv"
+    batch_size = utils.ARXIV_BATCH_SIZE
+    # the arxiv api allows one request every three seconds anyway
+    max_workers = 1
+
+    def parse(self, number):
+        number = utils.process_ref(number)
+        return number if utils.is_valid_ref(number) else None
+
+    def fetch_metadata_batch(self, numbers):
+        return utils.get_arxiv_data_batch(numbers)
+
+    def fetch_bibtex(self, numbers):
+        return {number: fetch_arxiv_bibtex(number) for number in numbers}
+
+    def inspire_query(self, number):
+        return f"arxiv:{number}"
+
+    def inspire_number(self, entry):
+        match = BIBTEX_EPRINT.search(entry)
+        return utils.process_ref(match.group(1)) if match else None
+
+    def inspire_record_numbers(self, metadata):
+        # records list their eprints, references have a single one
+        eprints = [e.get("value", "") for e in metadata.get("arxiv_eprints", [])]
+        if metadata.get("arxiv_eprint"):
+            eprints.append(metadata["arxiv_eprint"])
+        return [utils.process_ref(eprint) for eprint in eprints if eprint]
+
+    def year(self, number):
+        """The year of submission, from the first two digits of the number, e.g.
+        2017 for 1704.05849 and 1999 for hep-ph/9901234. The arXiv started in
+        1991."""
+        year = int(number.rsplit("/", 1)[-1][:2])
+        return 1900 + year if year >= 91 else 2000 + year
+
+    def abs_url(self, number):
+        return f"https://arxiv.org/abs/{number}"
+
+    def pdf_url(self, number):
+        return utils.get_pdf_url(number)
+
+
+def fetch_arxiv_bibtex(paper_id):
+    """Download the arxiv bibtex of a paper using the arxivcheck package. Returns
+    an empty string if none was found."""
+    from arxivcheck.arxiv import check_arxiv_published
+
+    # arxivcheck does its own requests to the arxiv api, so wait for our turn
+    wait = acquire(ARXIV_API_URL)
+    start = time.perf_counter()
+    try:
+        bib_info = check_arxiv_published(paper_id)
+    except Exception as err:
+        seconds = time.perf_counter() - start
+        record_request(
+            ARXIV_API_URL, "arxiv-bibtex", None, seconds, wait, error=str(err)
+        )
+        raise XartaError(f"Could not fetch arXiv bibtex for {paper_id}")
+    seconds = time.perf_counter() - start
+    # arxivcheck does not tell us the status of its response
+    record_request(ARXIV_API_URL, "arxiv-bibtex", 200, seconds, wait)
+    if bib_info[0]:
+        return bib_info[2] + "\n"
+    return ""
+
+
+def marc_fields(record, tag, code):
+    """The values of the subfield `code` of the datafields `tag` of a MARCXML
+    record, as parsed by xmltodict."""
+    values = []
+    for datafield in as_list(record.get("datafield")):
+        if datafield.get("@tag") != tag:
+            continue
+        for subfield in as_list(datafield.get("subfield")):
+            if subfield.get("@code") == code and subfield.get("#text"):
+                values.append(subfield["#text"])
+    return values
+
+
+def as_list(value):
+    """xmltodict gives a single element as is, and many as a list."""
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def contains_number(text, number):
+    """Whether a report number appears in `text` as a whole word."""
+    pattern = r"(?<![\w\-])" + re.escape(number) + r"(?![\w\-])"
+    return re.search(pattern, text, re.IGNORECASE) is not None
+
+
+class CdsProvider(Provider):
+    """Reports, notes and theses on the CERN document server, referred to by
+    their report number."""
+
+    prefix = "cern"
+    name = "CERN Document Server"
+    institution = "CERN"
+    batch_size = 25
+    max_workers = 2
+    bibtex_batch_size = 25
+
+    def parse(self, number):
+        number = number.strip()
+        if re.fullmatch(r"[A-Za-z][\w\-./]*\w", number):
+            return number
+        return None
+
+    def search(self, numbers, output_format, endpoint):
+        """Search for reports by number, in MARCXML ('xm') or bibtex ('hx')."""
+        query = " or ".join(f'reportnumber:"{number}"' for number in numbers)
+        params = {"p": query, "of": output_format, "rg": 2 * len(numbers)}
+        response = get(CDS_SEARCH_URL, params=params, endpoint=endpoint)
+        if response.status_code != 200:
+            raise XartaError(
+                f"Could not search the CERN document server"
+                f" (status {response.status_code})"
+            )
+        return response.text
+
+    def parse_records(self, text, numbers):
+        """Match the records of a MARCXML search result to report numbers."""
+        collection = xmltodict.parse(text).get("collection") or {}
+        results = {}
+        for record in as_list(collection.get("record")):
+            record_numbers = marc_fields(record, "037", "a")
+            record_numbers += marc_fields(record, "088", "a")
+            for number in numbers:
+                if number in results:
+                    continue
+                if any(number.lower() == n.lower() for n in record_numbers):
+                    results[number] = record
+        return results
+
+    def fetch_metadata_batch(self, numbers):
+        text = self.search(numbers, "xm", "cds-api")
+        results = {}
+        for number, record in self.parse_records(text, numbers).items():
+            # collaborations are corporate authors
+            authors = marc_fields(record, "100", "a") + marc_fields(record, "700", "a")
+            authors = authors or marc_fields(record, "110", "a")
+            titles = marc_fields(record, "245", "a")
+            subjects = marc_fields(record, "650", "a")
+            results[number] = {
+                "id": number,
+                "title": utils.squash_whitespace(titles[0]) if titles else "",
+                "authors": authors,
+                "category": subjects[0] if subjects else "cern",
+                "abstract": utils.squash_whitespace(
+                    " ".join(marc_fields(record, "520", "a"))
+                ),
+            }
+        return results
+
+    def fetch_bibtex(self, numbers):
+        text = self.search(numbers, "hx", "cds-bibtex")
+        bibtex = dict.fromkeys(numbers, "")
+        for entry in split_bibtex_entries(text):
+            for number in numbers:
+                if not bibtex[number] and contains_number(entry, number):
+                    bibtex[number] = entry
+                    break
+        return bibtex
+
+    def inspire_query(self, number):
+        return f'r "{number}"'
+
+    def inspire_number(self, entry):
+        match = re.search(
+            r"""\breportNumber\s*=\s*["{]([^"}]+)["}]""", entry, re.IGNORECASE
+        )
+        return match.group(1).strip() if match else None
+
+    def inspire_record_numbers(self, metadata):
+        numbers = []
+        for report_number in metadata.get("report_numbers", []):
+            # records have dictionaries, references plain strings
+            if isinstance(report_number, dict):
+                report_number = report_number.get("value", "")
+            if report_number and self.parse(report_number):
+                numbers.append(report_number.strip())
+        return numbers
+
+    def year(self, number):
+        """The year in the report number, as in ATL-PHYS-PUB-2017-017 or
+        CMS-PAS-HIG-19-001, or 0 if there is none."""
+        match = re.search(r"-((?:19|20)\d\d)-", number) or re.search(
+            r"-(\d\d)-\d+$", number
+        )
+        if match is None:
+            return 0
+        year = int(match.group(1))
+        return year if year > 100 else 2000 + year
+
+    def abs_url(self, number):
+        return f"{CDS_SEARCH_URL}?p=reportnumber%3A%22{number}%22"
+
+    def pdf_url(self, number):
+        text = self.search([number], "xm", "cds-api")
+        record = self.parse_records(text, [number]).get(number)
+        urls = marc_fields(record, "856", "u") if record else []
+        urls = [url for url in urls if url.lower().endswith(".pdf")]
+        if not urls:
+            raise XartaError(f"No pdf of cern:{number} found.")
+        return urls[0]
+
+
+class LocalProvider(Provider):
+    """Pdfs added from the local disk, referred to by the beginning of the sha256
+    of their contents. Their metadata comes from their DOI, or the pdf itself,
+    when they are added, and cannot be fetched again."""
+
+    prefix = "local"
+    name = "local"
+    remote = False
+    # length of the hash in refs
+    digits = 12
+
+    def parse(self, number):
+        number = number.strip().lower()
+        return number if re.fullmatch(r"[0-9a-f]{%d}" % self.digits, number) else None
+
+    def fetch_metadata_batch(self, numbers):
+        return {}
+
+    def fetch_bibtex(self, numbers):
+        return dict.fromkeys(numbers, "")
+
+    def year(self, number):
+        return 0
+
+    def abs_url(self, number):
+        raise XartaError(f"local:{number} has no web page, open its pdf instead.")
+
+    def pdf_url(self, number):
+        raise XartaError(f"local:{number} is stored locally, open its pdf instead.")
+
+
+ARXIV = ArxivProvider()
+LOCAL = LocalProvider()
+PROVIDERS = {provider.prefix: provider for provider in [CdsProvider(), LOCAL]}
+
+
+def split_ref(ref):
+    """The provider of a ref, and the ref without its namespace. Refs without a
+    known namespace are arXiv ids."""
+    prefix, separator, number = ref.partition(":")
+    if separator and prefix.lower() in PROVIDERS:
+        return PROVIDERS[prefix.lower()], number
+    return ARXIV, ref
+
+
+def group_refs(refs):
+    """Group refs by provider, as a dictionary mapping providers to the refs
+    without their namespace."""
+    groups = {}
+    for ref in refs:
+        provider, number = split_ref(ref)
+        groups.setdefault(provider, []).append(number)
+    return groups
+
+
+def fetch_metadata(refs):
+    """Metadata of many papers, from any providers, as a dictionary mapping refs
+    to the dictionaries returned by Provider.fetch_metadata_batch. Providers are
+    queried concurrently. Unknown papers are missing from the result."""
+    groups = list(group_refs(refs).items())
+
+    def fetch(group):
+        provider, numbers = group
+        data = provider.fetch_metadata(numbers)
+        return {provider.format_ref(number): data[number] for number in data}
+
+    return run_batches(fetch, groups, max_workers=max(1, len(groups)))
+
+
+def get_metadata(ref):
+    """Metadata of a single paper."""
+    data = fetch_metadata([ref])
+    if ref not in data:
+        raise XartaError(f"No data found for {ref}, invalid ref?")
+    return data[ref]
+
+
+def fetch_inspire_bibtex(refs):
+    """Download the inspire bibtex of many papers of the same provider with a
+    single search of the INSPIRE literature api. The entries returned are
+    matched to the papers by their arXiv id or report number. Returns a
+    dictionary mapping every ref to its bibtex, which is an empty string if none
+    was found."""
+    provider, _ = split_ref(refs[0])
+    if not provider.remote:
+        return dict.fromkeys(refs, "")
+    numbers = {split_ref(ref)[1]: ref for ref in refs}
+    query = " or ".join(provider.inspire_query(number) for number in numbers)
+    # leave room for papers with more than one record (e.g. errata)
+    params = {"q": query, "format": "bibtex", "size": 2 * len(refs)}
+    response = get(INSPIRE_LITERATURE_URL, params=params, endpoint="inspire-bibtex")
+    if response.status_code != 200:
+        raise XartaError(
+            f"Could not fetch inspire bibtex for {len(refs)} papers"
+            f" (status {response.status_code})"
+        )
+
+    bibtex = dict.fromkeys(refs, "")
+    for entry in split_bibtex_entries(response.text):
+        ref = numbers.get(provider.inspire_number(entry))
+        # keep the first (most relevant) record of each paper
+        if ref is not None and not bibtex[ref]:
+            bibtex[ref] = entry
+    return bibtex
+
+
+def fetch_inspire_references(refs):
+    """Download the references of many papers of the same provider with a single
+    search of the INSPIRE literature api. Returns a dictionary mapping the refs
+    of the papers INSPIRE knows to the refs of the papers they cite (of any
+    provider, and in the library or not)."""
+    provider, _ = split_ref(refs[0])
+    if not provider.remote:
+        return {}
+    numbers = {split_ref(ref)[1]: ref for ref in refs}
+    params = {
+        "q": " or ".join(provider.inspire_query(number) for number in numbers),
+        "fields": "arxiv_eprints,report_numbers,references.reference",
+        "size": 2 * len(refs),
+    }
+    response = get(INSPIRE_LITERATURE_URL, params=params, endpoint="inspire-references")
+    if response.status_code != 200:
+        raise XartaError(
+            f"Could not fetch inspire references for {len(refs)} papers"
+            f" (status {response.status_code})"
+        )
+    try:
+        hits = response.json()["hits"]["hits"]
+    except (ValueError, KeyError, TypeError):
+        raise XartaError("Unexpected response from inspire.")
+
+    all_providers = [ARXIV] + [p for p in PROVIDERS.values() if p.remote]
+    references = {}
+    for hit in hits:
+        metadata = hit.get("metadata", {})
+        matches = [numbers.get(n) for n in provider.inspire_record_numbers(metadata)]
+        ref = next((ref for ref in matches if ref), None)
+        # keep the first (most relevant) record of each paper
+        if ref is None or ref in references:
+            continue
+        cited = {}
+        for entry in metadata.get("references", []):
+            reference = entry.get("reference", {})
+            for cited_provider in all_providers:
+                for number in cited_provider.inspire_record_numbers(reference):
+                    cited[cited_provider.format_ref(number)] = None
+        cited.pop(ref, None)
+        references[ref] = list(cited)
+    return references
+
+
+def fetch_doi_metadata(doi):
+    """Metadata of the paper with a DOI, in the form returned by get_metadata,
+    and its bibtex, from the content negotiation of doi.org."""
+    url = DOI_URL.format(doi=doi)
+    response = get(url, headers={"Accept": CSL_JSON}, endpoint="doi")
+    if response.status_code != 200:
+        raise XartaError(f"Could not look up the DOI {doi}")
+    try:
+        csl = response.json()
+    except ValueError:
+        raise XartaError(f"Unexpected response when looking up the DOI {doi}")
+
+    title = csl.get("title") or ""
+    if isinstance(title, list):
+        title = title[0] if title else ""
+    authors = [
+        " ".join(part for part in (a.get("given"), a.get("family")) if part)
+        or a.get("literal", "")
+        for a in csl.get("author", [])
+    ]
+    abstract = re.sub("<[^>]+>", " ", csl.get("abstract") or "")
+    data = {
+        "id": doi,
+        "title": utils.squash_whitespace(title),
+        "authors": [author for author in authors if author],
+        "category": "local",
+        "abstract": utils.squash_whitespace(abstract),
+    }
+
+    response = get(url, headers={"Accept": "application/x-bibtex"}, endpoint="doi")
+    bibtex = response.text.strip() + "\n" if response.status_code == 200 else ""
+    return data, bibtex
+
+
+def fetch_bibtex(refs, source):
+    """Download the bibtex of papers of the same provider from `source`, 'arxiv'
+    (the provider itself) or 'inspire'."""
+    if source == "inspire":
+        return fetch_inspire_bibtex(refs)
+    provider, _ = split_ref(refs[0])
+    bibtex = provider.fetch_bibtex([split_ref(ref)[1] for ref in refs])
+    return {provider.format_ref(number): text for number, text in bibtex.items()}
+
+
+def bibtex_batches(jobs, inspire_batch_size):
+    """Group (ref, source) jobs into (source, refs) batches of papers of the
+    same provider, as fetched together by fetch_bibtex."""
+    batches = []
+    for source in ("arxiv", "inspire"):
+        refs = [ref for ref, job_source in jobs if job_source == source]
+        for provider, numbers in group_refs(refs).items():
+            size = (
+                inspire_batch_size
+                if source == "inspire"
+                else provider.bibtex_batch_size
+            )
+            for batch in chunks(numbers, size):
+                batches.append((source, [provider.format_ref(n) for n in batch]))
+    return batches
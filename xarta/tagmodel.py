@@ -0,0 +1,86 @@
+"""Tag suggestions from the words and authors of the papers with each tag.
+
+A paper is described by the words of its title and abstract, hashed as in
+vectors.py, and its authors, hashed into the same space. For every tag the
+database keeps the number of papers with the tag and how often each of these
+features appears in them. The counts are updated whenever the tags or text of a
+paper change (see PaperDatabase.update_tag_model), so suggesting tags for a
+paper only reads the counts of its own features.
+
+Tags are scored as in multinomial naive Bayes, with the log likelihood averaged
+over the features of the paper so that the probabilities are not all but one
+close to zero, and the tags with a large enough probability are suggested.
+"""
+
+import zlib
+
+import numpy as np
+
+from .vectors import N_FEATURES, term_counts
+
+
+# an author says more about the topic of a paper than a word of its abstract
+AUTHOR_WEIGHT = 5
+# additive smoothing of the feature counts of each tag
+SMOOTHING = 0.1
+MAX_SUGGESTIONS = 3
+SUGGESTION_THRESHOLD = 0.2
+
+
+def paper_features(title, abstract, authors):
+    """Return the sorted features of a paper and their counts, as int32 arrays.
+    `authors` is a list of (surname, initials) tuples, as in text.author_key."""
+    indices, counts = term_counts(title + " " + abstract)
+    author_features = [
+        zlib.crc32(f"author:{surname} {initials[:1]}".encode("utf-8")) % N_FEATURES
+        for surname, initials in authors
+    ]
+    indices = np.concatenate([indices, np.array(author_features, dtype=np.int32)])
+    counts = np.concatenate(
+        [counts, np.full(len(author_features), AUTHOR_WEIGHT, dtype=np.float32)]
+    )
+    indices, positions = np.unique(indices, return_inverse=True)
+    counts = np.bincount(positions, weights=counts, minlength=len(indices))
+    return indices.astype(np.int32), counts.astype(np.int32)
+
+
+def to_blob(indices, counts):
+    return np.concatenate([indices, counts]).astype("<i4").tobytes()
+
+
+def from_blob(blob):
+    features = np.frombuffer(blob, dtype="<i4")
+    return np.split(features, 2)
+
+
+def score_tags(indices, counts, tags, feature_counts):
+    """Return the probability of each tag for a paper with the features
+    `indices` and `counts`. `tags` is a list of (tag, papers, features) rows of
+    the model, and `feature_counts` a list of (tag, feature, count) rows of the
+    features of the paper."""
+    names = [tag for tag, _, _ in tags]
+    position = {tag: i for i, tag in enumerate(names)}
+    papers = np.array([row[1] for row in tags], dtype=float)
+    totals = np.array([row[2] for row in tags], dtype=float)
+
+    # the counts of each feature of the paper with each tag
+    matrix = np.zeros((len(names), len(indices)))
+    for tag, feature, count in feature_counts:
+        matrix[position[tag], np.searchsorted(indices, feature)] = count
+
+    log_likelihood = (
+        np.log(matrix + SMOOTHING) - np.log(totals + SMOOTHING * N_FEATURES)[:, None]
+    )
+    scores = (np.log(papers) + log_likelihood @ counts) / max(counts.sum(), 1)
+    probabilities = np.exp(scores - scores.max())
+    return dict(zip(names, probabilities / probabilities.sum()))
+
+
+def best_tags(probabilities, exclude=()):
+    """The most probable tags worth suggesting, leaving out those in `exclude`."""
+    ranked = sorted(probabilities.items(), key=lambda item: (-item[1], item[0]))
+    return [
+        tag
+        for tag, probability in ranked
+        if probability >= SUGGESTION_THRESHOLD and tag not in exclude
+    ][:MAX_SUGGESTIONS]
@@ -0,0 +1,76 @@
+"""Text normalisation and tokenisation shared by the similarity features."""
+
+import re
+
+from unidecode import unidecode
+
+
+# common english words, and words that appear in almost every abstract, which
+# carry no information about the topic of a paper
+STOPWORDS = frozenset(
+    """
+    about above after again against all also although among and any are because
+    been before being between both but can could did does doing down during each
+    either even few for from further had has have having here how however into
+    its itself just many may might more most much must not now off once only
+    other our out over own per same several should show shown shows since some
+    such than that the their them then there these they this those through thus
+    too under until upon use used using very was well were what when where which
+    while who whose why will with within without would yet you your paper study
+    studies result results find found present presented propose proposed
+    recent recently new approach work consider considered obtain obtained
+    """.split()
+)
+
+WORD_REGEX = re.compile(r"[a-z][a-z0-9]*(?:-[a-z0-9]+)*")
+
+# words that belong to a surname but are ignored when comparing names, so that
+# e.g. 'de Gouvea' and 'Gouvea' match, and suffixes that are ignored entirely
+NAME_PARTICLES = frozenset(
+    "da das de del della der des di do dos du la le ten ter van von zu".split()
+)
+NAME_SUFFIXES = frozenset(["jr", "sr", "ii", "iii", "iv"])
+
+
+def normalise_text(text):
+    """Fold accents and case, e.g. 'Schrödinger' -> 'schrodinger'."""
+    return unidecode(text or "").lower()
+
+
+def tokenise(text):
+    """Split text into normalised words, dropping short words and stopwords."""
+    return [
+        word
+        for word in WORD_REGEX.findall(normalise_text(text))
+        if len(word) > 2 and word not in STOPWORDS
+    ]
+
+
+def author_key(name):
+    """Return the folded surname and the initials of an author's name, e.g. both
+    'Schrödinger, Erwin R. J. A.' and 'E. Schrodinger' give ('schrodinger',
+    'erja') and ('schrodinger', 'e')."""
+    name = normalise_text(name)
+    surname, comma, forenames = name.partition(",")
+    if comma and forenames.strip(" .") not in NAME_SUFFIXES:
+        surname = [w for w in surname.split() if w not in NAME_PARTICLES]
+        forenames = forenames.split()
+    else:
+        # 'Forenames Surname'. Initials may not be followed by a space, as in
+        # 'S.Weinberg'
+        forenames = re.split(r"[\s,]+|(?<=\.)(?=\w)", name)
+        surname = []
+        while forenames and not surname:
+            surname = forenames.pop().strip(".")
+            surname = [surname] if surname and surname not in NAME_SUFFIXES else []
+        while forenames and forenames[-1] in NAME_PARTICLES:
+            forenames.pop()
+
+    initials = "".join(
+        part[0]
+        for forename in forenames
+        if forename.strip(".,") not in NAME_SUFFIXES
+        for part in re.split(r"[.-]", forename)
+        if part and part[0].isalnum()
+    )
+    return re.sub(r"[^a-z0-9]", "", "".join(surname)), initials
@@ -1,13 +1,15 @@
 """Some useful functions."""
 
 from sys import platform
-from urllib.request import urlopen
-from urllib.error import HTTPError
 import os
 import re
+import shlex
+import shutil
 import xmltodict
 import configparser
 
+from . import profiling
+
 
 # set of arxiv categories only used for opening the "new" page of results from
 # the command line
@@ -33,6 +35,18 @@ ARXIV_CATEGORIES = {
     "econ",
 }
 
+# the arXiv api, and the number of papers requested from it in one query
+ARXIV_API_URL = "http://export.arxiv.org/api/query"
+ARXIV_BATCH_SIZE = 50
+
+# where the pdf of an arXiv paper can be downloaded from. Can be overridden with
+# the 'pdf_url' config option, e.g. to use a mirror.
+ARXIV_PDF_URL = "https://arxiv.org/pdf/{ref}.pdf"
+
+# rss feed of the day's new submissions to an arXiv category. Can be overridden
+# with the 'listing_url' config option.
+ARXIV_LISTING_URL = "https://rss.arxiv.org/rss/{category}"
+
 
 class XartaError(Exception):
     """Custom Exception class. Used in a try/catch statement to distinguish between
@@ -55,14 +69,27 @@ def is_arxiv_category(s):
 
 
 def is_valid_ref(ref):
-    """Returns True if s is a valid arXiv reference."""
+    """Returns True if s is a valid arXiv reference, or a valid namespaced
+    reference of another provider (see providers.py)."""
+    from .providers import split_ref
+
+    provider, number = split_ref(ref)
+    if provider.prefix:
+        return provider.parse(number) is not None
+
     is_new_arxiv_ref = bool(re.fullmatch("\d{4}\.\d+", ref))
     is_old_arxiv_ref = bool(re.fullmatch("[\w\-\.]+\/\d+", ref))
     return is_new_arxiv_ref or is_old_arxiv_ref or is_arxiv_category(ref)
 
 
 def process_ref(paper_id):
-    """Attempt to extract arxiv id from a string"""
+    """Attempt to extract arxiv id from a string. Namespaced references of other
+    providers (e.g. 'cern:ATL-PHYS-PUB-2017-017') are only stripped."""
+    from .providers import split_ref
+
+    provider, number = split_ref(paper_id.strip())
+    if provider.prefix:
+        return provider.format_ref(number.strip())
 
     # if user entered a whole url, extract only the arxiv id part
     paper_id = re.sub("https?://arxiv\.org/(abs|pdf|ps)/", "", paper_id)
@@ -80,43 +107,130 @@ def process_ref(paper_id):
 def arxiv_open(ref, pdf=False):
     """Opens arxiv ref in browser."""
 
+    from .providers import split_ref
+
+    provider, number = split_ref(ref)
     if is_arxiv_category(ref):
         os.system(f"{OPEN_COMMAND} https://arxiv.org/list/{ref}/new")
+    elif provider.prefix:
+        url = provider.pdf_url(number) if pdf else provider.abs_url(number)
+        os.system(f"{OPEN_COMMAND} {shlex.quote(url)}")
     elif pdf:
         os.system(f"{OPEN_COMMAND} https://arxiv.org/pdf/{ref}.pdf")
     else:
         os.system(f"{OPEN_COMMAND} https://arxiv.org/abs/{ref}")
 
 
-def get_arxiv_data(ref):
-    """Returns a dictionary of data about the reference `ref`."""
-    url = "http://export.arxiv.org/api/query?id_list=" + ref
-    try:
-        xml_data = urlopen(url).read().decode("utf-8")
-    except HTTPError:
-        raise XartaError("HTTP Error, invalid arxiv ref?")
+def open_file(path):
+    """Opens a local file with the default application."""
+    os.system(f"{OPEN_COMMAND} {shlex.quote(path)}")
 
-    data = xmltodict.parse(xml_data)["feed"]["entry"]
 
-    try:
-        if isinstance(data["author"], list):
-            authors = [auth["name"] for auth in data["author"]]
-        else:
-            authors = [data["author"]["name"]]
+def get_pdf_url(ref):
+    """Returns the url from which the pdf of the paper `ref` is downloaded."""
+    from .providers import split_ref
 
-        string_format = (
-            lambda s: s.replace("\r", "").replace("\n", "").replace("  ", " ")
-        )
-        dic = {
-            "id": data["id"],
-            "title": string_format(data["title"]),
-            "authors": authors,
-            "category": data["arxiv:primary_category"]["@term"],
-        }
-
-        return dic
-    except KeyError:
+    provider, number = split_ref(ref)
+    if provider.prefix:
+        return provider.pdf_url(number)
+    return get_config_option("pdf_url", ARXIV_PDF_URL).format(ref=ref)
+
+
+def squash_whitespace(s):
+    """Replace newlines and runs of spaces with single spaces."""
+    return " ".join(s.split())
+
+
+def parse_arxiv_entry(data):
+    """Returns a dictionary of data about a paper from an entry of an arXiv api
+    response. Raises a KeyError if the entry is not a paper (e.g. an error)."""
+    if isinstance(data["author"], list):
+        authors = [auth["name"] for auth in data["author"]]
+    else:
+        authors = [data["author"]["name"]]
+
+    string_format = lambda s: s.replace("\r", "").replace("\n", "").replace("  ", " ")
+    return {
+        "id": data["id"],
+        "title": string_format(data["title"]),
+        "authors": authors,
+        "category": data["arxiv:primary_category"]["@term"],
+        "abstract": squash_whitespace(data.get("summary") or ""),
+    }
+
+
+def get_arxiv_data_batch(refs):
+    """Returns a dictionary mapping each reference in `refs` to a dictionary of
+    data about it, as returned by get_arxiv_data. The data of up to
+    ARXIV_BATCH_SIZE papers is requested at once. References unknown to the
+    arXiv are missing from the result."""
+    from .network import get
+
+    results = {}
+    for i in range(0, len(refs), ARXIV_BATCH_SIZE):
+        batch = refs[i : i + ARXIV_BATCH_SIZE]
+        url = f"{ARXIV_API_URL}?id_list={','.join(batch)}&max_results={len(batch)}"
+        response = get(url, endpoint="arxiv-api")
+        if response.status_code != 200:
+            raise XartaError("HTTP Error, invalid arxiv ref?")
+
+        entries = xmltodict.parse(response.text)["feed"].get("entry", [])
+        if not isinstance(entries, list):
+            entries = [entries]
+        for entry in entries:
+            try:
+                data = parse_arxiv_entry(entry)
+            except (KeyError, TypeError):
+                continue
+            results[process_ref(data["id"])] = data
+    return results
+
+
+def get_arxiv_data(ref):
+    """Returns a dictionary of data about the reference `ref`."""
+    data = get_arxiv_data_batch([ref])
+    if ref not in data:
         raise XartaError("Error processing arXiv data, invalid ref?")
+    return data[ref]
+
+
+def get_arxiv_listing(category):
+    """Returns the day's new submissions (including cross-lists, but not
+    replacements) to an arXiv category as a list of dictionaries with the same
+    keys as those returned by get_arxiv_data."""
+    import feedparser
+    from .network import get
+
+    url = get_config_option("listing_url", ARXIV_LISTING_URL).format(category=category)
+    response = get(url, endpoint="arxiv-listing")
+    if response.status_code != 200:
+        raise XartaError(f"Could not fetch the arXiv listing for {category}.")
+
+    papers = []
+    for entry in feedparser.parse(response.text).entries:
+        title = entry.get("title", "")
+        # older feeds mark replacements in the title, newer ones in a tag
+        if "UPDATED)" in title or entry.get("arxiv_announce_type", "").startswith(
+            "replace"
+        ):
+            continue
+        title = re.sub(r"\s*\(arXiv:[^)]*\)\s*$", "", title)
+
+        abstract = re.sub("<[^>]+>", "", entry.get("summary", ""))
+        # newer feeds prefix the abstract with the id and announcement type
+        abstract = re.sub(r"^arXiv:.*?Abstract:", "", abstract, flags=re.DOTALL)
+
+        authors = re.sub("<[^>]+>", "", entry.get("author", ""))
+        papers.append(
+            {
+                "id": process_ref(entry.get("link", "")),
+                "title": squash_whitespace(title),
+                "authors": [a.strip() for a in authors.split(",") if a.strip()],
+                "category": category,
+                "abstract": squash_whitespace(abstract),
+            }
+        )
+    return papers
 
 
 def list_to_string(lst):
@@ -215,8 +329,8 @@ def format_data_term(data, headers, select=False, reference_prefix=""):
     """Take paper data, and format it for printing as a table. Data is cropped
     according to the size of the terminal."""
 
-    _, term_columns = os.popen("stty size", "r").read().split()
-    term_columns = int(term_columns)
+    # stty fails when stdin is not a terminal, e.g. when choices are piped in
+    term_columns = shutil.get_terminal_size().columns
     headers = [head.capitalize() for head in headers]
 
     if term_columns < 120:
@@ -249,7 +363,15 @@ def format_data_term(data, headers, select=False, reference_prefix=""):
     # we processed the long column first it could take up at most 1/3 of the
     # screen, but if we process it last it could take up 1-2*epsilon of the
     # screen. Thus, process columns with a lower space requirement first.
-    ascending_expected_size = ["Category", "Ref", "Alias", "Authors", "Tags", "Title"]
+    ascending_expected_size = [
+        "Category",
+        "Library",
+        "Ref",
+        "Alias",
+        "Authors",
+        "Tags",
+        "Title",
+    ]
     column_sizes = [0] * len(headers)
     for head in ascending_expected_size:
         if head not in headers:
@@ -355,30 +477,114 @@ def get_database_path():
     return CONFIG["XARTA"]["database_file"]
 
 
+def get_libraries():
+    """Return the libraries read alongside the database by browse, list and
+    export, as a list of (name, path) tuples. They are given by the 'libraries'
+    option of the config file, separated by commas or newlines, e.g.
+    'group:~/Dropbox/group.db, old:~/old-xarta.db'."""
+    libraries = []
+    for library in get_config_list("libraries"):
+        name, _, path = library.partition(":")
+        name, path = name.strip(), path.strip()
+        valid_name = re.fullmatch(r"[A-Za-z][\w-]*", name) and name not in (
+            "main",
+            "temp",
+        )
+        if not (valid_name and path):
+            raise XartaError(f"Invalid library in the config file: {library}")
+        libraries.append((name, os.path.expanduser(path)))
+    return libraries
+
+
+def get_config_option(option, default=""):
+    """Return an option from the config file, or `default` if it is not set."""
+    if CONFIG is None:
+        return default
+    return CONFIG["XARTA"].get(option, default)
+
+
+def get_config_options():
+    """Return every option of the config file, as a dictionary."""
+    if CONFIG is None:
+        return {}
+    return dict(CONFIG["XARTA"])
+
+
+def get_config_list(option):
+    """Return an option from the config file holding a list of values separated
+    by commas or newlines, as a list of strings."""
+    values = re.split(r"[,\n]", get_config_option(option))
+    return [value.strip() for value in values if value.strip()]
+
+
+def get_cache_path(name, database_path=None):
+    """Return the path of the cache file `name` belonging to the database (by
+    default the one from the config file). Caches are kept in the
+    'cache_directory' from the config file, by default a 'xarta-cache' folder
+    next to the database."""
+    database_path = database_path or get_database_path()
+    directory = get_config_option("cache_directory")
+    if not directory:
+        directory = os.path.join(os.path.dirname(database_path), "xarta-cache")
+    directory = os.path.expanduser(directory)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{os.path.basename(database_path)}.{name}")
+
+
+def get_state_directory():
+    """Return the directory for state shared by all xarta processes (e.g. rate
+    limits), which is the 'state_directory' from the config file or
+    '$XDG_CACHE_HOME/xarta'."""
+    directory = get_config_option("state_directory")
+    if not directory:
+        cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.environ.get("HOME"), ".cache"
+        )
+        directory = os.path.join(cache_home, "xarta")
+    directory = os.path.expanduser(directory)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def get_pdf_directory():
+    """Return the directory of the downloaded pdf store. This is the 'pdf_directory'
+    config option, or a 'xarta-pdfs' folder next to the database."""
+    directory = get_config_option("pdf_directory")
+    if not directory:
+        directory = os.path.join(
+            os.path.dirname(get_database_path() or CONFIG_FILE), "xarta-pdfs"
+        )
+    return os.path.expanduser(directory)
+
+
 def print_table(data, headers, select):
     """Given a set of papers, print them nicely in a table"""
-    from tabulate import tabulate
+    print(format_table(data, headers, select))
 
-    # process data for printing (fit to screen)
-    formatted_data, formatted_headers, column_sizes, offset = format_data_term(
-        data, headers, select
-    )
 
-    hlines = ["-" * col_size for col_size in column_sizes]
+def format_table(data, headers, select):
+    """Given a set of papers, format them nicely as a table to fit the terminal"""
+    with profiling.phase("render table"):
+        from tabulate import tabulate
 
-    if select:
-        # no indes for the first row, dashes for the second row, then integers
-        indices = [None, "-" * len(str(len(data) - 1))] + list(range(len(data)))
-    else:
-        indices = False
+        # process data for printing (fit to screen)
+        formatted_data, formatted_headers, column_sizes, offset = format_data_term(
+            data, headers, select
+        )
+
+        hlines = ["-" * col_size for col_size in column_sizes]
+
+        if select:
+            # no indes for the first row, dashes for the second row, then integers
+            indices = [None, "-" * len(str(len(data) - 1))] + list(range(len(data)))
+        else:
+            indices = False
 
-    print(
-        tabulate(
+        return tabulate(
             [formatted_headers, hlines] + formatted_data,
             tablefmt="plain",
             showindex=indices,
         )
-    )
 
 
 def load_config():
@@ -413,4 +619,5 @@ def load_config():
 
 
 # load config from a file
-CONFIG, CONFIG_FILE = load_config()
+with profiling.phase("load config"):
+    CONFIG, CONFIG_FILE = load_config()
@@ -0,0 +1,205 @@
+"""Hashed tf-idf vectors of paper titles and abstracts.
+
+Words are mapped to one of N_FEATURES columns by a stable hash, so that vectors
+computed at different times (and cached on disk) are always comparable and no
+vocabulary has to be stored. Sets of vectors are kept as compressed sparse rows
+in plain NumPy arrays.
+"""
+
+import os
+import zlib
+
+import numpy as np
+
+from .text import tokenise
+from .utils import get_cache_path
+
+
+N_FEATURES = 1 << 20
+
+
+def text_digest(text):
+    """A cheap checksum of a paper's text, used to notice when it changes."""
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def term_counts(text):
+    """Return the sorted feature indices and counts of the words in `text`."""
+    hashes = np.fromiter(
+        (zlib.crc32(word.encode("utf-8")) for word in tokenise(text)), dtype=np.uint32
+    )
+    indices, counts = np.unique(hashes % N_FEATURES, return_counts=True)
+    return indices.astype(np.int32), counts.astype(np.float32)
+
+
+class SparseRows:
+    """Rows of a sparse matrix in compressed sparse row format."""
+
+    def __init__(self, indptr, indices, data):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    @classmethod
+    def empty(cls):
+        return cls(
+            np.zeros(1, dtype=np.int64),
+            np.zeros(0, dtype=np.int32),
+            np.zeros(0, dtype=np.float32),
+        )
+
+    @classmethod
+    def from_texts(cls, texts):
+        """Term counts of each text, one row per text."""
+        rows = [term_counts(text) for text in texts]
+        if not rows:
+            return cls.empty()
+        lengths = [len(indices) for indices, _ in rows]
+        return cls(
+            np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+            np.concatenate([indices for indices, _ in rows]),
+            np.concatenate([counts for _, counts in rows]),
+        )
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def row_index(self):
+        """The row of every stored entry."""
+        return np.repeat(np.arange(len(self)), np.diff(self.indptr))
+
+    def take(self, rows):
+        """A new SparseRows with only the given rows, in the given order."""
+        rows = np.asarray(rows, dtype=np.int64)
+        starts, ends = self.indptr[rows], self.indptr[rows + 1]
+        lengths = ends - starts
+        indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        # position of every selected entry in the original arrays
+        positions = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return SparseRows(indptr, self.indices[positions], self.data[positions])
+
+    def append(self, other):
+        """A new SparseRows with the rows of `other` after those of self."""
+        return SparseRows(
+            np.concatenate([self.indptr, other.indptr[1:] + self.indptr[-1]]),
+            np.concatenate([self.indices, other.indices]),
+            np.concatenate([self.data, other.data]),
+        )
+
+    def normalised(self, idf):
+        """Sublinear tf-idf weights of the entries, with every row of unit length."""
+        weights = (1 + np.log(self.data)) * idf[self.indices]
+        norms = np.sqrt(
+            np.bincount(self.row_index(), weights=weights ** 2, minlength=len(self))
+        )
+        norms[norms == 0] = 1
+        return SparseRows(self.indptr, self.indices, weights / norms[self.row_index()])
+
+
+class LibraryVectors:
+    """Term counts for every paper in the library, cached on disk and updated
+    incrementally: only papers that are new, or whose text has changed, are
+    tokenised again."""
+
+    def __init__(self, ids, digests, rows):
+        self.ids = ids
+        self.digests = digests
+        self.rows = rows
+
+    @classmethod
+    def load(cls, path):
+        """Load cached vectors, or start afresh if there is no (usable) cache."""
+        try:
+            with np.load(path, allow_pickle=False) as f:
+                rows = SparseRows(f["indptr"], f["indices"], f["data"])
+                return cls(list(f["ids"]), f["digests"], rows)
+        except (OSError, KeyError, ValueError):
+            return cls([], np.zeros(0, dtype=np.uint32), SparseRows.empty())
+
+    def save(self, path):
+        # write then rename, so an interrupted save never leaves a broken cache
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            ids=np.array(self.ids, dtype=str),
+            digests=self.digests,
+            indptr=self.rows.indptr,
+            indices=self.rows.indices,
+            data=self.rows.data,
+        )
+        os.replace(tmp_path, path)
+
+    def sync(self, papers):
+        """Bring the vectors up to date with `papers`, a list of (id, text) tuples,
+        returning True if anything changed. Papers no longer in the list are
+        dropped."""
+        digests = {ref: text_digest(text) for ref, text in papers}
+        keep = [
+            i
+            for i, (ref, digest) in enumerate(zip(self.ids, self.digests))
+            if digests.get(ref) == digest
+        ]
+        kept_ids = {self.ids[i] for i in keep}
+        new = [(ref, text) for ref, text in papers if ref not in kept_ids]
+
+        if not new and len(keep) == len(self.ids):
+            return False
+
+        self.rows = self.rows.take(keep).append(
+            SparseRows.from_texts([text for _, text in new])
+        )
+        self.ids = [self.ids[i] for i in keep] + [ref for ref, _ in new]
+        self.digests = np.array([digests[ref] for ref in self.ids], dtype=np.uint32)
+        return True
+
+    def idf(self):
+        """Smoothed inverse document frequency of every feature."""
+        document_frequency = np.bincount(self.rows.indices, minlength=N_FEATURES)
+        return np.log((1 + len(self.ids)) / (1 + document_frequency)) + 1
+
+    def group_scores(self, texts, groups):
+        """Score each text against groups of library papers. `groups` is a list of
+        boolean masks over the library. The score of a text for a group is its
+        average cosine similarity to the papers of that group, i.e., its dot
+        product with the group's centroid. Returns an array of shape
+        (len(texts), len(groups))."""
+        idf = self.idf()
+        documents = SparseRows.from_texts(texts).normalised(idf)
+        library = self.rows.normalised(idf)
+
+        # only the features that appear in the texts contribute to the scores, so
+        # the centroids are restricted to those
+        features = np.unique(documents.indices)
+        if len(features) == 0:
+            return np.zeros((len(documents), len(groups)))
+        positions = np.searchsorted(features, library.indices)
+        positions[positions == len(features)] = 0
+        relevant = features[positions] == library.indices
+        library_rows = library.row_index()[relevant]
+        positions, weights = positions[relevant], library.data[relevant]
+
+        centroids = np.zeros((len(groups), len(features)))
+        for g, mask in enumerate(groups):
+            mask = np.asarray(mask, dtype=bool)
+            if not mask.any():
+                continue
+            selected = mask[library_rows]
+            centroids[g] = np.bincount(
+                positions[selected], weights=weights[selected], minlength=len(features),
+            ) / np.count_nonzero(mask)
+
+        dense_documents = np.zeros((len(documents), len(features)))
+        dense_documents[
+            documents.row_index(), np.searchsorted(features, documents.indices)
+        ] = documents.data
+        return dense_documents @ centroids.T
+
+
+def load_library_vectors(texts):
+    """Load the cached vectors of the library and bring them up to date with
+    `texts`, as returned by PaperDatabase.get_paper_texts."""
+    cache_path = get_cache_path("vectors.npz")
+    vectors = LibraryVectors.load(cache_path)
+    if vectors.sync([(ref, title + " " + abstract) for ref, title, abstract in texts]):
+        vectors.save(cache_path)
+    return vectors
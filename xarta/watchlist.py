@@ -0,0 +1,99 @@
+"""Matching new papers against watched keywords and authors.
+
+Every watched keyword and author is a pattern, and the title, abstract and
+authors of a paper are normalised into a single text, so that all of the
+patterns are looked for in one pass over the text with an Aho-Corasick
+automaton, however many there are.
+
+Words are separated by single spaces and patterns start with a space, so that
+keywords match the start of words ('leptoquark' also matches 'leptoquarks').
+Authors are written as '@surname:initial' words, and also without the initial,
+so that a watched name without initials matches any initials.
+"""
+
+from collections import deque
+
+from .text import WORD_REGEX, author_key, normalise_text
+
+
+class Automaton:
+    """An Aho-Corasick automaton, finding which of many patterns occur in a
+    text in a single pass over it."""
+
+    def __init__(self, patterns):
+        # the transitions, failure link and patterns ending at every state of a
+        # trie of the patterns, where state 0 is the root
+        self.transitions = [{}]
+        self.failures = [0]
+        self.outputs = [set()]
+        for i, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                if char not in self.transitions[state]:
+                    self.transitions[state][char] = len(self.transitions)
+                    self.transitions.append({})
+                    self.failures.append(0)
+                    self.outputs.append(set())
+                state = self.transitions[state][char]
+            self.outputs[state].add(i)
+
+        # the failure link of a state leads to the state of the longest proper
+        # suffix of its string in the trie, and is found breadth first
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.transitions[state].items():
+                queue.append(child)
+                failure = self.failures[state]
+                while failure and char not in self.transitions[failure]:
+                    failure = self.failures[failure]
+                self.failures[child] = self.transitions[failure].get(char, 0)
+                self.outputs[child] |= self.outputs[self.failures[child]]
+
+    def search(self, text):
+        """Return the indices of the patterns occurring in `text`."""
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in self.transitions[state]:
+                state = self.failures[state]
+            state = self.transitions[state].get(char, 0)
+            found |= self.outputs[state]
+        return found
+
+
+def paper_text(paper):
+    """The normalised text of a paper, a dictionary as returned by
+    utils.get_arxiv_listing, in which the watched patterns are looked for."""
+    words = WORD_REGEX.findall(normalise_text(paper["title"] + " " + paper["abstract"]))
+    for name in paper["authors"]:
+        surname, initials = author_key(name)
+        words += [f"@{surname}:", f"@{surname}:{initials[:1]}"]
+    return " " + " ".join(words) + " "
+
+
+class Watchlist:
+    """Watched keywords and authors, given as lists of strings."""
+
+    def __init__(self, keywords, authors):
+        # the label of every pattern, e.g. the name of an author
+        patterns = {}
+        for keyword in keywords:
+            words = WORD_REGEX.findall(normalise_text(keyword))
+            if words:
+                patterns.setdefault(" " + " ".join(words), keyword)
+        for name in authors:
+            surname, initials = author_key(name)
+            if surname:
+                patterns.setdefault(f" @{surname}:{initials[:1]} ", name)
+        self.labels = list(patterns.values())
+        self.automaton = Automaton(list(patterns))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def matches(self, paper):
+        """The labels of the keywords and authors watched for in a paper."""
+        return [
+            self.labels[i] for i in sorted(self.automaton.search(paper_text(paper)))
+        ]